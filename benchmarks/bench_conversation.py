@@ -0,0 +1,292 @@
+"""Load test of the conversation agent against a local fake Mammouth API.
+
+Drives ``_async_handle_message`` of the conversation entity with many
+concurrent users on synthetic homes, and reports turns per second, p50/p95
+latency and memory growth. The results can be saved as a baseline and
+later runs compared to it, failing when they regress beyond a tolerance.
+
+Requires the development requirements (pytest-homeassistant-custom-component).
+
+Usage: python benchmarks/bench_conversation.py [--homes 100,1000,10000]
+       [--users 20] [--turns 10] [--latency 0.05] [--streaming]
+       [--save-baseline FILE | --baseline FILE [--tolerance 0.25]]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import dataclasses
+import gc
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fake_mammouth import FakeMammouthServer  # noqa: E402
+from homeassistant import config_entries  # noqa: E402
+from homeassistant.components.conversation import (  # noqa: E402
+    ChatLog,
+    ConversationInput,
+)
+from homeassistant.core import Context, HomeAssistant  # noqa: E402
+from homeassistant.helpers import area_registry as ar  # noqa: E402
+from homeassistant.helpers import entity_registry as er  # noqa: E402
+from pytest_homeassistant_custom_component.common import (  # noqa: E402
+    MockConfigEntry,
+    async_test_home_assistant,
+)
+
+from custom_components.mammouth_ai.const import (  # noqa: E402
+    CONF_API_KEY,
+    CONF_BASE_URL,
+    CONF_MODEL,
+    CONF_PERSIST_MEMORY,
+    CONF_STREAMING,
+    DEFAULT_MODEL,
+    DOMAIN,
+)
+from custom_components.mammouth_ai.conversation import (  # noqa: E402
+    MammouthConversationEntity,
+)
+from custom_components.mammouth_ai.coordinator import (  # noqa: E402
+    MammouthDataUpdateCoordinator,
+)
+
+AREAS = ["Salon", "Cuisine", "Chambre", "Bureau", "Salle de bain", "Garage"]
+
+# (domaine, état, attributs) des entités synthétiques
+ENTITY_KINDS = [
+    ("light", "on", {"brightness": 180}),
+    ("switch", "off", {}),
+    ("sensor", "21.5", {"unit_of_measurement": "°C", "device_class": "temperature"}),
+    ("binary_sensor", "off", {"device_class": "window"}),
+    ("climate", "heat", {"temperature": 20, "current_temperature": 19.5}),
+    ("cover", "open", {"current_position": 100}),
+]
+
+QUERIES = [
+    "allume la lumière du salon",
+    "quelle est la température dans la chambre ?",
+    "est-ce que la fenêtre du bureau est ouverte",
+    "ferme les volets de la cuisine",
+    "raconte-moi une blague sur les mammouths",
+]
+
+# Métriques comparées à la référence : sens de la régression
+GATED_METRICS = {"turns_per_second": "lower", "p95_ms": "higher"}
+
+
+def populate_home(hass: HomeAssistant, size: int) -> None:
+    """Create areas, registry entries and states for a synthetic home."""
+    area_reg = ar.async_get(hass)
+    entity_reg = er.async_get(hass)
+    area_ids = [
+        (area_reg.async_get_area_by_name(name) or area_reg.async_create(name)).id
+        for name in AREAS
+    ]
+    for index in range(size):
+        domain, state, attributes = ENTITY_KINDS[index % len(ENTITY_KINDS)]
+        area_id = area_ids[index % len(area_ids)]
+        entry = entity_reg.async_get_or_create(
+            domain, "bench", f"{domain}_{index}", suggested_object_id=f"bench_{index}"
+        )
+        entity_reg.async_update_entity(entry.entity_id, area_id=area_id)
+        hass.states.async_set(
+            entry.entity_id,
+            state,
+            {"friendly_name": f"{domain} {index} {AREAS[index % len(AREAS)]}"}
+            | attributes,
+        )
+
+
+def build_input(text: str, user_id: str, conversation_id: str) -> ConversationInput:
+    """Build a conversation input, whatever the fields of this HA version."""
+    values: dict[str, Any] = {
+        "text": text,
+        # La mémoire est indexée par utilisateur : un contexte chacun
+        "context": Context(user_id=user_id),
+        "conversation_id": conversation_id,
+        "language": "fr",
+    }
+    return ConversationInput(
+        **{
+            field.name: values.get(field.name)
+            for field in dataclasses.fields(ConversationInput)
+            if field.name in values or field.default is dataclasses.MISSING
+        }
+    )
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Return the nearest-rank percentile of a list of values."""
+    ordered = sorted(values)
+    return ordered[max(0, -(-len(ordered) * pct // 100) - 1)]
+
+
+async def run_users(
+    hass: HomeAssistant,
+    entity: MammouthConversationEntity,
+    users: int,
+    turns: int,
+) -> tuple[list[float], float]:
+    """Run concurrent conversations and return per-turn latencies."""
+    latencies: list[float] = []
+
+    async def user(index: int) -> None:
+        user_id = f"bench-user-{index}"
+        conversation_id = f"bench-{index}"
+        for turn in range(turns):
+            text = QUERIES[(index + turn) % len(QUERIES)]
+            start = time.perf_counter()
+            await entity._async_handle_message(
+                build_input(text, user_id, conversation_id),
+                ChatLog(hass, conversation_id),
+            )
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(user(index) for index in range(users)))
+    return latencies, time.perf_counter() - start
+
+
+async def bench_home(args: argparse.Namespace, size: int) -> dict[str, float]:
+    """Benchmark the agent for one home size."""
+    server = FakeMammouthServer(
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        retry_after=0,
+        seed=size,
+    )
+    base_url = await server.start()
+    async with async_test_home_assistant() as hass:
+        populate_home(hass, size)
+        entry = MockConfigEntry(
+            domain=DOMAIN,
+            title="Bench",
+            data={
+                CONF_API_KEY: "bench",
+                CONF_BASE_URL: base_url,
+                CONF_MODEL: DEFAULT_MODEL,
+            },
+            options={CONF_STREAMING: args.streaming, CONF_PERSIST_MEMORY: False},
+        )
+        entry.add_to_hass(hass)
+        config_entries.current_entry.set(entry)
+
+        coordinator = MammouthDataUpdateCoordinator(hass, entry)
+        await coordinator.async_setup_memory()
+        entity = MammouthConversationEntity(coordinator, entry)
+        entity.hass = hass
+        entity.entity_id = f"conversation.{DOMAIN}_bench"
+        try:
+            # Tour de chauffe : index des entités, template et connexions
+            await run_users(hass, entity, 1, 1)
+
+            gc.collect()
+            if args.memory:
+                tracemalloc.start()
+            before = tracemalloc.get_traced_memory()[0] if args.memory else 0
+            latencies, elapsed = await run_users(hass, entity, args.users, args.turns)
+            gc.collect()
+            growth = tracemalloc.get_traced_memory()[0] - before if args.memory else 0
+            tracemalloc.stop()
+        finally:
+            entity._async_shutdown_entity_index()
+            await coordinator.async_shutdown()
+            await server.stop()
+
+    return {
+        "turns_per_second": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "memory_growth_kb": growth / 1024,
+        "upstream_requests": server.requests,
+        "injected_errors": server.errors,
+    }
+
+
+def compare(
+    results: dict[str, dict[str, float]],
+    baseline: dict[str, dict[str, float]],
+    tolerance: float,
+) -> list[str]:
+    """Return the regressions of the results against the baseline."""
+    regressions = []
+    for home, metrics in results.items():
+        for metric, worse in GATED_METRICS.items():
+            reference = baseline.get(home, {}).get(metric)
+            if not reference:
+                continue
+            change = (metrics[metric] - reference) / reference
+            if (worse == "higher" and change > tolerance) or (
+                worse == "lower" and -change > tolerance
+            ):
+                regressions.append(
+                    f"{home} entities: {metric} {metrics[metric]:.1f} "
+                    f"vs baseline {reference:.1f} ({change:+.0%})"
+                )
+    return regressions
+
+
+async def async_main(args: argparse.Namespace) -> int:
+    """Run every benchmark and gate against the baseline."""
+    results: dict[str, dict[str, float]] = {}
+    print(
+        f"{'entities':>8} {'turns/s':>9} {'p50 ms':>8} {'p95 ms':>8} "
+        f"{'mem KB':>9} {'requests':>9} {'errors':>7}"
+    )
+    for size in args.homes:
+        metrics = await bench_home(args, size)
+        results[str(size)] = metrics
+        print(
+            f"{size:>8} {metrics['turns_per_second']:>9.1f} "
+            f"{metrics['p50_ms']:>8.1f} {metrics['p95_ms']:>8.1f} "
+            f"{metrics['memory_growth_kb']:>9.0f} "
+            f"{metrics['upstream_requests']:>9} {metrics['injected_errors']:>7}"
+        )
+
+    if args.save_baseline:
+        args.save_baseline.write_text(json.dumps(results, indent=2) + "\n")
+        print(f"\nBaseline saved to {args.save_baseline}")
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text())
+        if regressions := compare(results, baseline, args.tolerance):
+            print("\nPerformance regressions:")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+        print(f"\nNo regression beyond {args.tolerance:.0%} of {args.baseline}")
+    return 0
+
+
+def main() -> None:
+    """Parse the command line and run the benchmarks."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--homes",
+        type=lambda value: [int(size) for size in value.split(",")],
+        default=[100, 1000, 10000],
+        help="comma separated entity counts",
+    )
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--turns", type=int, default=10, help="turns per user")
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="0 to 1")
+    parser.add_argument("--streaming", action="store_true")
+    parser.add_argument("--no-memory", dest="memory", action="store_false")
+    parser.add_argument("--save-baseline", type=Path)
+    parser.add_argument("--baseline", type=Path)
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    sys.exit(asyncio.run(async_main(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
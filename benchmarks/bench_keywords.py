@@ -0,0 +1,77 @@
+"""Micro-benchmark of the smart filtering keyword matcher.
+
+Compares the compiled matcher with the previous implementation, which
+rebuilt the keyword dict and ran a substring test for every keyword of
+every domain on each call.
+
+Usage: python benchmarks/bench_keywords.py [iterations]
+"""
+
+from __future__ import annotations
+
+import importlib.util
+import sys
+import timeit
+from pathlib import Path
+
+# Chargement direct du module : pas besoin de Home Assistant pour le bench
+_KEYWORDS_PATH = (
+    Path(__file__).resolve().parent.parent
+    / "custom_components"
+    / "mammouth_ai"
+    / "keywords.py"
+)
+_spec = importlib.util.spec_from_file_location("mammouth_keywords", _KEYWORDS_PATH)
+keywords = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(keywords)
+
+QUERIES = [
+    "allume la lumière du salon",
+    "quelle est la température dans la chambre ?",
+    "is the garage door open",
+    "doe de lamp in de woonkamer aan",
+    "schalte die Heizung im Badezimmer ein",
+    "raconte-moi une blague sur les mammouths",
+    "what is the humidity in the basement and is the window closed",
+]
+
+
+def legacy_extract(query: str) -> set[str]:
+    """Reproduce the previous per-call dict build and substring scan."""
+    domain_keywords: dict[str, list[str]] = {}
+    for table in keywords.DOMAIN_KEYWORDS.values():
+        for domain, words in table.items():
+            domain_keywords.setdefault(domain, []).extend(words)
+
+    query_lower = query.lower()
+    relevant_domains = set()
+    for domain, words in domain_keywords.items():
+        if any(keyword in query_lower for keyword in words):
+            relevant_domains.add(domain)
+    return relevant_domains
+
+
+def main(iterations: int = 20000) -> None:
+    """Run the benchmark and print per-query timings."""
+    matcher = keywords.DEFAULT_MATCHER
+
+    print(f"{'query':<62} {'legacy µs':>10} {'matcher µs':>11} {'speedup':>8}")
+    for query in QUERIES:
+        legacy = timeit.timeit(lambda: legacy_extract(query), number=iterations)
+        compiled = timeit.timeit(lambda: matcher.match(query), number=iterations)
+        print(
+            f"{query[:60]:<62} {legacy / iterations * 1e6:>10.2f} "
+            f"{compiled / iterations * 1e6:>11.2f} {legacy / compiled:>7.1f}x"
+        )
+        if legacy_extract(query) != matcher.match(query):
+            print(
+                f"  legacy={sorted(legacy_extract(query))} "
+                f"matcher={sorted(matcher.match(query))}"
+            )
+
+    build = timeit.timeit(keywords.KeywordMatcher, number=100) / 100
+    print(f"\nMatcher build time: {build * 1e3:.2f} ms (once at import)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
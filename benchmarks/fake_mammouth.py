@@ -0,0 +1,170 @@
+"""Local stand-in for the Mammouth AI API, used by the benchmarks.
+
+Serves ``/v1/models`` and ``/v1/chat/completions`` (plain JSON or
+server-sent events) with configurable latency and error injection. Like
+the real API, a stream only ends with a usage chunk when the request asks
+for it with ``stream_options.include_usage``.
+
+Usage: python benchmarks/fake_mammouth.py [--port 8089] [--latency 0.2]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+
+from aiohttp import web
+
+DEFAULT_REPLY = "D'accord, c'est fait. La lumière du salon est allumée."
+
+
+class FakeMammouthServer:
+    """aiohttp application mimicking the OpenAI compatible Mammouth API."""
+
+    def __init__(
+        self,
+        *,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: int = 503,
+        retry_after: float | None = None,
+        chunk_size: int = 8,
+        reply: str = DEFAULT_REPLY,
+        seed: int | None = None,
+    ) -> None:
+        """Initialize the server settings."""
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.retry_after = retry_after
+        self.chunk_size = chunk_size
+        self.reply = reply
+        self.requests = 0
+        self.errors = 0
+        self._random = random.Random(seed)
+        self._runner: web.AppRunner | None = None
+
+        self.app = web.Application()
+        self.app.router.add_get("/v1/models", self._handle_models)
+        self.app.router.add_post("/v1/chat/completions", self._handle_chat)
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Start serving and return the base URL of the API."""
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        sockets = site._server.sockets  # port choisi par le système si 0
+        return f"http://{host}:{sockets[0].getsockname()[1]}/v1"
+
+    async def stop(self) -> None:
+        """Stop serving."""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _delay(self) -> None:
+        """Simulate the model latency."""
+        delay = self.latency + self._random.uniform(-self.jitter, self.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def _injected_error(self) -> web.Response | None:
+        """Return an error response for the configured share of requests."""
+        if self.error_rate <= 0 or self._random.random() >= self.error_rate:
+            return None
+        self.errors += 1
+        headers = {}
+        if self.retry_after is not None:
+            headers["Retry-After"] = str(self.retry_after)
+        return web.json_response(
+            {"error": {"message": "Injected error"}},
+            status=self.error_status,
+            headers=headers,
+        )
+
+    async def _handle_models(self, request: web.Request) -> web.Response:
+        """List the available models."""
+        return web.json_response({"data": [{"id": "mammouth-default"}]})
+
+    async def _handle_chat(self, request: web.Request) -> web.StreamResponse:
+        """Answer a chat completion, streamed or not."""
+        self.requests += 1
+        body = await request.read()
+        payload = json.loads(body)
+        await self._delay()
+        if (error := self._injected_error()) is not None:
+            return error
+
+        usage = {
+            "prompt_tokens": len(body) // 4,
+            "completion_tokens": len(self.reply) // 4,
+            "total_tokens": (len(body) + len(self.reply)) // 4,
+        }
+        if not payload.get("stream"):
+            return web.json_response(
+                {
+                    "choices": [
+                        {"message": {"role": "assistant", "content": self.reply}}
+                    ],
+                    "usage": usage,
+                }
+            )
+
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        await _write_event(response, {"choices": [{"delta": {"role": "assistant"}}]})
+        for start in range(0, len(self.reply), self.chunk_size):
+            chunk = self.reply[start : start + self.chunk_size]
+            await _write_event(response, {"choices": [{"delta": {"content": chunk}}]})
+        if (payload.get("stream_options") or {}).get("include_usage"):
+            await _write_event(response, {"choices": [], "usage": usage})
+        await response.write(b"data: [DONE]\n\n")
+        await response.write_eof()
+        return response
+
+
+async def _write_event(response: web.StreamResponse, data: dict) -> None:
+    """Write one server-sent event."""
+    await response.write(f"data: {json.dumps(data)}\n\n".encode())
+
+
+async def _serve(args: argparse.Namespace) -> None:
+    """Run the server until interrupted."""
+    server = FakeMammouthServer(
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        retry_after=args.retry_after,
+    )
+    base_url = await server.start(args.host, args.port)
+    print(f"Fake Mammouth API listening on {base_url}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+
+
+def main() -> None:
+    """Parse the command line and serve."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="0 to 1")
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--retry-after", type=float, default=None, help="seconds")
+    try:
+        asyncio.run(_serve(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -10,8 +10,9 @@ from homeassistant.exceptions import ConfigEntryNotReady
 
 from .const import DOMAIN
 from .coordinator import MammouthDataUpdateCoordinator
+from .memory import ConversationMemory
 
-PLATFORMS = ["conversation"]
+PLATFORMS = ["conversation", "sensor"]
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -27,8 +28,15 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         await coordinator.async_validate_connection()
     except Exception as err:
         _LOGGER.error("Failed to connect to Mammouth AI: %s", err)
+        await coordinator.async_shutdown()
         raise ConfigEntryNotReady(f"Unable to connect to Mammouth AI: {err}") from err
 
+    # Chargement de l'index de la mémoire (expiration des conversations)
+    await coordinator.async_setup_memory()
+
+    # Connexions ouvertes à l'avance pour éviter la poignée de main TLS
+    await coordinator.async_setup_connections()
+
     # Stockage du coordinator
     hass.data.setdefault(DOMAIN, {})
     hass.data[DOMAIN][entry.entry_id] = coordinator
@@ -61,3 +69,10 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
 async def _async_update_listener(hass: HomeAssistant, entry: ConfigEntry) -> None:
     """Update listener for options changes."""
     await hass.config_entries.async_reload(entry.entry_id)
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the stored conversation memory of a deleted config entry."""
+    await ConversationMemory(
+        hass, entry.entry_id, max_cached=0, max_storage_bytes=0
+    ).async_remove_all()
@@ -0,0 +1,110 @@
+"""Circuit breaker for Mammouth AI."""
+
+from __future__ import annotations
+
+import logging
+import time
+from typing import Any
+
+from homeassistant.core import callback
+from homeassistant.exceptions import HomeAssistantError
+
+_LOGGER = logging.getLogger(__name__)
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(HomeAssistantError):
+    """Request rejected because the API is considered unavailable."""
+
+
+class CircuitBreaker:
+    """Stop calling an unavailable API and fail fast instead.
+
+    The circuit opens after consecutive outage failures or a failed health
+    check, and closes again as soon as a health check succeeds. Once the
+    reset timeout has elapsed it becomes half-open: the next request is a
+    trial that closes the circuit on success and re-opens it on failure,
+    and other requests are rejected while it is in flight.
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float) -> None:
+        """Initialize the breaker."""
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+        self._state = STATE_CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self.trips = 0
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        """Return the state of the circuit."""
+        if (
+            self._state == STATE_OPEN
+            and time.monotonic() - self._opened_at >= self._reset_timeout
+        ):
+            self._state = STATE_HALF_OPEN
+        return self._state
+
+    @property
+    def is_closed(self) -> bool:
+        """Return True if requests flow normally."""
+        return self.state == STATE_CLOSED
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        """Return the breaker counters."""
+        return {
+            "circuit_state": self.state,
+            "circuit_trips": self.trips,
+            "circuit_rejected": self.rejected,
+        }
+
+    @callback
+    def async_check(self, message: str) -> None:
+        """Raise CircuitOpenError if requests are not allowed.
+
+        While half-open, a single trial request is let through.
+        """
+        state = self.state
+        if state == STATE_OPEN or (state == STATE_HALF_OPEN and self._trial_in_flight):
+            self.rejected += 1
+            raise CircuitOpenError(message)
+        if state == STATE_HALF_OPEN:
+            self._trial_in_flight = True
+
+    @callback
+    def async_release_trial(self) -> None:
+        """Let another trial through after one ended without a verdict."""
+        self._trial_in_flight = False
+
+    @callback
+    def async_record_success(self) -> None:
+        """Record a successful request."""
+        if self._state != STATE_CLOSED:
+            _LOGGER.info("Mammouth AI is reachable again, closing the circuit")
+        self._state = STATE_CLOSED
+        self._failures = 0
+        self._trial_in_flight = False
+
+    @callback
+    def async_record_failure(self) -> None:
+        """Record a request that failed because of the API."""
+        self._failures += 1
+        if self._state == STATE_HALF_OPEN or self._failures >= self._failure_threshold:
+            self.async_trip()
+
+    @callback
+    def async_trip(self) -> None:
+        """Open the circuit."""
+        if self._state != STATE_OPEN:
+            self.trips += 1
+            _LOGGER.warning("Mammouth AI looks unavailable, opening the circuit")
+        self._state = STATE_OPEN
+        self._opened_at = time.monotonic()
+        self._trial_in_flight = False
@@ -0,0 +1,176 @@
+"""Request deduplication and caching for Mammouth AI."""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Iterable
+from typing import Any, Dict, Generic, NamedTuple, Optional, Set, TypeVar
+
+from homeassistant.const import EVENT_STATE_CHANGED
+from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, callback
+
+_LOGGER = logging.getLogger(__name__)
+
+_T = TypeVar("_T")
+
+
+def request_key(body: bytes) -> str:
+    """Return a stable hash of an encoded request body."""
+    return hashlib.sha256(body).hexdigest()
+
+
+class SingleFlight(Generic[_T]):
+    """Share one in-flight call between concurrent identical requests.
+
+    The first caller for a key starts the call in its own task; callers
+    arriving while it runs await the same task. Cancelling one caller does
+    not cancel the shared call for the others.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the single-flight group."""
+        self._inflight: Dict[str, asyncio.Task[_T]] = {}
+        self.hits = 0
+        self.leaders = 0
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Return the deduplication counters."""
+        return {
+            "singleflight_hits": self.hits,
+            "singleflight_leaders": self.leaders,
+            "singleflight_inflight": len(self._inflight),
+        }
+
+    async def async_do(self, key: str, factory: Callable[[], Awaitable[_T]]) -> _T:
+        """Run the call for a key, or join the one already in flight."""
+        if (task := self._inflight.get(key)) is not None:
+            self.hits += 1
+            _LOGGER.debug("Joining in-flight request %s", key[:12])
+            return await asyncio.shield(task)
+
+        self.leaders += 1
+        task = asyncio.ensure_future(factory())
+        self._inflight[key] = task
+        task.add_done_callback(lambda done: self._async_call_done(key, done))
+        return await asyncio.shield(task)
+
+    def _async_call_done(self, key: str, task: asyncio.Task[_T]) -> None:
+        """Forget a finished call."""
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Éviter l'avertissement si tous les appelants ont été annulés
+        if not task.cancelled():
+            task.exception()
+
+
+class _CacheEntry(NamedTuple):
+    """A cached response."""
+
+    expires_at: float
+    value: Any
+    entity_ids: frozenset[str]
+
+
+class ResponseCache:
+    """TTL and LRU bounded cache of chat completion responses.
+
+    Entries can reference the entities whose states were embedded in the
+    prompt; any state change of one of them invalidates the entry.
+    """
+
+    def __init__(self, hass: HomeAssistant, max_entries: int, ttl: float) -> None:
+        """Initialize the cache."""
+        self._hass = hass
+        self._max_entries = max_entries
+        self._ttl = ttl
+        self._entries: OrderedDict[str, _CacheEntry] = OrderedDict()
+        # entity_id -> clés des entrées qui en dépendent
+        self._keys_by_entity: Dict[str, Set[str]] = {}
+        self._unsub: Optional[CALLBACK_TYPE] = None
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """Return the cache counters."""
+        lookups = self.hits + self.misses
+        return {
+            "response_cache_size": len(self._entries),
+            "response_cache_hits": self.hits,
+            "response_cache_misses": self.misses,
+            "response_cache_hit_ratio": (
+                round(self.hits / lookups, 3) if lookups else None
+            ),
+            "response_cache_invalidations": self.invalidations,
+        }
+
+    @callback
+    def async_get(self, key: str) -> Optional[Any]:
+        """Return a cached response if it is still valid."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        if entry.expires_at <= time.monotonic():
+            self._async_remove(key)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry.value
+
+    @callback
+    def async_put(self, key: str, value: Any, entity_ids: Iterable[str] = ()) -> None:
+        """Cache a response, evicting the least recently used entries."""
+        self._async_remove(key)
+        entry = _CacheEntry(time.monotonic() + self._ttl, value, frozenset(entity_ids))
+        self._entries[key] = entry
+        for entity_id in entry.entity_ids:
+            self._keys_by_entity.setdefault(entity_id, set()).add(key)
+        if entry.entity_ids and self._unsub is None:
+            self._unsub = self._hass.bus.async_listen(
+                EVENT_STATE_CHANGED,
+                self._async_handle_state_changed,
+                event_filter=self._async_filter_state_changed,
+            )
+        while len(self._entries) > self._max_entries:
+            self._async_remove(next(iter(self._entries)))
+
+    @callback
+    def async_shutdown(self) -> None:
+        """Stop listening to state changes and drop every entry."""
+        if self._unsub is not None:
+            self._unsub()
+            self._unsub = None
+        self._entries.clear()
+        self._keys_by_entity.clear()
+
+    @callback
+    def _async_remove(self, key: str) -> None:
+        """Remove an entry and its entity references."""
+        if (entry := self._entries.pop(key, None)) is None:
+            return
+        for entity_id in entry.entity_ids:
+            keys = self._keys_by_entity.get(entity_id)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_entity[entity_id]
+
+    @callback
+    def _async_filter_state_changed(self, event_data: Any) -> bool:
+        """Only handle state changes of referenced entities."""
+        return event_data["entity_id"] in self._keys_by_entity
+
+    @callback
+    def _async_handle_state_changed(self, event: Event) -> None:
+        """Invalidate the entries that embed a changed entity."""
+        for key in list(self._keys_by_entity.get(event.data["entity_id"], ())):
+            self._async_remove(key)
+            self.invalidations += 1
@@ -13,35 +13,97 @@ from homeassistant.const import CONF_API_KEY
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers import config_validation as cv
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.selector import (
+    AreaSelector,
+    AreaSelectorConfig,
+    ConversationAgentSelector,
+    TextSelector,
+    TextSelectorConfig,
+)
 
 from .const import (
+    CONF_ADAPTIVE_GENERATION,
+    CONF_BACKGROUND_SUMMARY,
     CONF_BASE_URL,
+    CONF_CACHE_SIZE,
+    CONF_CACHE_TTL,
+    CONF_COMPACT_ENTITIES,
+    CONF_CUSTOM_KEYWORDS,
+    CONF_DELTA_CONTEXT,
+    CONF_DELTA_REFRESH_TURNS,
     CONF_ENABLE_MEMORY,
     CONF_ENTITY_DOMAINS,
+    CONF_EXCLUDE_AREAS,
+    CONF_FALLBACK_AGENT,
+    CONF_FALLBACK_TARGETS,
+    CONF_HEDGING,
+    CONF_INCLUDE_AREAS,
+    CONF_LATENCY_BUDGET,
     CONF_LLM_HASS_API,
+    CONF_LOCAL_INTENTS,
     CONF_MAX_ENTITIES,
     CONF_MAX_MESSAGES,
+    CONF_MAX_RETRIES,
     CONF_MAX_TOKENS,
+    CONF_MEMORY_MAX_CONVERSATIONS,
+    CONF_MEMORY_MAX_STORAGE,
     CONF_MEMORY_TIMEOUT,
     CONF_MINIMAL_ATTRIBUTES,
     CONF_MODEL,
+    CONF_NATIVE_TOOLS,
+    CONF_PERSIST_MEMORY,
+    CONF_POOL_SIZE,
+    CONF_PREWARM,
     CONF_PROMPT,
+    CONF_RESPONSE_CACHE,
     CONF_SMART_FILTERING,
+    CONF_STABLE_PREFIX,
+    CONF_STREAMING,
+    CONF_SUMMARIZE_DROPPED,
+    CONF_SUMMARY_MODEL,
+    CONF_SUMMARY_THRESHOLD,
     CONF_TEMPERATURE,
     CONF_TIMEOUT,
+    CONF_TOKEN_BUDGET,
+    DEFAULT_ADAPTIVE_GENERATION,
+    DEFAULT_BACKGROUND_SUMMARY,
     DEFAULT_BASE_URL,
+    DEFAULT_CACHE_SIZE,
+    DEFAULT_CACHE_TTL,
+    DEFAULT_COMPACT_ENTITIES,
+    DEFAULT_DELTA_CONTEXT,
+    DEFAULT_DELTA_REFRESH_TURNS,
     DEFAULT_ENABLE_MEMORY,
     DEFAULT_ENTITY_DOMAINS,
+    DEFAULT_EXCLUDE_AREAS,
+    DEFAULT_HEDGING,
+    DEFAULT_INCLUDE_AREAS,
+    DEFAULT_LATENCY_BUDGET,
+    DEFAULT_LOCAL_INTENTS,
     DEFAULT_MAX_ENTITIES,
     DEFAULT_MAX_MESSAGES,
+    DEFAULT_MAX_RETRIES,
     DEFAULT_MAX_TOKENS,
+    DEFAULT_MEMORY_MAX_CONVERSATIONS,
+    DEFAULT_MEMORY_MAX_STORAGE,
     DEFAULT_MEMORY_TIMEOUT,
     DEFAULT_MINIMAL_ATTRIBUTES,
     DEFAULT_MODEL,
+    DEFAULT_NATIVE_TOOLS,
+    DEFAULT_PERSIST_MEMORY,
+    DEFAULT_POOL_SIZE,
+    DEFAULT_PREWARM,
     DEFAULT_PROMPT,
+    DEFAULT_RESPONSE_CACHE,
     DEFAULT_SMART_FILTERING,
+    DEFAULT_STABLE_PREFIX,
+    DEFAULT_STREAMING,
+    DEFAULT_SUMMARIZE_DROPPED,
+    DEFAULT_SUMMARY_MODEL,
+    DEFAULT_SUMMARY_THRESHOLD,
     DEFAULT_TEMPERATURE,
     DEFAULT_TIMEOUT,
+    DEFAULT_TOKEN_BUDGET,
     DOMAIN,
 )
 
@@ -142,16 +204,74 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
                             CONF_TEMPERATURE, DEFAULT_TEMPERATURE
                         ),
                     ): vol.All(vol.Coerce(float), vol.Range(min=0.0, max=2.0)),
+                    vol.Optional(
+                        CONF_ADAPTIVE_GENERATION,
+                        default=self.config_entry.options.get(
+                            CONF_ADAPTIVE_GENERATION, DEFAULT_ADAPTIVE_GENERATION
+                        ),
+                    ): cv.boolean,
                     vol.Optional(
                         CONF_TIMEOUT,
                         default=self.config_entry.options.get(
                             CONF_TIMEOUT, DEFAULT_TIMEOUT
                         ),
                     ): cv.positive_int,
+                    vol.Optional(
+                        CONF_MAX_RETRIES,
+                        default=self.config_entry.options.get(
+                            CONF_MAX_RETRIES, DEFAULT_MAX_RETRIES
+                        ),
+                    ): cv.positive_int,
+                    vol.Optional(
+                        CONF_FALLBACK_TARGETS,
+                        default=self.config_entry.options.get(
+                            CONF_FALLBACK_TARGETS, ""
+                        ),
+                    ): TextSelector(TextSelectorConfig(multiline=True)),
+                    vol.Optional(
+                        CONF_LATENCY_BUDGET,
+                        default=self.config_entry.options.get(
+                            CONF_LATENCY_BUDGET, DEFAULT_LATENCY_BUDGET
+                        ),
+                    ): cv.positive_int,
+                    vol.Optional(
+                        CONF_HEDGING,
+                        default=self.config_entry.options.get(
+                            CONF_HEDGING, DEFAULT_HEDGING
+                        ),
+                    ): cv.boolean,
+                    vol.Optional(
+                        CONF_POOL_SIZE,
+                        default=self.config_entry.options.get(
+                            CONF_POOL_SIZE, DEFAULT_POOL_SIZE
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=1, max=100)),
+                    vol.Optional(
+                        CONF_PREWARM,
+                        default=self.config_entry.options.get(
+                            CONF_PREWARM, DEFAULT_PREWARM
+                        ),
+                    ): cv.boolean,
                     vol.Optional(
                         CONF_LLM_HASS_API,
                         default=self.config_entry.options.get(CONF_LLM_HASS_API, True),
                     ): cv.boolean,
+                    vol.Optional(
+                        CONF_LOCAL_INTENTS,
+                        default=self.config_entry.options.get(
+                            CONF_LOCAL_INTENTS, DEFAULT_LOCAL_INTENTS
+                        ),
+                    ): cv.boolean,
+                    vol.Optional(
+                        CONF_NATIVE_TOOLS,
+                        default=self.config_entry.options.get(
+                            CONF_NATIVE_TOOLS, DEFAULT_NATIVE_TOOLS
+                        ),
+                    ): cv.boolean,
+                    vol.Optional(
+                        CONF_FALLBACK_AGENT,
+                        default=self.config_entry.options.get(CONF_FALLBACK_AGENT, ""),
+                    ): ConversationAgentSelector(),
                     vol.Optional(
                         CONF_ENABLE_MEMORY,
                         default=self.config_entry.options.get(
@@ -170,6 +290,73 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
                             CONF_MEMORY_TIMEOUT, DEFAULT_MEMORY_TIMEOUT
                         ),
                     ): cv.positive_int,
+                    vol.Optional(
+                        CONF_PERSIST_MEMORY,
+                        default=self.config_entry.options.get(
+                            CONF_PERSIST_MEMORY, DEFAULT_PERSIST_MEMORY
+                        ),
+                    ): cv.boolean,
+                    vol.Optional(
+                        CONF_MEMORY_MAX_CONVERSATIONS,
+                        default=self.config_entry.options.get(
+                            CONF_MEMORY_MAX_CONVERSATIONS,
+                            DEFAULT_MEMORY_MAX_CONVERSATIONS,
+                        ),
+                    ): cv.positive_int,
+                    vol.Optional(
+                        CONF_MEMORY_MAX_STORAGE,
+                        default=self.config_entry.options.get(
+                            CONF_MEMORY_MAX_STORAGE, DEFAULT_MEMORY_MAX_STORAGE
+                        ),
+                    ): cv.positive_int,
+                    vol.Optional(
+                        CONF_TOKEN_BUDGET,
+                        default=self.config_entry.options.get(
+                            CONF_TOKEN_BUDGET, DEFAULT_TOKEN_BUDGET
+                        ),
+                    ): cv.positive_int,
+                    vol.Optional(
+                        CONF_SUMMARIZE_DROPPED,
+                        default=self.config_entry.options.get(
+                            CONF_SUMMARIZE_DROPPED, DEFAULT_SUMMARIZE_DROPPED
+                        ),
+                    ): cv.boolean,
+                    vol.Optional(
+                        CONF_BACKGROUND_SUMMARY,
+                        default=self.config_entry.options.get(
+                            CONF_BACKGROUND_SUMMARY, DEFAULT_BACKGROUND_SUMMARY
+                        ),
+                    ): cv.boolean,
+                    vol.Optional(
+                        CONF_SUMMARY_MODEL,
+                        default=self.config_entry.options.get(
+                            CONF_SUMMARY_MODEL, DEFAULT_SUMMARY_MODEL
+                        ),
+                    ): str,
+                    vol.Optional(
+                        CONF_SUMMARY_THRESHOLD,
+                        default=self.config_entry.options.get(
+                            CONF_SUMMARY_THRESHOLD, DEFAULT_SUMMARY_THRESHOLD
+                        ),
+                    ): cv.positive_int,
+                    vol.Optional(
+                        CONF_RESPONSE_CACHE,
+                        default=self.config_entry.options.get(
+                            CONF_RESPONSE_CACHE, DEFAULT_RESPONSE_CACHE
+                        ),
+                    ): cv.boolean,
+                    vol.Optional(
+                        CONF_CACHE_TTL,
+                        default=self.config_entry.options.get(
+                            CONF_CACHE_TTL, DEFAULT_CACHE_TTL
+                        ),
+                    ): cv.positive_int,
+                    vol.Optional(
+                        CONF_CACHE_SIZE,
+                        default=self.config_entry.options.get(
+                            CONF_CACHE_SIZE, DEFAULT_CACHE_SIZE
+                        ),
+                    ): cv.positive_int,
                     vol.Optional(
                         CONF_MAX_ENTITIES,
                         default=self.config_entry.options.get(
@@ -195,18 +382,64 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
                             "vacuum": "Vacuum",
                         }
                     ),
+                    vol.Optional(
+                        CONF_INCLUDE_AREAS,
+                        default=self.config_entry.options.get(
+                            CONF_INCLUDE_AREAS, DEFAULT_INCLUDE_AREAS
+                        ),
+                    ): AreaSelector(AreaSelectorConfig(multiple=True)),
+                    vol.Optional(
+                        CONF_EXCLUDE_AREAS,
+                        default=self.config_entry.options.get(
+                            CONF_EXCLUDE_AREAS, DEFAULT_EXCLUDE_AREAS
+                        ),
+                    ): AreaSelector(AreaSelectorConfig(multiple=True)),
                     vol.Optional(
                         CONF_SMART_FILTERING,
                         default=self.config_entry.options.get(
                             CONF_SMART_FILTERING, DEFAULT_SMART_FILTERING
                         ),
                     ): cv.boolean,
+                    vol.Optional(
+                        CONF_CUSTOM_KEYWORDS,
+                        default=self.config_entry.options.get(CONF_CUSTOM_KEYWORDS, ""),
+                    ): TextSelector(TextSelectorConfig(multiline=True)),
                     vol.Optional(
                         CONF_MINIMAL_ATTRIBUTES,
                         default=self.config_entry.options.get(
                             CONF_MINIMAL_ATTRIBUTES, DEFAULT_MINIMAL_ATTRIBUTES
                         ),
                     ): cv.boolean,
+                    vol.Optional(
+                        CONF_COMPACT_ENTITIES,
+                        default=self.config_entry.options.get(
+                            CONF_COMPACT_ENTITIES, DEFAULT_COMPACT_ENTITIES
+                        ),
+                    ): cv.boolean,
+                    vol.Optional(
+                        CONF_DELTA_CONTEXT,
+                        default=self.config_entry.options.get(
+                            CONF_DELTA_CONTEXT, DEFAULT_DELTA_CONTEXT
+                        ),
+                    ): cv.boolean,
+                    vol.Optional(
+                        CONF_DELTA_REFRESH_TURNS,
+                        default=self.config_entry.options.get(
+                            CONF_DELTA_REFRESH_TURNS, DEFAULT_DELTA_REFRESH_TURNS
+                        ),
+                    ): cv.positive_int,
+                    vol.Optional(
+                        CONF_STREAMING,
+                        default=self.config_entry.options.get(
+                            CONF_STREAMING, DEFAULT_STREAMING
+                        ),
+                    ): cv.boolean,
+                    vol.Optional(
+                        CONF_STABLE_PREFIX,
+                        default=self.config_entry.options.get(
+                            CONF_STABLE_PREFIX, DEFAULT_STABLE_PREFIX
+                        ),
+                    ): cv.boolean,
                 }
             ),
         )
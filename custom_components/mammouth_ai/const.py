@@ -1,5 +1,7 @@
 """Constants for the Mammouth AI integration."""
 
+from datetime import timedelta
+
 DOMAIN = "mammouth_ai"
 MANUFACTURER = "Mammouth"
 
@@ -10,26 +12,71 @@ CONF_MODEL = "model"
 CONF_PROMPT = "prompt"
 CONF_MAX_TOKENS = "max_tokens"
 CONF_TEMPERATURE = "temperature"
+CONF_ADAPTIVE_GENERATION = "adaptive_generation"
 CONF_TIMEOUT = "timeout"
+CONF_MAX_RETRIES = "max_retries"
+CONF_FALLBACK_TARGETS = "fallback_targets"
+CONF_LATENCY_BUDGET = "latency_budget"
+CONF_HEDGING = "hedging"
+CONF_POOL_SIZE = "pool_size"
+CONF_PREWARM = "prewarm_connections"
 CONF_LLM_HASS_API = "llm_hass_api"  # Ajout de cette constante
 CONF_ENABLE_MEMORY = "enable_memory"
 CONF_MAX_MESSAGES = "max_messages"
 CONF_MEMORY_TIMEOUT = "memory_timeout"
+CONF_PERSIST_MEMORY = "persist_memory"
+CONF_MEMORY_MAX_CONVERSATIONS = "memory_max_conversations"
+CONF_MEMORY_MAX_STORAGE = "memory_max_storage"
+CONF_TOKEN_BUDGET = "token_budget"
+CONF_SUMMARIZE_DROPPED = "summarize_dropped"
+CONF_BACKGROUND_SUMMARY = "background_summary"
+CONF_SUMMARY_MODEL = "summary_model"
+CONF_SUMMARY_THRESHOLD = "summary_threshold"
+CONF_RESPONSE_CACHE = "response_cache"
+CONF_CACHE_TTL = "cache_ttl"
+CONF_CACHE_SIZE = "cache_size"
 CONF_MAX_ENTITIES = "max_entities"
 CONF_ENTITY_DOMAINS = "entity_domains"
 CONF_EXCLUDE_AREAS = "exclude_areas"
+CONF_INCLUDE_AREAS = "include_areas"
 CONF_SMART_FILTERING = "smart_filtering"
 CONF_MINIMAL_ATTRIBUTES = "minimal_attributes"
+CONF_STREAMING = "streaming"
+CONF_STABLE_PREFIX = "stable_prefix"
+CONF_COMPACT_ENTITIES = "compact_entities"
+CONF_DELTA_CONTEXT = "delta_context"
+CONF_DELTA_REFRESH_TURNS = "delta_refresh_turns"
+CONF_CUSTOM_KEYWORDS = "custom_keywords"
+CONF_NATIVE_TOOLS = "native_tools"
+CONF_LOCAL_INTENTS = "local_intents"
+CONF_FALLBACK_AGENT = "fallback_agent"
 
 # Valeurs par défaut
 DEFAULT_BASE_URL = "https://api.mammouth.ai/v1"
 DEFAULT_MODEL = "mammouth-default"
 DEFAULT_MAX_TOKENS = 1000
 DEFAULT_TEMPERATURE = 0.7
+DEFAULT_ADAPTIVE_GENERATION = False
 DEFAULT_TIMEOUT = 30
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_LATENCY_BUDGET = 0  # secondes, 0 = pas de limite par cible
+DEFAULT_HEDGING = False
+DEFAULT_POOL_SIZE = 10
+DEFAULT_PREWARM = False
 DEFAULT_ENABLE_MEMORY = True
 DEFAULT_MAX_MESSAGES = 10
 DEFAULT_MEMORY_TIMEOUT = 24
+DEFAULT_PERSIST_MEMORY = True
+DEFAULT_MEMORY_MAX_CONVERSATIONS = 50
+DEFAULT_MEMORY_MAX_STORAGE = 1024  # Ko
+DEFAULT_TOKEN_BUDGET = 0  # 0 = limite par nombre de messages
+DEFAULT_SUMMARIZE_DROPPED = False
+DEFAULT_BACKGROUND_SUMMARY = False
+DEFAULT_SUMMARY_MODEL = ""  # vide = modèle principal
+DEFAULT_SUMMARY_THRESHOLD = 8
+DEFAULT_RESPONSE_CACHE = False
+DEFAULT_CACHE_TTL = 300  # secondes
+DEFAULT_CACHE_SIZE = 64
 DEFAULT_MAX_ENTITIES = 50
 DEFAULT_ENTITY_DOMAINS = [
     "sensor",
@@ -40,23 +87,73 @@ DEFAULT_ENTITY_DOMAINS = [
     "cover",
 ]
 DEFAULT_EXCLUDE_AREAS: list[str] = []
+DEFAULT_INCLUDE_AREAS: list[str] = []  # vide = toutes les pièces
 DEFAULT_SMART_FILTERING = True
 DEFAULT_MINIMAL_ATTRIBUTES = False
+DEFAULT_STREAMING = False
+DEFAULT_STABLE_PREFIX = False
+DEFAULT_COMPACT_ENTITIES = False
+DEFAULT_DELTA_CONTEXT = False
+DEFAULT_DELTA_REFRESH_TURNS = 5
+DEFAULT_NATIVE_TOOLS = False
+DEFAULT_LOCAL_INTENTS = False
 DEFAULT_PROMPT = (
     "Tu es un assistant vocal pour Home Assistant nommé {{ ha_name }}.\n"
     "Tu aides l'utilisateur avec sa maison connectée.\n"
     "Réponds en français de manière concise et utile.\n"
     "L'utilisateur actuel est : {{ user_name }}\n\n"
     "Entités disponibles ({{ entities_count }} au total) :\n"
+    "{% if entities_table %}{{ entities_table }}\n"
+    "{% else %}"
     "{% for domain, entities in entities_by_domain.items() %}"
     "{{ domain|title }} ({{ entities|length }}) :\n"
     "{% for entity in entities %}"
     "- {{ entity.name }} : {{ entity.state }}{{ entity.unit }}\n"
     "{% endfor %}\n"
-    "{% endfor %}\n"
+    "{% endfor %}"
+    "{% endif %}\n"
     "Utilise ces informations pour répondre aux questions sur l'état des appareils."
 )
 
+# Résumé glissant des conversations
+SUMMARY_KEEP_MESSAGES = 4
+SUMMARY_MAX_TOKENS = 300
+SUMMARY_PROMPT = (
+    "Tu résumes une conversation entre un utilisateur et son assistant domotique.\n"
+    "Condense les échanges fournis en quelques phrases factuelles : préférences, "
+    "demandes en cours, informations à retenir. Ignore les formules de politesse. "
+    "Réponds uniquement avec le résumé, dans la langue de la conversation."
+)
+
+# Contexte différentiel : part maximale d'états modifiés avant un envoi complet
+DELTA_MAX_CHANGE_RATIO = 0.5
+
+# Génération adaptative : réponses courtes pour les commandes d'appareils
+COMMAND_MAX_TOKENS = 150
+COMMAND_STOP_SEQUENCES = ["\n\n"]
+
+# Appels d'outils : nombre maximal d'allers-retours par message
+MAX_TOOL_ITERATIONS = 10
+
+# Nouvelles tentatives : délai de base et plafond du backoff (secondes)
+RETRY_BASE_DELAY = 0.5
+RETRY_MAX_DELAY = 8.0
+
+# Vérification de l'API et coupe-circuit
+HEALTH_CHECK_INTERVAL = timedelta(minutes=30)
+HEALTH_CHECK_FAST_INTERVAL = timedelta(seconds=30)
+CIRCUIT_FAILURE_THRESHOLD = 3
+CIRCUIT_RESET_TIMEOUT = timedelta(minutes=1)
+
+# Connexions HTTP : durée de vie des connexions inactives et du cache DNS
+# (secondes), rafraîchissement des connexions quand l'API n'est pas sollicitée
+HTTP_KEEPALIVE_TIMEOUT = 120
+DNS_CACHE_TTL = 300
+KEEP_WARM_INTERVAL = timedelta(seconds=60)
+
+# Requête de couverture : mesures nécessaires avant d'estimer le p95
+HEDGE_MIN_SAMPLES = 20
+
 # API Endpoints
 API_CHAT_COMPLETIONS = "chat/completions"
 API_MODELS = "models"
@@ -66,3 +163,5 @@ ERROR_AUTH = "Clé API invalide"
 ERROR_CONNECT = "Impossible de se connecter à Mammouth AI"
 ERROR_TIMEOUT = "Délai d'attente dépassé"
 ERROR_UNKNOWN = "Erreur inconnue"
+ERROR_CIRCUIT_OPEN = "Mammouth AI est temporairement indisponible"
+ERROR_TOOL_LOOP = "Trop d'appels d'outils successifs"
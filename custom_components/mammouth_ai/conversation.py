@@ -2,43 +2,133 @@
 
 from __future__ import annotations
 
+import functools
 import logging
+import time
 from collections import defaultdict
-from typing import Literal
+from collections.abc import AsyncGenerator, AsyncIterator, Callable
+from typing import Any, Literal
 
+import voluptuous as vol
 from homeassistant.components.conversation import (
+    AssistantContent,
+    AssistantContentDeltaDict,
     ChatLog,
     ConversationEntity,
     ConversationInput,
     ConversationResult,
+    async_converse,
 )
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import MATCH_ALL
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, State, callback, split_entity_id
 from homeassistant.exceptions import HomeAssistantError, TemplateError
-from homeassistant.helpers import intent, template
+from homeassistant.helpers import area_registry as ar
+from homeassistant.helpers import intent, llm
+from voluptuous_openapi import convert
 
+from .breaker import CircuitOpenError
 from .const import (
+    COMMAND_MAX_TOKENS,
+    COMMAND_STOP_SEQUENCES,
+    CONF_ADAPTIVE_GENERATION,
+    CONF_COMPACT_ENTITIES,
+    CONF_CUSTOM_KEYWORDS,
+    CONF_DELTA_CONTEXT,
     CONF_ENTITY_DOMAINS,
     CONF_EXCLUDE_AREAS,
+    CONF_FALLBACK_AGENT,
+    CONF_INCLUDE_AREAS,
     CONF_LLM_HASS_API,
+    CONF_LOCAL_INTENTS,
     CONF_MAX_ENTITIES,
+    CONF_MAX_TOKENS,
     CONF_MINIMAL_ATTRIBUTES,
+    CONF_NATIVE_TOOLS,
     CONF_PROMPT,
     CONF_SMART_FILTERING,
+    CONF_STABLE_PREFIX,
+    CONF_STREAMING,
+    CONF_TEMPERATURE,
+    DEFAULT_ADAPTIVE_GENERATION,
+    DEFAULT_COMPACT_ENTITIES,
+    DEFAULT_DELTA_CONTEXT,
     DEFAULT_ENTITY_DOMAINS,
     DEFAULT_EXCLUDE_AREAS,
+    DEFAULT_INCLUDE_AREAS,
+    DEFAULT_LOCAL_INTENTS,
     DEFAULT_MAX_ENTITIES,
+    DEFAULT_MAX_TOKENS,
     DEFAULT_MINIMAL_ATTRIBUTES,
+    DEFAULT_NATIVE_TOOLS,
     DEFAULT_PROMPT,
     DEFAULT_SMART_FILTERING,
+    DEFAULT_STABLE_PREFIX,
+    DEFAULT_STREAMING,
+    DEFAULT_TEMPERATURE,
     DOMAIN,
 )
 from .coordinator import MammouthDataUpdateCoordinator
+from .entity_index import EntityIndex
+from .keywords import (
+    DEFAULT_MATCHER,
+    KeywordMatcher,
+    is_command,
+    parse_keyword_table,
+)
+from .metrics import (
+    METRIC_END_TO_END,
+    METRIC_ENTITY_FILTERING,
+    METRIC_PROMPT_RENDERING,
+)
+from .prompt import (
+    STABLE_USER_NAME,
+    PromptRenderer,
+    build_context_message,
+    compact_state,
+    entity_state_line,
+    entity_state_lines,
+    format_entities_table,
+    format_entity_states,
+)
+from .routing import async_handle_locally
 
 _LOGGER = logging.getLogger(__name__)
 
 
+async def _transform_stream(
+    stream: AsyncIterator[str],
+) -> AsyncGenerator[AssistantContentDeltaDict]:
+    """Transform Mammouth AI text deltas into ChatLog delta dicts."""
+    yield {"role": "assistant"}
+    async for delta in stream:
+        yield {"content": delta}
+
+
+def _group_by_area(
+    entities_by_domain: dict[str, list[dict[str, Any]]],
+) -> dict[str, list[dict[str, Any]]]:
+    """Regroup the prepared entities by area name ("" without area)."""
+    entities_by_area: dict[str, list[dict[str, Any]]] = defaultdict(list)
+    for entities in entities_by_domain.values():
+        for entity in entities:
+            entities_by_area[entity.get("area", "")].append(entity)
+    return dict(entities_by_area)
+
+
+def _format_tool(
+    tool: llm.Tool, custom_serializer: Callable[[Any], Any] | None
+) -> dict[str, Any]:
+    """Format a Home Assistant LLM tool for the chat completions API."""
+    function: dict[str, Any] = {
+        "name": tool.name,
+        "parameters": convert(tool.parameters, custom_serializer=custom_serializer),
+    }
+    if tool.description:
+        function["description"] = tool.description
+    return {"type": "function", "function": function}
+
+
 class MammouthConversationEntity(ConversationEntity):
     """Mammouth AI conversation entity."""
 
@@ -53,12 +143,80 @@ class MammouthConversationEntity(ConversationEntity):
         self._config_entry = config_entry
         self._attr_name = f"Mammouth AI ({config_entry.title})"
         self._attr_unique_id = config_entry.entry_id
+        self._attr_supports_streaming = config_entry.options.get(
+            CONF_STREAMING, DEFAULT_STREAMING
+        )
+        self._entity_index: EntityIndex | None = None
+        # Catalogue stable des entités et révision de l'index correspondante
+        self._catalogue: tuple[int, dict[str, Any]] | None = None
+        # Template compilé une seule fois par entrée (recréé au rechargement)
+        self._prompt_renderer = PromptRenderer(
+            coordinator.hass, config_entry.options.get(CONF_PROMPT, DEFAULT_PROMPT)
+        )
+        # Un prompt sans {{ entities_table }} garde les listes par domaine
+        self._table_in_prompt = self._prompt_renderer.references("entities_table")
+        if (
+            config_entry.options.get(CONF_COMPACT_ENTITIES, DEFAULT_COMPACT_ENTITIES)
+            and not config_entry.options.get(CONF_STABLE_PREFIX, DEFAULT_STABLE_PREFIX)
+            and not config_entry.options.get(CONF_NATIVE_TOOLS, DEFAULT_NATIVE_TOOLS)
+            and not self._table_in_prompt
+        ):
+            _LOGGER.warning(
+                "The prompt of %s does not use entities_table, "
+                "entities are listed by domain instead of the compact table",
+                config_entry.title,
+            )
+        custom_keywords = config_entry.options.get(CONF_CUSTOM_KEYWORDS, "")
+        self._keyword_matcher = (
+            KeywordMatcher(extra_tables=parse_keyword_table(custom_keywords))
+            if custom_keywords
+            else DEFAULT_MATCHER
+        )
+
+    async def async_added_to_hass(self) -> None:
+        """Seed the entity index when added to Home Assistant."""
+        await super().async_added_to_hass()
+        self._async_get_entity_index()
+        # Les vérifications de l'API mettent à jour l'état du coupe-circuit
+        self.async_on_remove(
+            self.coordinator.async_add_listener(self.async_write_ha_state)
+        )
+
+    @callback
+    def _async_get_entity_index(self) -> EntityIndex:
+        """Return the entity index, creating and seeding it on first use."""
+        if self._entity_index is None:
+            self._entity_index = EntityIndex(
+                self.hass,
+                self._config_entry.options.get(
+                    CONF_ENTITY_DOMAINS, DEFAULT_ENTITY_DOMAINS
+                ),
+            )
+            self._entity_index.async_setup()
+            self.async_on_remove(self._async_shutdown_entity_index)
+        return self._entity_index
+
+    @callback
+    def _async_shutdown_entity_index(self) -> None:
+        """Tear down the entity index."""
+        if self._entity_index is not None:
+            self._entity_index.async_shutdown()
+            self._entity_index = None
 
     @property
     def attribution(self) -> str:
         """Return the attribution."""
         return "Powered by Mammouth AI"
 
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Return prompt cache and routing counters."""
+        return {
+            "circuit_state": self.coordinator.circuit_state,
+            **self._prompt_renderer.stats,
+            **self.coordinator.routing.stats,
+        }
+
     @property
     def supported_languages(self) -> list[str] | Literal["*"]:
         """Return list of supported languages."""
@@ -66,295 +224,91 @@ class MammouthConversationEntity(ConversationEntity):
 
     def _extract_relevant_domains_from_query(self, query: str) -> set[str]:
         """Extract relevant domains from user query using keyword matching."""
-        domain_keywords = {
-            "light": [
-                # French
-                "lumière",
-                "éclairage",
-                "allume",
-                "éteins",
-                "lampe",
-                # English
-                "light",
-                "lamp",
-                "turn on",
-                "turn off",
-                "illuminate",
-                # Spanish
-                "luz",
-                "lámpara",
-                "encender",
-                "apagar",
-                "iluminar",
-                # German
-                "licht",
-                "lampe",
-                "anschalten",
-                "ausschalten",
-                # Italian
-                "luce",
-                "lampada",
-                "accendi",
-                "spegni",
-                # Portuguese
-                "luz",
-                "lâmpada",
-                "ligar",
-                "desligar",
-                # Dutch
-                "licht",
-                "lamp",
-                "aan",
-                "uit",
-            ],
-            "switch": [
-                # French
-                "interrupteur",
-                "prise",
-                "allume",
-                "éteins",
-                # English
-                "switch",
-                "plug",
-                "outlet",
-                "turn on",
-                "turn off",
-                # Spanish
-                "interruptor",
-                "enchufe",
-                "encender",
-                "apagar",
-                # German
-                "schalter",
-                "steckdose",
-                "anschalten",
-                "ausschalten",
-                # Italian
-                "interruttore",
-                "presa",
-                "accendi",
-                "spegni",
-                # Portuguese
-                "interruptor",
-                "tomada",
-                "ligar",
-                "desligar",
-                # Dutch
-                "schakelaar",
-                "stopcontact",
-                "aan",
-                "uit",
-            ],
-            "sensor": [
-                # French
-                "température",
-                "humidité",
-                "capteur",
-                "mesure",
-                # English
-                "temperature",
-                "humidity",
-                "sensor",
-                "measure",
-                # Spanish
-                "temperatura",
-                "humedad",
-                "sensor",
-                "medida",
-                # German
-                "temperatur",
-                "feuchtigkeit",
-                "sensor",
-                "messung",
-                # Italian
-                "temperatura",
-                "umidità",
-                "sensore",
-                "misura",
-                # Portuguese
-                "temperatura",
-                "umidade",
-                "sensor",
-                "medida",
-                # Dutch
-                "temperatuur",
-                "vochtigheid",
-                "sensor",
-                "meting",
-            ],
-            "binary_sensor": [
-                # French
-                "détecteur",
-                "mouvement",
-                "porte",
-                "fenêtre",
-                "ouvert",
-                "fermé",
-                # English
-                "detector",
-                "motion",
-                "door",
-                "window",
-                "open",
-                "closed",
-                # Spanish
-                "detector",
-                "movimiento",
-                "puerta",
-                "ventana",
-                "abierto",
-                "cerrado",
-                # German
-                "detektor",
-                "bewegung",
-                "tür",
-                "fenster",
-                "offen",
-                "geschlossen",
-                # Italian
-                "rilevatore",
-                "movimento",
-                "porta",
-                "finestra",
-                "aperto",
-                "chiuso",
-                # Portuguese
-                "detector",
-                "movimento",
-                "porta",
-                "janela",
-                "aberto",
-                "fechado",
-                # Dutch
-                "detector",
-                "beweging",
-                "deur",
-                "raam",
-                "open",
-                "gesloten",
-            ],
-            "climate": [
-                # French
-                "chauffage",
-                "climatisation",
-                "thermostat",
-                "température",
-                # English
-                "heating",
-                "air conditioning",
-                "thermostat",
-                "temperature",
-                # Spanish
-                "calefacción",
-                "aire acondicionado",
-                "termostato",
-                "temperatura",
-                # German
-                "heizung",
-                "klimaanlage",
-                "thermostat",
-                "temperatur",
-                # Italian
-                "riscaldamento",
-                "aria condizionata",
-                "termostato",
-                "temperatura",
-                # Portuguese
-                "aquecimento",
-                "ar condicionado",
-                "termostato",
-                "temperatura",
-                # Dutch
-                "verwarming",
-                "airconditioning",
-                "thermostaat",
-                "temperatuur",
-            ],
-            "cover": [
-                # French
-                "volet",
-                "store",
-                "rideau",
-                "garage",
-                # English
-                "cover",
-                "blind",
-                "curtain",
-                "shutter",
-                "garage",
-                # Spanish
-                "persiana",
-                "cortina",
-                "toldo",
-                "garaje",
-                # German
-                "jalousie",
-                "vorhang",
-                "rollladen",
-                "garage",
-                # Italian
-                "tapparella",
-                "tenda",
-                "persiana",
-                "garage",
-                # Portuguese
-                "persiana",
-                "cortina",
-                "toldo",
-                "garagem",
-                # Dutch
-                "jaloezie",
-                "gordijn",
-                "rolluik",
-                "garage",
-            ],
-        }
-
-        query_lower = query.lower()
-        relevant_domains = set()
-
-        for domain, keywords in domain_keywords.items():
-            if any(keyword in query_lower for keyword in keywords):
-                relevant_domains.add(domain)
-
-        return relevant_domains
-
-    def _filter_entities_by_area(self, states, exclude_areas: list[str]):
-        """Filter entities by area."""
-        if not exclude_areas:
-            return states
-
-        filtered_states = []
-        for state in states:
-            area_id = None
-            if hasattr(state, "attributes") and "area_id" in state.attributes:
-                area_id = state.attributes["area_id"]
-
-            if area_id not in exclude_areas:
-                filtered_states.append(state)
+        return self._keyword_matcher.match(query)
 
-        return filtered_states
-
-    def _get_essential_attributes(self, state, minimal: bool):
+    def _get_essential_attributes(self, state):
         """Get essential attributes only, reducing token usage."""
-        base_attrs = {
+        # Seuls les attributs lus par le prompt sont extraits
+        return {
             "friendly_name": state.attributes.get("friendly_name", state.entity_id),
             "unit_of_measurement": state.attributes.get("unit_of_measurement", ""),
             "device_class": state.attributes.get("device_class", ""),
         }
 
-        if not minimal:
-            base_attrs.update(
-                {
-                    "icon": state.attributes.get("icon", ""),
-                    "state_class": state.attributes.get("state_class", ""),
-                }
-            )
+    def _generation_params(self, user_query: str, native_tools: bool) -> dict[str, Any]:
+        """Return the generation parameters of a request.
 
-        return base_attrs
+        In adaptive mode, device commands get a smaller ``max_tokens`` and
+        stop at the first blank line, since the reply is a short confirmation.
+        """
+        options = self._config_entry.options
+        params: dict[str, Any] = {
+            "max_tokens": options.get(CONF_MAX_TOKENS, DEFAULT_MAX_TOKENS),
+            "temperature": options.get(CONF_TEMPERATURE, DEFAULT_TEMPERATURE),
+        }
+        if options.get(
+            CONF_ADAPTIVE_GENERATION, DEFAULT_ADAPTIVE_GENERATION
+        ) and is_command(user_query):
+            params["max_tokens"] = min(params["max_tokens"], COMMAND_MAX_TOKENS)
+            # Les arguments des appels d'outils ne doivent pas être coupés
+            if not native_tools:
+                params["stop"] = COMMAND_STOP_SEQUENCES
+            _LOGGER.debug("Command detected, max_tokens=%d", params["max_tokens"])
+        return params
+
+    @callback
+    def _async_area_name(self, entity_id: str) -> str | None:
+        """Return the name of the area of an indexed entity."""
+        area_id = self._async_get_entity_index().async_get_area(entity_id)
+        if area_id is None:
+            return None
+        area = ar.async_get(self.hass).async_get_area(area_id)
+        return area.name if area else None
+
+    @callback
+    def _async_get_catalogue(self) -> dict[str, Any]:
+        """Return the template variables of the stable entity catalogue.
+
+        Allowed entities are listed without their state, sorted by entity_id
+        and capped to ``max_entities``. Unavailable entities stay listed, so
+        that the prompt prefix only changes when entities are added, removed,
+        renamed or moved.
+        """
+        entity_index = self._async_get_entity_index()
+        if self._catalogue is not None and self._catalogue[0] == entity_index.revision:
+            return self._catalogue[1]
+
+        options = self._config_entry.options
+        names = entity_index.async_get_names(
+            options.get(CONF_ENTITY_DOMAINS, DEFAULT_ENTITY_DOMAINS),
+            options.get(CONF_EXCLUDE_AREAS, DEFAULT_EXCLUDE_AREAS),
+            options.get(CONF_INCLUDE_AREAS, DEFAULT_INCLUDE_AREAS),
+        )
+        entity_ids = sorted(names)[
+            : options.get(CONF_MAX_ENTITIES, DEFAULT_MAX_ENTITIES)
+        ]
+        entities_by_domain: dict[str, list[dict[str, Any]]] = defaultdict(list)
+        for entity_id in entity_ids:
+            entity_data = {
+                "entity_id": entity_id,
+                "name": names[entity_id],
+                "state": "",
+                "unit": "",
+            }
+            if area_name := self._async_area_name(entity_id):
+                entity_data["area"] = area_name
+            entities_by_domain[split_entity_id(entity_id)[0]].append(entity_data)
+
+        catalogue = {
+            "entities_by_domain": dict(entities_by_domain),
+            "entities_by_area": _group_by_area(entities_by_domain),
+            "entities_count": len(entity_ids),
+        }
+        self._catalogue = (entity_index.revision, catalogue)
+        return catalogue
 
-    def _filter_and_prepare_entities(self, user_query: str):
-        """Filter and prepare entities for API call with optimizations."""
+    def _select_states(self, user_query: str) -> list[State]:
+        """Return the states to describe to the model, most relevant first."""
         # Get configuration options
         config_options = self._config_entry.options
         max_entities = config_options.get(CONF_MAX_ENTITIES, DEFAULT_MAX_ENTITIES)
@@ -362,53 +316,57 @@ class MammouthConversationEntity(ConversationEntity):
             CONF_ENTITY_DOMAINS, DEFAULT_ENTITY_DOMAINS
         )
         exclude_areas = config_options.get(CONF_EXCLUDE_AREAS, DEFAULT_EXCLUDE_AREAS)
+        include_areas = config_options.get(CONF_INCLUDE_AREAS, DEFAULT_INCLUDE_AREAS)
         smart_filtering = config_options.get(
             CONF_SMART_FILTERING, DEFAULT_SMART_FILTERING
         )
-        minimal_attributes = config_options.get(
-            CONF_MINIMAL_ATTRIBUTES, DEFAULT_MINIMAL_ATTRIBUTES
-        )
-
-        all_states = self.hass.states.async_all()
-        _LOGGER.debug("Total entities in HA: %d", len(all_states))
 
-        # Filter by area first
-        filtered_states = self._filter_entities_by_area(all_states, exclude_areas)
+        entity_index = self._async_get_entity_index()
+        _LOGGER.debug("Indexed entities: %d", len(entity_index))
 
-        # Filter by domain
-        domain_filtered_states = [
-            state
-            for state in filtered_states
-            if state.domain in allowed_domains
-            and state.state not in ["unknown", "unavailable"]
-        ]
+        # L'index ne contient que les états utilisables des domaines autorisés
+        domain_filtered_states = []
 
         # Smart filtering based on user query
         if smart_filtering:
             relevant_domains = self._extract_relevant_domains_from_query(user_query)
             if relevant_domains:
-                smart_filtered_states = [
-                    state
-                    for state in domain_filtered_states
-                    if state.domain in relevant_domains
-                ]
                 # If smart filtering yields results, use it;
                 # otherwise fall back to all domains
-                if smart_filtered_states:
-                    domain_filtered_states = smart_filtered_states
+                domain_filtered_states = entity_index.async_get_states(
+                    [d for d in allowed_domains if d in relevant_domains],
+                    exclude_areas,
+                    include_areas,
+                )
+                if domain_filtered_states:
                     _LOGGER.debug(
                         "Smart filtering applied: %s domains", relevant_domains
                     )
 
-        # Limit total number of entities
+        if not domain_filtered_states:
+            domain_filtered_states = entity_index.async_get_states(
+                allowed_domains, exclude_areas, include_areas
+            )
+
+        # Limit total number of entities, keeping the most relevant ones
         if len(domain_filtered_states) > max_entities:
-            domain_filtered_states = domain_filtered_states[:max_entities]
-            _LOGGER.debug("Limited entities to %d", max_entities)
+            domain_filtered_states = entity_index.async_rank(
+                domain_filtered_states, user_query, max_entities
+            )
+            _LOGGER.debug("Limited entities to the %d most relevant", max_entities)
+
+        return domain_filtered_states
+
+    def _filter_and_prepare_entities(self, user_query: str):
+        """Filter and prepare entities for API call with optimizations."""
+        minimal_attributes = self._config_entry.options.get(
+            CONF_MINIMAL_ATTRIBUTES, DEFAULT_MINIMAL_ATTRIBUTES
+        )
 
         # Prepare entities with reduced attributes
         entities_by_domain = defaultdict(list)
-        for state in domain_filtered_states:
-            essential_attrs = self._get_essential_attributes(state, minimal_attributes)
+        for state in self._select_states(user_query):
+            essential_attrs = self._get_essential_attributes(state)
             entity_data = {
                 "entity_id": state.entity_id,
                 "name": essential_attrs.get("friendly_name", state.entity_id),
@@ -420,6 +378,10 @@ class MammouthConversationEntity(ConversationEntity):
             if not minimal_attributes and essential_attrs.get("device_class"):
                 entity_data["device_class"] = essential_attrs["device_class"]
 
+            # Pièce résolue via les registres (regroupement dans le prompt)
+            if area_name := self._async_area_name(state.entity_id):
+                entity_data["area"] = area_name
+
             entities_by_domain[state.domain].append(entity_data)
 
         _LOGGER.debug(
@@ -431,15 +393,128 @@ class MammouthConversationEntity(ConversationEntity):
             len(entities) for entities in entities_by_domain.values()
         )
 
+    async def _async_call_tool(
+        self,
+        llm_api: llm.APIInstance,
+        tool_name: str,
+        tool_args: dict[str, Any],
+        call_id: str,
+    ) -> Any:
+        """Execute a tool call requested by the model."""
+        try:
+            return await llm_api.async_call_tool(
+                llm.ToolInput(tool_name=tool_name, tool_args=tool_args, id=call_id)
+            )
+        except (HomeAssistantError, vol.Invalid) as err:
+            # L'erreur est renvoyée au modèle pour qu'il puisse la corriger
+            _LOGGER.debug("Tool %s failed: %s", tool_name, err)
+            return {"error": type(err).__name__, "error_text": str(err)}
+
+    async def _async_stream_response(
+        self,
+        chat_log: ChatLog,
+        messages: list[dict[str, str]],
+        user_id: str | None,
+        conversation_id: str | None,
+        **kwargs: Any,
+    ) -> str:
+        """Stream the reply into the chat log and return the assembled text."""
+        stream = self.coordinator.async_chat_completion_stream_with_memory(
+            messages, user_id=user_id, conversation_id=conversation_id, **kwargs
+        )
+        response_text = ""
+        async for content in chat_log.async_add_delta_content_stream(
+            self.entity_id, _transform_stream(stream)
+        ):
+            if isinstance(content, AssistantContent) and content.content:
+                response_text = content.content
+        return response_text
+
+    async def _async_handle_locally(
+        self, user_input: ConversationInput, chat_log: ChatLog
+    ) -> ConversationResult | None:
+        """Answer with Home Assistant's local intents when one matches."""
+        start = time.monotonic()
+        try:
+            intent_response = await async_handle_locally(self.hass, user_input)
+        except HomeAssistantError as err:
+            _LOGGER.debug("Local intent handling failed, escalating: %s", err)
+            return None
+        if intent_response is None:
+            _LOGGER.debug("No local intent match, escalating to Mammouth AI")
+            return None
+
+        elapsed = time.monotonic() - start
+        self.coordinator.routing.async_record_local(elapsed)
+        _LOGGER.debug("Handled locally in %.0f ms", elapsed * 1000)
+
+        speech = intent_response.speech.get("plain", {}).get("speech", "")
+        chat_log.async_add_assistant_content_without_tools(
+            AssistantContent(agent_id=self.entity_id, content=speech)
+        )
+        await self.coordinator.async_remember_exchange(
+            [{"role": "user", "content": user_input.text}],
+            speech,
+            user_id=user_input.context.user_id if user_input.context else None,
+            conversation_id=user_input.conversation_id,
+        )
+        return ConversationResult(
+            response=intent_response,
+        )
+
     async def _async_handle_message(
         self, user_input: ConversationInput, chat_log: ChatLog
     ) -> ConversationResult:
-        """Handle a conversation message."""
+        """Handle a conversation message, recording its end-to-end latency."""
+        start = time.monotonic()
+        try:
+            return await self._async_process_message(user_input, chat_log)
+        finally:
+            self.coordinator.metrics.async_record_latency(
+                METRIC_END_TO_END, time.monotonic() - start
+            )
+            # Mettre à jour les capteurs de diagnostic
+            self.coordinator.async_update_listeners()
+
+    async def _async_process_message(
+        self, user_input: ConversationInput, chat_log: ChatLog
+    ) -> ConversationResult:
+        """Process a conversation message."""
+        if self._config_entry.options.get(CONF_LOCAL_INTENTS, DEFAULT_LOCAL_INTENTS):
+            # Les commandes simples sont traitées localement, sans appel au cloud
+            result = await self._async_handle_locally(user_input, chat_log)
+            if result is not None:
+                return result
+
         intent_response = intent.IntentResponse(language=user_input.language)
 
         # Obtenir le prompt système
         system_prompt = self._config_entry.options.get(CONF_PROMPT, DEFAULT_PROMPT)
 
+        # Entités dont l'état figure dans le prompt (invalidation du cache)
+        entity_ids: list[str] = []
+
+        # Avec les outils natifs, le modèle interroge et pilote HA lui-même :
+        # inutile de lister les entités dans le prompt
+        native_tools = self._config_entry.options.get(
+            CONF_NATIVE_TOOLS, DEFAULT_NATIVE_TOOLS
+        )
+        tool_kwargs: dict[str, Any] = {}
+
+        # Préfixe stable : les états actuels sont envoyés dans un message séparé
+        stable_prefix = not native_tools and self._config_entry.options.get(
+            CONF_STABLE_PREFIX, DEFAULT_STABLE_PREFIX
+        )
+        context_message: dict[str, Any] | None = None
+        compact_entities = self._config_entry.options.get(
+            CONF_COMPACT_ENTITIES, DEFAULT_COMPACT_ENTITIES
+        ) and (stable_prefix or self._table_in_prompt)
+        # Contexte différentiel : ligne d'état de chaque entité du prompt
+        delta_context = not stable_prefix and self._config_entry.options.get(
+            CONF_DELTA_CONTEXT, DEFAULT_DELTA_CONTEXT
+        )
+        entity_states: dict[str, str] | None = None
+
         # Si l'option d'API HA est activée, traiter les templates
         llm_hass_api_enabled = self._config_entry.options.get(CONF_LLM_HASS_API, True)
         _LOGGER.debug("LLM HASS API enabled: %s", llm_hass_api_enabled)
@@ -459,9 +534,46 @@ class MammouthConversationEntity(ConversationEntity):
                 ha_name = self.hass.config.location_name or "Jean Claude"
 
                 # Utiliser le nouveau système de filtrage optimisé
-                entities_by_domain, entities_count = self._filter_and_prepare_entities(
-                    user_input.text
-                )
+                entities_table = ""
+                if native_tools:
+                    entities_by_domain, entities_count = {}, 0
+                elif compact_entities:
+                    # Tableau construit directement depuis les états
+                    start = time.monotonic()
+                    states = self._select_states(user_input.text)
+                    if states:
+                        entities_table = format_entities_table(
+                            states, self._async_area_name
+                        )
+                    self.coordinator.metrics.async_record_latency(
+                        METRIC_ENTITY_FILTERING, time.monotonic() - start
+                    )
+                    entities_by_domain, entities_count = {}, len(states)
+                    entity_ids = [state.entity_id for state in states]
+                    if delta_context:
+                        entity_states = {
+                            state.entity_id: entity_state_line(
+                                state.name,
+                                compact_state(state),
+                                state.attributes.get("unit_of_measurement") or "",
+                            )
+                            for state in states
+                        }
+                else:
+                    start = time.monotonic()
+                    entities_by_domain, entities_count = (
+                        self._filter_and_prepare_entities(user_input.text)
+                    )
+                    self.coordinator.metrics.async_record_latency(
+                        METRIC_ENTITY_FILTERING, time.monotonic() - start
+                    )
+                    entity_ids = [
+                        entity["entity_id"]
+                        for entities in entities_by_domain.values()
+                        for entity in entities
+                    ]
+                    if delta_context:
+                        entity_states = entity_state_lines(entities_by_domain)
 
                 _LOGGER.debug("Optimized entities count: %d", entities_count)
                 if entities_by_domain:
@@ -473,22 +585,41 @@ class MammouthConversationEntity(ConversationEntity):
                         },
                     )
 
-                template_vars = {
+                template_vars: dict[str, Any] = {
                     "ha_name": ha_name,
                     "user_name": user_name,
-                    "entities_by_domain": entities_by_domain,
-                    "entities_count": entities_count,
                 }
+                if stable_prefix:
+                    # L'utilisateur et les états varient d'un tour à l'autre :
+                    # ils suivent le préfixe stable dans un message séparé
+                    context_message = build_context_message(
+                        entities_table or format_entity_states(entities_by_domain),
+                        user_name=user_name,
+                    )
+                    template_vars.update(
+                        self._async_get_catalogue(),
+                        user_name=STABLE_USER_NAME,
+                        entities_table="",
+                    )
+                else:
+                    template_vars.update(
+                        entities_by_domain=entities_by_domain,
+                        entities_by_area=_group_by_area(entities_by_domain),
+                        entities_count=entities_count,
+                        entities_table=entities_table,
+                    )
                 _LOGGER.debug(
                     "Template variables: ha_name=%s, user_name=%s, entities_count=%d",
                     ha_name,
                     user_name,
-                    entities_count,
+                    template_vars["entities_count"],
                 )
 
-                system_prompt = template.Template(
-                    system_prompt, self.hass
-                ).async_render(template_vars, parse_result=False)
+                start = time.monotonic()
+                system_prompt = self._prompt_renderer.async_render(template_vars)
+                self.coordinator.metrics.async_record_latency(
+                    METRIC_PROMPT_RENDERING, time.monotonic() - start
+                )
 
                 _LOGGER.debug(
                     "Rendered system prompt length: %d characters", len(system_prompt)
@@ -506,29 +637,96 @@ class MammouthConversationEntity(ConversationEntity):
                     response=intent_response,
                 )
 
+        if native_tools:
+            try:
+                llm_api = await llm.async_get_api(
+                    self.hass, llm.LLM_API_ASSIST, user_input.as_llm_context(DOMAIN)
+                )
+            except HomeAssistantError as err:
+                _LOGGER.error("Error getting LLM API: %s", err)
+                intent_response.async_set_error(
+                    intent.IntentResponseErrorCode.UNKNOWN,
+                    f"Erreur de l'API LLM: {err}",
+                )
+                return ConversationResult(
+                    response=intent_response,
+                )
+            tool_kwargs = {
+                "tools": [
+                    _format_tool(tool, llm_api.custom_serializer)
+                    for tool in llm_api.tools
+                ],
+                "tool_executor": functools.partial(self._async_call_tool, llm_api),
+            }
+            system_prompt = f"{system_prompt}\n\n{llm_api.api_prompt}"
+
         # Construire les messages pour l'API
-        messages = [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_input.text},
-        ]
+        messages = [{"role": "system", "content": system_prompt}]
+        if context_message is not None:
+            messages.append(context_message)
+        messages.append({"role": "user", "content": user_input.text})
 
         _LOGGER.debug("Sending request to Mammouth AI: %s", user_input.text)
 
+        generation_params = self._generation_params(user_input.text, native_tools)
+
         try:
             # Obtenir l'ID utilisateur pour la mémoire
             user_id = None
             if user_input.context and user_input.context.user_id:
                 user_id = user_input.context.user_id
 
-            # Appel à l'API Mammouth avec mémoire
-            response_text = await self.coordinator.async_chat_completion_with_memory(
-                messages, user_id=user_id, conversation_id=user_input.conversation_id
-            )
+            start = time.monotonic()
+            if self.supports_streaming:
+                # Les fragments alimentent le ChatLog au fil de l'eau (TTS anticipé)
+                response_text = await self._async_stream_response(
+                    chat_log,
+                    messages,
+                    user_id,
+                    user_input.conversation_id,
+                    entity_states=entity_states,
+                    **generation_params,
+                    **tool_kwargs,
+                )
+            else:
+                # Appel à l'API Mammouth avec mémoire
+                response_text = (
+                    await self.coordinator.async_chat_completion_with_memory(
+                        messages,
+                        user_id=user_id,
+                        conversation_id=user_input.conversation_id,
+                        entity_ids=entity_ids,
+                        entity_states=entity_states,
+                        **generation_params,
+                        **tool_kwargs,
+                    )
+                )
 
+            self.coordinator.routing.async_record_cloud(time.monotonic() - start)
             _LOGGER.debug("Received response from Mammouth AI: %s", response_text)
 
             intent_response.async_set_speech(response_text)
 
+        except CircuitOpenError as err:
+            fallback_agent = self._config_entry.options.get(CONF_FALLBACK_AGENT)
+            if fallback_agent and fallback_agent != self.entity_id:
+                # API indisponible : confier la demande à l'agent de secours
+                _LOGGER.debug("Mammouth AI unavailable, using %s", fallback_agent)
+                return await async_converse(
+                    self.hass,
+                    user_input.text,
+                    user_input.conversation_id,
+                    user_input.context,
+                    user_input.language,
+                    agent_id=fallback_agent,
+                    device_id=user_input.device_id,
+                )
+            _LOGGER.warning("Mammouth AI unavailable: %s", err)
+            intent_response.async_set_error(
+                intent.IntentResponseErrorCode.UNKNOWN,
+                f"Erreur de l'assistant Mammouth: {err}",
+            )
+
         except HomeAssistantError as err:
             _LOGGER.error("Error processing conversation: %s", err)
             intent_response.async_set_error(
@@ -3,40 +3,164 @@
 from __future__ import annotations
 
 import asyncio
+import functools
 import logging
-from datetime import datetime, timedelta
-from typing import Any, Dict, List, Optional
+import time
+from collections import OrderedDict
+from typing import (
+    Any,
+    AsyncGenerator,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+)
 
 import aiohttp
 import async_timeout
+from aiohttp import hdrs
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.const import EVENT_HOMEASSISTANT_CLOSE
+from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, callback
 from homeassistant.exceptions import ConfigEntryAuthFailed, HomeAssistantError
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.helpers.json import json_dumps
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+from homeassistant.util.json import json_loads
 
+from .breaker import CircuitBreaker, CircuitOpenError
+from .cache import ResponseCache, SingleFlight, request_key
 from .const import (
     API_CHAT_COMPLETIONS,
+    API_MODELS,
+    CIRCUIT_FAILURE_THRESHOLD,
+    CIRCUIT_RESET_TIMEOUT,
     CONF_API_KEY,
+    CONF_BACKGROUND_SUMMARY,
     CONF_BASE_URL,
+    CONF_CACHE_SIZE,
+    CONF_CACHE_TTL,
+    CONF_DELTA_REFRESH_TURNS,
     CONF_ENABLE_MEMORY,
+    CONF_FALLBACK_TARGETS,
+    CONF_HEDGING,
+    CONF_LATENCY_BUDGET,
     CONF_MAX_MESSAGES,
+    CONF_MAX_RETRIES,
+    CONF_MEMORY_MAX_CONVERSATIONS,
+    CONF_MEMORY_MAX_STORAGE,
     CONF_MEMORY_TIMEOUT,
     CONF_MODEL,
+    CONF_PERSIST_MEMORY,
+    CONF_POOL_SIZE,
+    CONF_PREWARM,
+    CONF_RESPONSE_CACHE,
+    CONF_SUMMARIZE_DROPPED,
+    CONF_SUMMARY_MODEL,
+    CONF_SUMMARY_THRESHOLD,
     CONF_TIMEOUT,
+    CONF_TOKEN_BUDGET,
+    DEFAULT_BACKGROUND_SUMMARY,
+    DEFAULT_CACHE_SIZE,
+    DEFAULT_CACHE_TTL,
+    DEFAULT_DELTA_REFRESH_TURNS,
     DEFAULT_ENABLE_MEMORY,
+    DEFAULT_HEDGING,
+    DEFAULT_LATENCY_BUDGET,
     DEFAULT_MAX_MESSAGES,
+    DEFAULT_MAX_RETRIES,
+    DEFAULT_MEMORY_MAX_CONVERSATIONS,
+    DEFAULT_MEMORY_MAX_STORAGE,
     DEFAULT_MEMORY_TIMEOUT,
+    DEFAULT_PERSIST_MEMORY,
+    DEFAULT_POOL_SIZE,
+    DEFAULT_PREWARM,
+    DEFAULT_RESPONSE_CACHE,
+    DEFAULT_SUMMARIZE_DROPPED,
+    DEFAULT_SUMMARY_MODEL,
+    DEFAULT_SUMMARY_THRESHOLD,
     DEFAULT_TIMEOUT,
+    DEFAULT_TOKEN_BUDGET,
+    DELTA_MAX_CHANGE_RATIO,
     DOMAIN,
     ERROR_AUTH,
+    ERROR_CIRCUIT_OPEN,
     ERROR_CONNECT,
     ERROR_TIMEOUT,
+    ERROR_TOOL_LOOP,
     ERROR_UNKNOWN,
+    HEALTH_CHECK_FAST_INTERVAL,
+    HEALTH_CHECK_INTERVAL,
+    HEDGE_MIN_SAMPLES,
+    KEEP_WARM_INTERVAL,
+    MAX_TOOL_ITERATIONS,
+    RETRY_BASE_DELAY,
+    RETRY_MAX_DELAY,
+    SUMMARY_KEEP_MESSAGES,
+    SUMMARY_MAX_TOKENS,
+    SUMMARY_PROMPT,
+)
+from .encoding import encode_messages, encode_payload
+from .failover import Target, parse_targets, should_fail_over
+from .memory import (
+    ConversationMemory,
+    build_extractive_summary,
+    build_summary_message,
+    is_summary,
+    summary_text,
 )
+from .metrics import METRIC_UPSTREAM, LatencyWindow, RequestMetrics, RoutingStats
+from .prompt import DELTA_HEADER, build_context_message, is_context
+from .retry import RetryPolicy, UpstreamError, status_error
+from .session import async_create_session
+from .tokens import message_tokens, messages_tokens
 
 _LOGGER = logging.getLogger(__name__)
 
+# (nom de l'outil, arguments, identifiant de l'appel) -> résultat sérialisable
+ToolExecutor = Callable[[str, Dict[str, Any], str], Awaitable[Any]]
+
+
+async def _async_iter_sse_data(
+    response: aiohttp.ClientResponse,
+) -> AsyncGenerator[Dict[str, Any], None]:
+    """Yield the decoded JSON payloads of a server-sent events response."""
+    async for raw_line in response.content:
+        line = raw_line.strip()
+        if not line.startswith(b"data:"):
+            # Lignes vides, commentaires ou champs SSE non utilisés
+            continue
+        data = line[5:].strip()
+        if data == b"[DONE]":
+            break
+        yield json_loads(data)
+
+
+def _merge_tool_call_deltas(
+    tool_calls: List[Dict[str, Any]], deltas: List[Dict[str, Any]]
+) -> None:
+    """Merge streamed tool call fragments into complete tool calls."""
+    for delta in deltas:
+        index = delta.get("index", len(tool_calls))
+        while len(tool_calls) <= index:
+            tool_calls.append(
+                {
+                    "id": "",
+                    "type": "function",
+                    "function": {"name": "", "arguments": ""},
+                }
+            )
+        tool_call = tool_calls[index]
+        if delta.get("id"):
+            tool_call["id"] = delta["id"]
+        function = delta.get("function") or {}
+        # Le nom et les arguments peuvent arriver en plusieurs fragments
+        tool_call["function"]["name"] += function.get("name") or ""
+        tool_call["function"]["arguments"] += function.get("arguments") or ""
+
 
 class MammouthDataUpdateCoordinator(DataUpdateCoordinator[Dict[str, Any]]):
     """Class to manage fetching data from Mammouth AI."""
@@ -59,12 +183,106 @@ class MammouthDataUpdateCoordinator(DataUpdateCoordinator[Dict[str, Any]]):
         self._memory_timeout = entry.options.get(
             CONF_MEMORY_TIMEOUT, DEFAULT_MEMORY_TIMEOUT
         )
+        self._token_budget = entry.options.get(CONF_TOKEN_BUDGET, DEFAULT_TOKEN_BUDGET)
+        self._summarize_dropped = entry.options.get(
+            CONF_SUMMARIZE_DROPPED, DEFAULT_SUMMARIZE_DROPPED
+        )
+        self.last_prompt_tokens = 0
+        self.metrics = RequestMetrics()
+        # Réponses locales et appels au modèle de l'agent de conversation
+        self.routing = RoutingStats()
+
+        # Résumé glissant des anciens échanges par un modèle moins coûteux
+        self._background_summary = entry.options.get(
+            CONF_BACKGROUND_SUMMARY, DEFAULT_BACKGROUND_SUMMARY
+        )
+        self._summary_model = entry.options.get(
+            CONF_SUMMARY_MODEL, DEFAULT_SUMMARY_MODEL
+        )
+        self._summary_threshold = entry.options.get(
+            CONF_SUMMARY_THRESHOLD, DEFAULT_SUMMARY_THRESHOLD
+        )
+        self._summary_tasks: Dict[str, asyncio.Task[None]] = {}
+
+        # Cibles de secours (URL, modèle) essayées dans l'ordre après la principale
+        self._targets = [
+            Target(self._base_url, self._model),
+            *parse_targets(
+                entry.options.get(CONF_FALLBACK_TARGETS, ""), self._base_url
+            ),
+        ]
+        self._latency = {target: LatencyWindow() for target in self._targets}
+        self._latency_budget = entry.options.get(
+            CONF_LATENCY_BUDGET, DEFAULT_LATENCY_BUDGET
+        )
+        self._hedging = entry.options.get(CONF_HEDGING, DEFAULT_HEDGING)
+        self.failovers = 0
+        self.hedged_requests = 0
+        self.hedge_wins = 0
 
-        # Stockage de l'historique des conversations par utilisateur
-        self._conversation_history: Dict[str, List[Dict[str, Any]]] = {}
-        self._conversation_timestamps: Dict[str, datetime] = {}
+        # Coupe-circuit : échec immédiat tant que l'API est indisponible
+        self._breaker = CircuitBreaker(
+            CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RESET_TIMEOUT.total_seconds()
+        )
 
-        self._session = async_get_clientsession(hass)
+        # Nouvelles tentatives sur les échecs transitoires (429, 503...)
+        self._retry = RetryPolicy(
+            max_retries=entry.options.get(CONF_MAX_RETRIES, DEFAULT_MAX_RETRIES),
+            base_delay=RETRY_BASE_DELAY,
+            max_delay=RETRY_MAX_DELAY,
+        )
+
+        # Déduplication des requêtes identiques simultanées
+        self._single_flight: SingleFlight[Dict[str, Any]] = SingleFlight()
+
+        # Cache optionnel des réponses aux requêtes sans mémoire
+        self._response_cache: Optional[ResponseCache] = None
+        if entry.options.get(CONF_RESPONSE_CACHE, DEFAULT_RESPONSE_CACHE):
+            self._response_cache = ResponseCache(
+                hass,
+                max_entries=entry.options.get(CONF_CACHE_SIZE, DEFAULT_CACHE_SIZE),
+                ttl=entry.options.get(CONF_CACHE_TTL, DEFAULT_CACHE_TTL),
+            )
+
+        # Stockage de l'historique des conversations par utilisateur,
+        # persisté sur disque pour survivre aux redémarrages
+        self._memory = ConversationMemory(
+            hass,
+            entry.entry_id,
+            max_cached=entry.options.get(
+                CONF_MEMORY_MAX_CONVERSATIONS, DEFAULT_MEMORY_MAX_CONVERSATIONS
+            ),
+            max_storage_bytes=entry.options.get(
+                CONF_MEMORY_MAX_STORAGE, DEFAULT_MEMORY_MAX_STORAGE
+            )
+            * 1024,
+            persist=entry.options.get(CONF_PERSIST_MEMORY, DEFAULT_PERSIST_MEMORY),
+            expire_after=self._memory_timeout * 3600 if self._enable_memory else None,
+        )
+
+        # États envoyés en entier par conversation (contexte différentiel) :
+        # clé -> (ligne de chaque entité, tours depuis l'envoi complet)
+        self._sent_states: OrderedDict[str, Tuple[Dict[str, str], int]] = OrderedDict()
+        # États du tour en cours, retenus une fois la réponse enregistrée
+        self._pending_states: Dict[str, Tuple[Dict[str, str], int]] = {}
+        self._max_sent_states = entry.options.get(
+            CONF_MEMORY_MAX_CONVERSATIONS, DEFAULT_MEMORY_MAX_CONVERSATIONS
+        )
+        self._delta_refresh_turns = entry.options.get(
+            CONF_DELTA_REFRESH_TURNS, DEFAULT_DELTA_REFRESH_TURNS
+        )
+
+        # Session dédiée : connexions persistantes vers l'API et cache DNS
+        self._session = async_create_session(
+            entry.options.get(CONF_POOL_SIZE, DEFAULT_POOL_SIZE)
+        )
+        # Fermée au déchargement, ou à l'arrêt de HA sans déchargement
+        self._unsub_close: Optional[CALLBACK_TYPE] = hass.bus.async_listen_once(
+            EVENT_HOMEASSISTANT_CLOSE, self._async_close_session
+        )
+        self._prewarm = entry.options.get(CONF_PREWARM, DEFAULT_PREWARM)
+        self._unsub_keep_warm: Optional[CALLBACK_TYPE] = None
+        self._last_request = 0.0
         self._headers = {
             "Authorization": f"Bearer {self._api_key}",
             "Content-Type": "application/json",
@@ -74,15 +292,46 @@ class MammouthDataUpdateCoordinator(DataUpdateCoordinator[Dict[str, Any]]):
             hass,
             _LOGGER,
             name=DOMAIN,
-            update_interval=timedelta(minutes=30),  # Health check
+            update_interval=HEALTH_CHECK_INTERVAL,
         )
 
     async def _async_update_data(self) -> Dict[str, Any]:
         """Fetch data from API endpoint."""
         try:
-            return await self._async_health_check()
+            data = await self._async_health_check()
         except Exception as err:
+            if not isinstance(err, ConfigEntryAuthFailed):
+                self._breaker.async_trip()
             raise UpdateFailed(f"Error communicating with API: {err}") from err
+        else:
+            # L'API répond : reprendre le trafic et l'intervalle normal
+            self._breaker.async_record_success()
+            return data
+        finally:
+            self._async_update_health_check_interval()
+
+    @callback
+    def _async_update_health_check_interval(self) -> None:
+        """Check the API health more often while the circuit is not closed."""
+        self.update_interval = (
+            HEALTH_CHECK_INTERVAL
+            if self._breaker.is_closed
+            else HEALTH_CHECK_FAST_INTERVAL
+        )
+
+    @callback
+    def _async_record_failure(self, err: Exception) -> None:
+        """Count an upstream failure against the circuit breaker."""
+        if not isinstance(err, UpstreamError) or not err.outage:
+            return
+        was_closed = self._breaker.is_closed
+        self._breaker.async_record_failure()
+        if was_closed and not self._breaker.is_closed:
+            # Vérifier tout de suite puis fréquemment l'état de l'API
+            self._async_update_health_check_interval()
+            self.config_entry.async_create_background_task(
+                self.hass, self.async_request_refresh(), "mammouth_ai health check"
+            )
 
     async def async_validate_connection(self) -> bool:
         """Test if we can authenticate with the API."""
@@ -105,7 +354,7 @@ class MammouthDataUpdateCoordinator(DataUpdateCoordinator[Dict[str, Any]]):
                     if response.status != 200:
                         raise HomeAssistantError(f"HTTP {response.status}")
 
-                    data = await response.json()
+                    data = json_loads(await response.read())
                     return {"status": "healthy", "models": data.get("data", [])}
 
         except asyncio.TimeoutError as err:
@@ -129,89 +378,162 @@ class MammouthDataUpdateCoordinator(DataUpdateCoordinator[Dict[str, Any]]):
         )
         return key
 
-    def _cleanup_expired_conversations(self) -> None:
-        """Clean up expired conversation history."""
-        if not self._enable_memory:
-            return
-
-        now = datetime.now()
-        expired_keys = []
-
-        for key, timestamp in self._conversation_timestamps.items():
-            if (now - timestamp).total_seconds() > (self._memory_timeout * 3600):
-                expired_keys.append(key)
-
-        for key in expired_keys:
-            self._conversation_history.pop(key, None)
-            self._conversation_timestamps.pop(key, None)
-            _LOGGER.debug("Expired conversation history for key: %s", key)
-
     def _truncate_conversation_history(
         self, messages: List[Dict[str, Any]]
     ) -> List[Dict[str, Any]]:
-        """Truncate conversation history to max_messages preserving system message."""
-        if len(messages) <= self._max_messages:
+        """Truncate conversation history preserving system messages.
+
+        The history is limited by ``max_messages``, or by the token budget
+        when one is configured. Dropped turns can be collapsed into a
+        summary message.
+        """
+        if not self._token_budget and len(messages) <= self._max_messages:
             return messages
 
-        # Garder le message système (premier message)
-        system_messages = [msg for msg in messages if msg.get("role") == "system"]
+        # Garder le message système et l'éventuel résumé
+        system_messages = [
+            msg
+            for msg in messages
+            if msg.get("role") == "system" and not is_summary(msg)
+        ]
+        summary = next((msg for msg in messages if is_summary(msg)), None)
         other_messages = [msg for msg in messages if msg.get("role") != "system"]
 
-        # Garder les derniers messages jusqu'à la limite
-        if len(other_messages) > (self._max_messages - len(system_messages)):
-            other_messages = other_messages[
-                -(self._max_messages - len(system_messages)) :
-            ]
+        if self._token_budget:
+            # Garder les derniers messages qui tiennent dans le budget
+            budget = self._token_budget - messages_tokens(system_messages)
+            if summary is not None:
+                budget -= message_tokens(summary)
+            keep = used = 0
+            for msg in reversed(other_messages):
+                used += message_tokens(msg)
+                if keep and used > budget:
+                    break
+                keep += 1
+        else:
+            # Garder les derniers messages jusqu'à la limite
+            keep = max(
+                self._max_messages - len(system_messages) - (summary is not None),
+                1,
+            )
 
+        if keep >= len(other_messages):
+            return messages
+
+        dropped = other_messages[:-keep]
+        other_messages = other_messages[-keep:]
+        if self._summarize_dropped:
+            summary = build_extractive_summary(dropped, summary)
+
+        _LOGGER.debug("Truncated %d messages from conversation history", len(dropped))
+        if summary is not None:
+            system_messages.append(summary)
         return system_messages + other_messages
 
-    async def async_chat_completion_with_memory(
+    def _state_delta(
+        self,
+        conv_key: str,
+        history: List[Dict[str, Any]],
+        entity_states: Dict[str, str],
+    ) -> Optional[List[str]]:
+        """Return the entity state lines changed since the last full prompt.
+
+        Returns None when the full system prompt must be sent again: no
+        prompt with states is in the history yet, ``delta_refresh_turns``
+        turns went by, or too many states changed. The new baseline is only
+        recorded once the reply is stored, so a failed turn keeps the one
+        of the prompt still in the history.
+        """
+        sent = self._sent_states.get(conv_key)
+        if sent is not None and any(
+            msg.get("role") == "system" and not is_summary(msg) for msg in history
+        ):
+            baseline, turns = sent
+            changed = [
+                line
+                for entity_id, line in entity_states.items()
+                if baseline.get(entity_id) != line
+            ]
+            if turns < self._delta_refresh_turns and len(
+                changed
+            ) <= DELTA_MAX_CHANGE_RATIO * max(len(baseline), 1):
+                self._pending_states[conv_key] = (baseline, turns + 1)
+                return changed
+
+        self._pending_states[conv_key] = (dict(entity_states), 0)
+        return None
+
+    @callback
+    def _async_commit_sent_states(self, conv_key: str) -> None:
+        """Record the states sent with a turn whose reply was stored."""
+        if (sent := self._pending_states.pop(conv_key, None)) is None:
+            return
+        self._sent_states[conv_key] = sent
+        self._sent_states.move_to_end(conv_key)
+        while len(self._sent_states) > self._max_sent_states:
+            self._sent_states.popitem(last=False)
+
+    async def _async_prepare_conversation(
         self,
         messages: List[Dict[str, str]],
         user_id: Optional[str] = None,
         conversation_id: Optional[str] = None,
-        **kwargs: Any,
-    ) -> str:
-        """Get chat completion from Mammouth AI with conversation memory."""
-        _LOGGER.debug(
-            "Memory enabled: %s, user_id: %s, conversation_id: %s",
-            self._enable_memory,
-            user_id,
-            conversation_id,
-        )
-
-        if not self._enable_memory:
-            _LOGGER.debug("Memory disabled, using direct chat completion")
-            return await self.async_chat_completion(messages, **kwargs)
-
-        # Nettoyer les conversations expirées
-        self._cleanup_expired_conversations()
+        entity_states: Optional[Dict[str, str]] = None,
+    ) -> Tuple[str, List[Dict[str, Any]]]:
+        """Merge new messages into the stored history of a conversation.
 
+        With ``entity_states`` (entity_id -> state line of the entities in
+        the system prompt), follow-up turns keep the stored system prompt
+        and only carry the states that changed since it was sent.
+        """
         # Générer la clé de conversation
         conv_key = self._get_conversation_key(user_id, conversation_id)
+        # Les états d'un tour précédent resté sans réponse sont abandonnés
+        self._pending_states.pop(conv_key, None)
 
-        # Récupérer l'historique existant
-        if conv_key not in self._conversation_history:
-            self._conversation_history[conv_key] = []
+        # Récupérer l'historique existant (chargé depuis le disque au besoin)
+        history = await self._memory.async_get(conv_key)
+        if not history:
             _LOGGER.debug("Created new conversation history for key: %s", conv_key)
         else:
             _LOGGER.debug(
                 "Found existing conversation history for key: %s with %d messages",
                 conv_key,
-                len(self._conversation_history[conv_key]),
+                len(history),
             )
 
         # Ajouter les nouveaux messages à l'historique
-        conversation_messages = self._conversation_history[conv_key].copy()
+        conversation_messages = history.copy()
 
         # Ajouter ou mettre à jour le message système
         system_message = next(
-            (msg for msg in messages if msg.get("role") == "system"), None
+            (
+                msg
+                for msg in messages
+                if msg.get("role") == "system" and not is_context(msg)
+            ),
+            None,
         )
+        context_message = next((msg for msg in messages if is_context(msg)), None)
+        if (
+            system_message
+            and entity_states is not None
+            and (changed := self._state_delta(conv_key, history, entity_states))
+            is not None
+        ):
+            # Garder le prompt déjà envoyé, n'ajouter que les états modifiés
+            _LOGGER.debug("Sending %d changed entity states", len(changed))
+            system_message = None
+            if changed:
+                context_message = build_context_message(
+                    "\n".join(changed), DELTA_HEADER
+                )
         if system_message:
-            # Supprimer l'ancien message système s'il existe
+            # Supprimer l'ancien message système s'il existe (hors résumé)
             conversation_messages = [
-                msg for msg in conversation_messages if msg.get("role") != "system"
+                msg
+                for msg in conversation_messages
+                if msg.get("role") != "system" or is_summary(msg)
             ]
             # Insérer le nouveau message système au début
             conversation_messages.insert(0, system_message)
@@ -237,93 +559,899 @@ class MammouthDataUpdateCoordinator(DataUpdateCoordinator[Dict[str, Any]]):
             conversation_messages
         )
 
+        # Les états actuels précèdent la question, après l'historique stable ;
+        # ils ne sont jamais conservés dans la mémoire
+        if context_message:
+            conversation_messages = conversation_messages.copy()
+            conversation_messages.insert(
+                len(conversation_messages) - (user_message is not None),
+                context_message,
+            )
+
         # Mettre à jour le timestamp
-        self._conversation_timestamps[conv_key] = datetime.now()
+        self._memory.async_touch(conv_key)
 
-        try:
-            # Faire l'appel API avec l'historique complet
-            response_text = await self.async_chat_completion(
-                conversation_messages, **kwargs
+        return conv_key, conversation_messages
+
+    def _store_conversation_reply(
+        self,
+        conv_key: str,
+        conversation_messages: List[Dict[str, Any]],
+        response_text: str,
+    ) -> None:
+        """Append the assistant reply and save the conversation history."""
+        # Ajouter la réponse à l'historique
+        conversation_messages = [
+            msg for msg in conversation_messages if not is_context(msg)
+        ]
+        conversation_messages.append({"role": "assistant", "content": response_text})
+
+        # Sauvegarder l'historique mis à jour (écriture différée sur disque)
+        history = self._truncate_conversation_history(conversation_messages)
+        self._memory.async_set(conv_key, history)
+        self._async_commit_sent_states(conv_key)
+
+        _LOGGER.debug(
+            "Conversation history updated for key %s: %d messages",
+            conv_key,
+            len(history),
+        )
+
+        # Résumé en arrière-plan, hors du chemin critique de la réponse
+        if (
+            self._background_summary
+            and conv_key not in self._summary_tasks
+            and sum(msg.get("role") != "system" for msg in history)
+            > self._summary_threshold
+        ):
+            self._summary_tasks[conv_key] = (
+                self.config_entry.async_create_background_task(
+                    self.hass,
+                    self._async_summarize_conversation(conv_key),
+                    f"{DOMAIN} summarize {conv_key}",
+                )
             )
 
-            # Ajouter la réponse à l'historique
-            conversation_messages.append(
-                {"role": "assistant", "content": response_text}
+    async def _async_summarize_conversation(self, conv_key: str) -> None:
+        """Condense the oldest turns of a conversation into a summary message."""
+        try:
+            history = await self._memory.async_get(conv_key)
+            turns = [msg for msg in history if msg.get("role") != "system"]
+            oldest = turns[:-SUMMARY_KEEP_MESSAGES]
+            if not oldest:
+                return
+            previous = next((msg for msg in history if is_summary(msg)), None)
+
+            transcript = "\n".join(
+                f"{msg['role']}: {msg.get('content') or ''}" for msg in oldest
             )
+            if previous is not None:
+                transcript = f"{summary_text(previous)}\n{transcript}"
 
-            # Sauvegarder l'historique mis à jour
-            self._conversation_history[conv_key] = self._truncate_conversation_history(
-                conversation_messages
+            text = await self._async_background_completion(
+                [
+                    {"role": "system", "content": SUMMARY_PROMPT},
+                    {"role": "user", "content": transcript},
+                ],
+                model=self._summary_model or self._model,
+                max_tokens=SUMMARY_MAX_TOKENS,
             )
 
-            _LOGGER.debug(
-                "Conversation history updated for key %s: %d messages",
+            # L'historique a pu évoluer pendant l'appel (troncature, ou
+            # rechargement depuis le disque) : ne retirer que les messages
+            # résumés encore en tête, comparés par contenu
+            current = await self._memory.async_get(conv_key)
+            system_messages = [
+                msg
+                for msg in current
+                if msg.get("role") == "system" and not is_summary(msg)
+            ]
+            other_messages = [msg for msg in current if msg.get("role") != "system"]
+            summarized = next(
+                (
+                    len(oldest) - start
+                    for start in range(len(oldest))
+                    if other_messages[: len(oldest) - start] == oldest[start:]
+                ),
+                0,
+            )
+            if not summarized:
+                return
+            self._memory.async_set(
                 conv_key,
-                len(self._conversation_history[conv_key]),
+                system_messages
+                + [build_summary_message(text)]
+                + other_messages[summarized:],
             )
+            _LOGGER.debug(
+                "Summarized %d messages of conversation %s", len(oldest), conv_key
+            )
+        except HomeAssistantError as err:
+            _LOGGER.warning("Conversation summary failed for %s: %s", conv_key, err)
+        finally:
+            self._summary_tasks.pop(conv_key, None)
+
+    async def _async_background_completion(
+        self, messages: List[Dict[str, Any]], **kwargs: Any
+    ) -> str:
+        """Get a chat completion for internal use, such as a summary.
 
+        The request makes a single attempt on the primary target and stays
+        out of the request metrics, the prompt token estimate and the circuit
+        breaker, so it can neither skew them nor trip the circuit.
+        """
+        if not self._breaker.is_closed:
+            raise CircuitOpenError(ERROR_CIRCUIT_OPEN)
+        payload = {"model": self._model, "messages": messages, **kwargs}
+        message = await self._async_post_chat_completion_once(
+            f"{self._base_url.rstrip('/')}/{API_CHAT_COMPLETIONS}",
+            self._headers,
+            encode_payload(payload),
+            self._timeout,
+            record_usage=False,
+        )
+        return message.get("content") or ""
+
+    async def async_chat_completion_with_memory(
+        self,
+        messages: List[Dict[str, str]],
+        user_id: Optional[str] = None,
+        conversation_id: Optional[str] = None,
+        *,
+        tools: Optional[List[Dict[str, Any]]] = None,
+        tool_executor: Optional[ToolExecutor] = None,
+        entity_states: Optional[Dict[str, str]] = None,
+        **kwargs: Any,
+    ) -> str:
+        """Get chat completion from Mammouth AI with conversation memory.
+
+        When ``tools`` and ``tool_executor`` are given, tool calls requested
+        by the model are executed until it produces a final answer. When
+        ``entity_states`` is given, follow-up turns only send changed states.
+        """
+        _LOGGER.debug(
+            "Memory enabled: %s, user_id: %s, conversation_id: %s",
+            self._enable_memory,
+            user_id,
+            conversation_id,
+        )
+
+        if not self._enable_memory:
+            _LOGGER.debug("Memory disabled, using direct chat completion")
+            if tools and tool_executor:
+                return await self.async_chat_completion_with_tools(
+                    messages, tools, tool_executor, **kwargs
+                )
+            return await self.async_chat_completion(messages, **kwargs)
+
+        # L'historique change à chaque tour : inutile de mettre la réponse en cache
+        kwargs.pop("entity_ids", None)
+
+        conv_key, conversation_messages = await self._async_prepare_conversation(
+            messages, user_id, conversation_id, entity_states
+        )
+
+        try:
+            # Faire l'appel API avec l'historique complet
+            if tools and tool_executor:
+                response_text = await self.async_chat_completion_with_tools(
+                    conversation_messages, tools, tool_executor, **kwargs
+                )
+            else:
+                response_text = await self.async_chat_completion(
+                    conversation_messages, cacheable=False, **kwargs
+                )
+            self._store_conversation_reply(
+                conv_key, conversation_messages, response_text
+            )
             return response_text
 
         except Exception as err:
             _LOGGER.error("Chat completion with memory failed: %s", err)
+            self._pending_states.pop(conv_key, None)
             raise
 
+    async def async_chat_completion_stream_with_memory(
+        self,
+        messages: List[Dict[str, str]],
+        user_id: Optional[str] = None,
+        conversation_id: Optional[str] = None,
+        *,
+        tools: Optional[List[Dict[str, Any]]] = None,
+        tool_executor: Optional[ToolExecutor] = None,
+        entity_states: Optional[Dict[str, str]] = None,
+        **kwargs: Any,
+    ) -> AsyncGenerator[str, None]:
+        """Stream a chat completion, storing the assembled reply in memory."""
+        if tools and tool_executor:
+            stream = functools.partial(
+                self.async_chat_completion_stream_with_tools,
+                tools=tools,
+                tool_executor=tool_executor,
+            )
+        else:
+            stream = self.async_chat_completion_stream
+
+        if not self._enable_memory:
+            async for delta in stream(messages, **kwargs):
+                yield delta
+            return
+
+        conv_key, conversation_messages = await self._async_prepare_conversation(
+            messages, user_id, conversation_id, entity_states
+        )
+
+        # La mémoire ne conserve que la réponse complète, une fois le flux terminé
+        parts: List[str] = []
+        try:
+            async for delta in stream(conversation_messages, **kwargs):
+                parts.append(delta)
+                yield delta
+        except BaseException:
+            self._pending_states.pop(conv_key, None)
+            raise
+
+        self._store_conversation_reply(conv_key, conversation_messages, "".join(parts))
+
+    def _prepare_api_messages(
+        self, messages: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """Record the prompt token estimate and strip private message keys."""
+        self.last_prompt_tokens = messages_tokens(messages)
+        _LOGGER.debug(
+            "Estimated prompt tokens: %d (%d messages)",
+            self.last_prompt_tokens,
+            len(messages),
+        )
+        return [
+            (
+                {key: value for key, value in msg.items() if not key.startswith("_")}
+                if any(key.startswith("_") for key in msg)
+                else msg
+            )
+            for msg in messages
+        ]
+
     async def async_chat_completion(
         self,
         messages: List[Dict[str, str]],
         **kwargs: Any,
     ) -> str:
         """Get chat completion from Mammouth AI."""
-        url = f"{self._base_url.rstrip('/')}/{API_CHAT_COMPLETIONS}"
+        message = await self.async_chat_completion_message(messages, **kwargs)
+        return message.get("content") or ""
+
+    async def async_chat_completion_with_tools(
+        self,
+        messages: List[Dict[str, Any]],
+        tools: List[Dict[str, Any]],
+        tool_executor: ToolExecutor,
+        **kwargs: Any,
+    ) -> str:
+        """Get chat completion, executing the tool calls requested by the model."""
+        # Les résultats d'outils reflètent l'état courant : pas de cache
+        kwargs.pop("entity_ids", None)
+        kwargs.pop("cacheable", None)
+        messages = list(messages)
 
+        for _ in range(MAX_TOOL_ITERATIONS):
+            message = await self.async_chat_completion_message(
+                messages, cacheable=False, tools=tools, **kwargs
+            )
+            tool_calls = message.get("tool_calls")
+            if not tool_calls:
+                return message.get("content") or ""
+
+            messages.append(
+                {
+                    "role": "assistant",
+                    "content": message.get("content"),
+                    "tool_calls": tool_calls,
+                }
+            )
+            for tool_call in tool_calls:
+                messages.append(
+                    await self._async_execute_tool_call(tool_call, tool_executor)
+                )
+
+        raise HomeAssistantError(ERROR_TOOL_LOOP)
+
+    async def _async_execute_tool_call(
+        self, tool_call: Dict[str, Any], tool_executor: ToolExecutor
+    ) -> Dict[str, Any]:
+        """Execute one tool call and return the tool result message."""
+        function = tool_call.get("function") or {}
+        tool_name = function.get("name", "")
+        try:
+            tool_args = json_loads(function.get("arguments") or "{}")
+        except ValueError as err:
+            result: Any = {"error": "InvalidArguments", "error_text": str(err)}
+        else:
+            _LOGGER.debug("Calling tool %s with %s", tool_name, tool_args)
+            result = await tool_executor(tool_name, tool_args, tool_call.get("id", ""))
+
+        return {
+            "role": "tool",
+            "tool_call_id": tool_call.get("id"),
+            "content": json_dumps(result),
+        }
+
+    async def async_chat_completion_message(
+        self,
+        messages: List[Dict[str, Any]],
+        *,
+        entity_ids: Optional[Iterable[str]] = None,
+        cacheable: bool = True,
+        **kwargs: Any,
+    ) -> Dict[str, Any]:
+        """Get the assistant message of a chat completion from Mammouth AI.
+
+        ``entity_ids`` lists the entities whose states are embedded in the
+        messages, so that a cached response is dropped when one changes.
+        """
         payload = {
             "model": self._model,
-            "messages": messages,
+            "messages": encode_messages(self._prepare_api_messages(messages)),
             **kwargs,
         }
+        # Le corps encodé sert aussi de clé de cache et de déduplication
+        body = encode_payload(payload)
+        key = request_key(body)
 
+        cache = self._response_cache if cacheable else None
+        if cache is not None and (cached := cache.async_get(key)) is not None:
+            _LOGGER.debug("Response cache hit for request %s", key[:12])
+            return cached
+
+        # Les appels identiques simultanés partagent la même requête HTTP
+        message = await self._single_flight.async_do(
+            key, lambda: self._async_post_chat_completion(payload, body)
+        )
+
+        if cache is not None and not message.get("tool_calls"):
+            cache.async_put(key, message, entity_ids or ())
+        return message
+
+    async def _async_post_chat_completion(
+        self, payload: Dict[str, Any], body: bytes
+    ) -> Dict[str, Any]:
+        """Post a chat completion request to Mammouth AI."""
+        self._breaker.async_check(ERROR_CIRCUIT_OPEN)
+
+        # Les échecs transitoires sont rejoués dans la limite du délai global
+        deadline = time.monotonic() + self._timeout
         try:
-            async with async_timeout.timeout(self._timeout):
+            message = await self._async_post_with_failover(payload, body, deadline)
+        except HomeAssistantError as err:
+            self.metrics.async_record_error(err)
+            self._async_record_failure(err)
+            raise
+        finally:
+            # Essai annulé ou sans verdict sur la disponibilité de l'API
+            self._breaker.async_release_trial()
+        self._breaker.async_record_success()
+        return message
+
+    async def _async_post_with_failover(
+        self, payload: Dict[str, Any], body: bytes, deadline: float
+    ) -> Dict[str, Any]:
+        """Post to the configured targets in order until one answers."""
+        index = 0
+        while True:
+            target = self._targets[index]
+            is_last = index == len(self._targets) - 1
+            step = 1
+            try:
+                if (
+                    self._hedging
+                    and not is_last
+                    and (delay := self._hedge_delay(target)) is not None
+                ):
+                    step = 2
+                    return await self._async_post_hedged(
+                        index, payload, body, delay, deadline
+                    )
+                return await self._async_post_to_target(
+                    target, payload, body, self._target_timeout(deadline, is_last)
+                )
+            except HomeAssistantError as err:
+                index += step
+                if (
+                    index >= len(self._targets)
+                    or not should_fail_over(err)
+                    or time.monotonic() >= deadline
+                ):
+                    raise
+                self.failovers += 1
+                _LOGGER.warning(
+                    "Model %s at %s failed (%s), falling over to %s",
+                    target.model,
+                    target.base_url,
+                    err,
+                    self._targets[index].model,
+                )
+
+    async def _async_post_hedged(
+        self,
+        index: int,
+        payload: Dict[str, Any],
+        body: bytes,
+        delay: float,
+        deadline: float,
+    ) -> Dict[str, Any]:
+        """Post to a target, hedging with the next one after a delay.
+
+        The next target is called when the first one has not answered within
+        ``delay``, or has already failed. The first successful answer wins
+        and the other request is cancelled.
+        """
+        primary, secondary = self._targets[index], self._targets[index + 1]
+        secondary_is_last = index + 1 == len(self._targets) - 1
+        primary_task = asyncio.ensure_future(
+            self._async_post_to_target(
+                primary, payload, body, self._target_timeout(deadline, False)
+            )
+        )
+        tasks = [primary_task]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if done and (
+                (error := primary_task.exception()) is None
+                or not should_fail_over(error)
+            ):
+                return primary_task.result()
+            if not done:
+                self.hedged_requests += 1
+                _LOGGER.debug(
+                    "No answer from %s after %.2f s, hedging with %s",
+                    primary.model,
+                    delay,
+                    secondary.model,
+                )
+            else:
+                # Échec avant le délai de couverture : simple bascule
+                self.failovers += 1
+                _LOGGER.warning(
+                    "Model %s at %s failed (%s), falling over to %s",
+                    primary.model,
+                    primary.base_url,
+                    error,
+                    secondary.model,
+                )
+
+            tasks.append(
+                asyncio.ensure_future(
+                    self._async_post_to_target(
+                        secondary,
+                        payload,
+                        body,
+                        self._target_timeout(deadline, secondary_is_last),
+                    )
+                )
+            )
+            pending = {task for task in tasks if not task.done()}
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if (error := task.exception()) is None:
+                        if task is not primary_task and not primary_task.done():
+                            self.hedge_wins += 1
+                        return task.result()
+                    if not should_fail_over(error):
+                        raise error
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _async_post_to_target(
+        self, target: Target, payload: Dict[str, Any], body: bytes, timeout: float
+    ) -> Dict[str, Any]:
+        """Post a chat completion request to one target, with retries."""
+        url = f"{target.base_url.rstrip('/')}/{API_CHAT_COMPLETIONS}"
+        start = time.monotonic()
+        message = await self._retry.async_call(
+            functools.partial(
+                self._async_post_chat_completion_once,
+                url,
+                self._target_headers(target),
+                self._target_body(target, payload, body),
+            ),
+            timeout,
+        )
+        elapsed = time.monotonic() - start
+        self._latency[target].add(elapsed)
+        self.metrics.async_record_latency(METRIC_UPSTREAM, elapsed)
+        return message
+
+    def _target_body(
+        self, target: Target, payload: Dict[str, Any], body: bytes
+    ) -> bytes:
+        """Return the encoded request body to send to a target."""
+        # La cible principale garde le modèle demandé (ex. modèle de résumé)
+        # et le corps déjà encodé pour la clé de la requête
+        if target == self._targets[0]:
+            return body
+        return encode_payload({**payload, "model": target.model})
+
+    def _target_headers(self, target: Target) -> Dict[str, str]:
+        """Return the request headers of a target."""
+        if target.api_key is None:
+            return self._headers
+        return {**self._headers, "Authorization": f"Bearer {target.api_key}"}
+
+    def _target_timeout(self, deadline: float, is_last: bool) -> float:
+        """Return the time a target may take, within the overall deadline."""
+        remaining = deadline - time.monotonic()
+        if self._latency_budget and not is_last:
+            return min(remaining, self._latency_budget)
+        return remaining
+
+    def _hedge_delay(self, target: Target) -> Optional[float]:
+        """Return the p95 latency of a target, once enough are known."""
+        window = self._latency[target]
+        if len(window) < HEDGE_MIN_SAMPLES:
+            return None
+        return window.percentile(95)
+
+    async def _async_post_chat_completion_once(
+        self,
+        url: str,
+        headers: Dict[str, str],
+        body: bytes,
+        timeout: float,
+        record_usage: bool = True,
+    ) -> Dict[str, Any]:
+        """Make one chat completion request attempt."""
+        self._last_request = time.monotonic()
+        try:
+            async with async_timeout.timeout(timeout):
                 async with self._session.post(
-                    url, headers=self._headers, json=payload
+                    url, headers=headers, data=body
                 ) as response:
                     if response.status == 401:
                         raise ConfigEntryAuthFailed(ERROR_AUTH)
                     if response.status != 200:
                         text = await response.text()
-                        raise HomeAssistantError(f"HTTP {response.status}: {text}")
+                        raise status_error(
+                            response.status,
+                            text,
+                            response.headers.get(hdrs.RETRY_AFTER),
+                        )
 
-                    data = await response.json()
+                    data = json_loads(await response.read())
 
                     if "choices" not in data or not data["choices"]:
                         raise HomeAssistantError("No response from AI")
 
-                    return data["choices"][0]["message"]["content"]
+                    if record_usage:
+                        self.metrics.async_record_usage(data.get("usage"))
+
+                    return data["choices"][0]["message"]
 
         except asyncio.TimeoutError as err:
-            raise HomeAssistantError(ERROR_TIMEOUT) from err
+            raise UpstreamError(
+                ERROR_TIMEOUT, reason="timeout", retryable=False
+            ) from err
+        except aiohttp.ClientConnectionError as err:
+            # Connexion refusée ou coupée : aucune réponse exploitable reçue
+            raise UpstreamError(
+                ERROR_CONNECT, reason="connect", retryable=True
+            ) from err
         except aiohttp.ClientError as err:
             raise HomeAssistantError(ERROR_CONNECT) from err
+        except HomeAssistantError:
+            raise
         except Exception as err:
             _LOGGER.error("Chat completion failed: %s", err)
             raise HomeAssistantError(ERROR_UNKNOWN) from err
 
+    async def async_chat_completion_stream_with_tools(
+        self,
+        messages: List[Dict[str, Any]],
+        *,
+        tools: List[Dict[str, Any]],
+        tool_executor: ToolExecutor,
+        **kwargs: Any,
+    ) -> AsyncGenerator[str, None]:
+        """Stream a chat completion, executing the tool calls of the model."""
+        messages = list(messages)
+
+        for _ in range(MAX_TOOL_ITERATIONS):
+            tool_calls: List[Dict[str, Any]] = []
+            parts: List[str] = []
+            async for delta in self.async_chat_completion_stream(
+                messages, collect_tool_calls=tool_calls, tools=tools, **kwargs
+            ):
+                parts.append(delta)
+                yield delta
+            if not tool_calls:
+                return
+
+            messages.append(
+                {
+                    "role": "assistant",
+                    "content": "".join(parts) or None,
+                    "tool_calls": tool_calls,
+                }
+            )
+            for tool_call in tool_calls:
+                messages.append(
+                    await self._async_execute_tool_call(tool_call, tool_executor)
+                )
+
+        raise HomeAssistantError(ERROR_TOOL_LOOP)
+
+    async def async_chat_completion_stream(
+        self,
+        messages: List[Dict[str, Any]],
+        *,
+        collect_tool_calls: Optional[List[Dict[str, Any]]] = None,
+        **kwargs: Any,
+    ) -> AsyncGenerator[str, None]:
+        """Stream a chat completion from Mammouth AI, yielding content deltas.
+
+        Tool calls streamed by the model are assembled into
+        ``collect_tool_calls`` when a list is given.
+        """
+        payload = {
+            "model": self._model,
+            "messages": encode_messages(self._prepare_api_messages(messages)),
+            **kwargs,
+            "stream": True,
+            # Sans cette option, l'usage des jetons n'est pas renvoyé en flux
+            "stream_options": {"include_usage": True},
+        }
+        body = encode_payload(payload)
+
+        self._breaker.async_check(ERROR_CIRCUIT_OPEN)
+        start = time.monotonic()
+        deadline = start + self._timeout
+        last_index = len(self._targets) - 1
+        try:
+            for index, target in enumerate(self._targets):
+                started = False
+                # Les appels d'outils ne sont transmis qu'une fois le flux complet
+                tool_calls: List[Dict[str, Any]] = []
+                try:
+                    async for content in self._async_stream_from_target(
+                        target,
+                        payload,
+                        body,
+                        tool_calls,
+                        deadline,
+                        (
+                            self._latency_budget
+                            if self._latency_budget and index != last_index
+                            else None
+                        ),
+                    ):
+                        started = True
+                        yield content
+                except HomeAssistantError as err:
+                    # Changer de cible n'est possible qu'avant le premier fragment
+                    if started or index == last_index or not should_fail_over(err):
+                        self.metrics.async_record_error(err)
+                        self._async_record_failure(err)
+                        raise
+                    self.failovers += 1
+                    _LOGGER.warning(
+                        "Model %s at %s failed (%s), falling over to %s",
+                        target.model,
+                        target.base_url,
+                        err,
+                        self._targets[index + 1].model,
+                    )
+                    continue
+
+                if collect_tool_calls is not None:
+                    collect_tool_calls.extend(tool_calls)
+                self._breaker.async_record_success()
+                self.metrics.async_record_latency(
+                    METRIC_UPSTREAM, time.monotonic() - start
+                )
+                return
+        finally:
+            # Essai annulé ou sans verdict sur la disponibilité de l'API
+            self._breaker.async_release_trial()
+
+    async def _async_stream_from_target(
+        self,
+        target: Target,
+        payload: Dict[str, Any],
+        body: bytes,
+        tool_calls: List[Dict[str, Any]],
+        deadline: float,
+        latency_budget: Optional[float] = None,
+    ) -> AsyncGenerator[str, None]:
+        """Stream a chat completion from one target, with retries.
+
+        ``latency_budget`` bounds the time to the first fragment, retries
+        included, so a slow target can be left before the reply starts.
+        """
+        url = f"{target.base_url.rstrip('/')}/{API_CHAT_COMPLETIONS}"
+        headers = self._target_headers(target)
+        body = self._target_body(target, payload, body)
+        if latency_budget is not None:
+            deadline = min(deadline, time.monotonic() + latency_budget)
+
+        # Le délai s'applique à la connexion et entre deux fragments,
+        # pas à la durée totale de la réponse
+        timeout = aiohttp.ClientTimeout(
+            total=None, sock_connect=self._timeout, sock_read=self._timeout
+        )
+
+        # Seule l'ouverture du flux est rejouée : une fois la réponse
+        # commencée, les fragments déjà transmis ne peuvent être repris
+        attempt = 0
+        while True:
+            started = False
+            self._last_request = time.monotonic()
+            try:
+                async with async_timeout.timeout(
+                    None if latency_budget is None else deadline - time.monotonic()
+                ) as first_chunk, self._session.post(
+                    url, headers=headers, data=body, timeout=timeout
+                ) as response:
+                    if response.status == 401:
+                        raise ConfigEntryAuthFailed(ERROR_AUTH)
+                    if response.status != 200:
+                        text = await response.text()
+                        raise status_error(
+                            response.status,
+                            text,
+                            response.headers.get(hdrs.RETRY_AFTER),
+                        )
+
+                    started = True
+                    async for chunk in _async_iter_sse_data(response):
+                        # Premier fragment reçu : le budget ne s'applique plus
+                        first_chunk.reject()
+                        self.metrics.async_record_usage(chunk.get("usage"))
+                        choices = chunk.get("choices")
+                        if not choices:
+                            continue
+                        delta = choices[0].get("delta") or {}
+                        if delta.get("tool_calls"):
+                            _merge_tool_call_deltas(tool_calls, delta["tool_calls"])
+                        if content := delta.get("content"):
+                            yield content
+                return
+
+            except UpstreamError as err:
+                await self._retry.async_wait(err, attempt, deadline)
+            except asyncio.TimeoutError as err:
+                raise UpstreamError(
+                    ERROR_TIMEOUT, reason="timeout", retryable=False
+                ) from err
+            except aiohttp.ClientConnectionError as err:
+                if started:
+                    raise HomeAssistantError(ERROR_CONNECT) from err
+                await self._retry.async_wait(
+                    UpstreamError(ERROR_CONNECT, reason="connect", retryable=True),
+                    attempt,
+                    deadline,
+                )
+            except aiohttp.ClientError as err:
+                raise HomeAssistantError(ERROR_CONNECT) from err
+            except ValueError as err:
+                _LOGGER.error("Invalid streaming chunk: %s", err)
+                raise HomeAssistantError(ERROR_UNKNOWN) from err
+            attempt += 1
+
+    async def async_remember_exchange(
+        self,
+        messages: List[Dict[str, str]],
+        response_text: str,
+        user_id: Optional[str] = None,
+        conversation_id: Optional[str] = None,
+    ) -> None:
+        """Record an exchange answered without the model in memory."""
+        if not self._enable_memory:
+            return
+        # Garder le contexte pour les relances (« et éteins-la »)
+        conv_key, conversation_messages = await self._async_prepare_conversation(
+            messages, user_id, conversation_id
+        )
+        self._store_conversation_reply(conv_key, conversation_messages, response_text)
+
     async def async_clear_conversation_memory(
         self, user_id: Optional[str] = None, conversation_id: Optional[str] = None
     ) -> None:
         """Clear conversation memory for a specific user/conversation."""
         conv_key = self._get_conversation_key(user_id, conversation_id)
 
-        if conv_key in self._conversation_history:
-            del self._conversation_history[conv_key]
+        await self._memory.async_load_index()
+        if conv_key in self._memory:
+            await self._memory.async_delete(conv_key)
             _LOGGER.debug("Cleared conversation history for key: %s", conv_key)
 
-        if conv_key in self._conversation_timestamps:
-            del self._conversation_timestamps[conv_key]
+    @property
+    def circuit_state(self) -> str:
+        """Return the state of the circuit breaker."""
+        return self._breaker.state
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """Return request counters for monitoring."""
+        return {
+            "last_prompt_tokens": self.last_prompt_tokens,
+            **self._breaker.stats,
+            "failovers": self.failovers,
+            "hedged_requests": self.hedged_requests,
+            "hedge_wins": self.hedge_wins,
+            **self._retry.stats,
+            **self._single_flight.stats,
+            **(self._response_cache.stats if self._response_cache else {}),
+            **self.routing.stats,
+        }
 
     async def async_shutdown(self) -> None:
         """Shutdown coordinator."""
         _LOGGER.debug("Shutting down Mammouth AI coordinator")
-        # Vider la mémoire
-        self._conversation_history.clear()
-        self._conversation_timestamps.clear()
+        # Écrire la mémoire en attente puis libérer le cache en RAM
+        await self._memory.async_shutdown()
+        if self._response_cache is not None:
+            self._response_cache.async_shutdown()
+        if self._unsub_keep_warm is not None:
+            self._unsub_keep_warm()
+            self._unsub_keep_warm = None
+        if self._unsub_close is not None:
+            self._unsub_close()
+        await self._async_close_session()
+
+    async def _async_close_session(self, _event: Optional[Event] = None) -> None:
+        """Close the dedicated HTTP session and its pooled connections."""
+        self._unsub_close = None
+        await self._session.close()
+
+    async def async_setup_connections(self) -> None:
+        """Open connections to the API ahead of the first request."""
+        if not self._prewarm:
+            return
+        # La validation de l'entrée vient d'ouvrir une connexion à l'URL
+        # principale : seules les cibles de secours restent à préchauffer
+        await self._async_prewarm(include_primary=False)
+        self._unsub_keep_warm = async_track_time_interval(
+            self.hass, self._async_keep_warm, KEEP_WARM_INTERVAL
+        )
+
+    async def _async_prewarm(self, include_primary: bool = True) -> None:
+        """Connect to every target, including the fallback ones."""
+        targets = {target.base_url: target for target in self._targets}
+        if not include_primary:
+            targets.pop(self._base_url, None)
+        await asyncio.gather(
+            *(self._async_prewarm_target(target) for target in targets.values())
+        )
+
+    async def _async_prewarm_target(self, target: Target) -> None:
+        """Open a pooled connection to a target with a light request."""
+        url = f"{target.base_url.rstrip('/')}/{API_MODELS}"
+        try:
+            async with async_timeout.timeout(self._timeout):
+                async with self._session.head(
+                    url, headers=self._target_headers(target)
+                ):
+                    pass
+        except (asyncio.TimeoutError, aiohttp.ClientError) as err:
+            _LOGGER.debug(
+                "Could not prewarm connection to %s: %s", target.base_url, err
+            )
+
+    @callback
+    def _async_keep_warm(self, _now: Any) -> None:
+        """Refresh idle connections before the server closes them."""
+        if time.monotonic() - self._last_request < KEEP_WARM_INTERVAL.total_seconds():
+            return
+        self._last_request = time.monotonic()
+        self.config_entry.async_create_background_task(
+            self.hass, self._async_prewarm(), "mammouth_ai keep warm"
+        )
+
+    async def async_setup_memory(self) -> None:
+        """Load the memory index and schedule the expiry of stored histories."""
+        if self._enable_memory:
+            await self._memory.async_load_index()
@@ -0,0 +1,50 @@
+"""Diagnostics support for Mammouth AI."""
+
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import CONF_API_KEY, CONF_FALLBACK_TARGETS, DOMAIN
+from .coordinator import MammouthDataUpdateCoordinator
+from .metrics import LATENCY_METRICS, PERCENTILES
+
+# Les cibles de secours peuvent porter leur propre clé
+TO_REDACT = {CONF_API_KEY, CONF_FALLBACK_TARGETS}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return the request counters and metrics of a config entry."""
+    coordinator: MammouthDataUpdateCoordinator = hass.data[DOMAIN][entry.entry_id]
+    metrics = coordinator.metrics
+
+    latencies_ms: dict[str, dict[str, float | None]] = {}
+    for metric in LATENCY_METRICS:
+        latencies_ms[metric] = {}
+        for percent in PERCENTILES:
+            latency = metrics.latency(metric, percent)
+            latencies_ms[metric][f"p{percent}"] = (
+                None if latency is None else round(latency * 1000, 1)
+            )
+
+    return {
+        "entry": {
+            "data": async_redact_data(entry.data, TO_REDACT),
+            "options": async_redact_data(entry.options, TO_REDACT),
+        },
+        "stats": coordinator.stats,
+        "metrics": {
+            "latency_ms": latencies_ms,
+            "prompt_tokens": metrics.prompt_tokens,
+            "completion_tokens": metrics.completion_tokens,
+            "cached_tokens": metrics.cached_tokens,
+            "total_tokens": metrics.total_tokens,
+            "prompt_cache_hit_ratio": metrics.cache_hit_ratio,
+            "errors": dict(metrics.errors),
+        },
+    }
@@ -0,0 +1,50 @@
+"""JSON encoding of Mammouth AI requests."""
+
+from __future__ import annotations
+
+from collections.abc import Iterable, Mapping
+from functools import lru_cache
+from typing import Any
+
+import orjson
+from homeassistant.helpers.json import json_bytes, json_encoder_default
+
+MESSAGE_CACHE_SIZE = 256
+
+_TEXT_MESSAGE_KEYS = frozenset({"role", "content"})
+
+
+@lru_cache(maxsize=MESSAGE_CACHE_SIZE)
+def _encode_text_message(role: str, content: str) -> bytes:
+    """Encode a plain text message, cached since it is resent every turn."""
+    return json_bytes({"role": role, "content": content})
+
+
+def encode_message(message: Mapping[str, Any]) -> bytes:
+    """Encode one message for the API."""
+    if message.keys() == _TEXT_MESSAGE_KEYS:
+        role, content = message["role"], message["content"]
+        if isinstance(role, str) and isinstance(content, str):
+            return _encode_text_message(role, content)
+    return json_bytes(message)
+
+
+def encode_messages(messages: Iterable[Mapping[str, Any]]) -> orjson.Fragment:
+    """Encode a list of messages as a pre-serialized JSON fragment.
+
+    The system prompt and the stored history are identical from one turn to
+    the next, so their encodings come from the cache and only the new
+    messages are serialized.
+    """
+    return orjson.Fragment(
+        b"[" + b",".join(encode_message(message) for message in messages) + b"]"
+    )
+
+
+def encode_payload(payload: Mapping[str, Any]) -> bytes:
+    """Encode a request payload with stable key order."""
+    return orjson.dumps(
+        payload,
+        option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SORT_KEYS,
+        default=json_encoder_default,
+    )
@@ -0,0 +1,323 @@
+"""Incremental entity index for Mammouth AI."""
+
+from __future__ import annotations
+
+import logging
+from collections import defaultdict
+from collections.abc import Callable, Collection, Iterable, Sequence
+from typing import Any
+
+from homeassistant.const import EVENT_STATE_CHANGED, STATE_UNAVAILABLE, STATE_UNKNOWN
+from homeassistant.core import Event, HomeAssistant, State, callback, split_entity_id
+from homeassistant.helpers import area_registry as ar
+from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers import entity_registry as er
+
+from .ranking import (
+    WEIGHT_ALIAS,
+    WEIGHT_AREA,
+    WEIGHT_ENTITY_ID,
+    WEIGHT_NAME,
+    RelevanceIndex,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+UNUSABLE_STATES = frozenset({STATE_UNKNOWN, STATE_UNAVAILABLE})
+
+
+class EntityIndex:
+    """Index of usable states keyed by domain and area.
+
+    The index is seeded once from the state machine and then kept up to date
+    from ``state_changed`` events and registry updates, so that building the
+    prompt context only reads the slices it needs instead of scanning every
+    state on each utterance. The area of an entity is the one of its registry
+    entry, or of its device when the entity does not override it. Names,
+    aliases and areas also feed an inverted index used to rank entities by
+    relevance to the user's query. Entities that are unavailable or unknown
+    keep their name and area, so that they still belong to the catalogue.
+    """
+
+    def __init__(self, hass: HomeAssistant, domains: Iterable[str]) -> None:
+        """Initialize the index for the given domains."""
+        self._hass = hass
+        self._domains = frozenset(domains)
+        # domaine -> entity_id -> State (ordre d'insertion conservé)
+        self._by_domain: dict[str, dict[str, State]] = defaultdict(dict)
+        # area_id -> entity_ids, et la correspondance inverse
+        self._by_area: dict[str, set[str]] = defaultdict(set)
+        self._area_of: dict[str, str | None] = {}
+        # Index de pertinence et nom de chaque entité connue, même indisponible
+        self._relevance = RelevanceIndex()
+        self._names: dict[str, str] = {}
+        # Incrémenté quand la liste des entités connues, leurs noms ou pièces
+        # changent, mais pas quand elles deviennent (in)disponibles
+        self.revision = 0
+        self._unsubs: list[Callable[[], None]] = []
+
+    @property
+    def domains(self) -> frozenset[str]:
+        """Return the indexed domains."""
+        return self._domains
+
+    def __len__(self) -> int:
+        """Return the number of indexed (usable) states."""
+        return sum(len(states) for states in self._by_domain.values())
+
+    @callback
+    def async_setup(self) -> None:
+        """Seed the index and subscribe to updates."""
+        for state in self._hass.states.async_all(self._domains):
+            self._async_add_state(state)
+
+        self._unsubs.append(
+            self._hass.bus.async_listen(
+                EVENT_STATE_CHANGED,
+                self._async_handle_state_changed,
+                event_filter=self._async_filter_state_changed,
+            )
+        )
+        self._unsubs.append(
+            self._hass.bus.async_listen(
+                er.EVENT_ENTITY_REGISTRY_UPDATED,
+                self._async_handle_entity_registry_updated,
+            )
+        )
+        self._unsubs.append(
+            self._hass.bus.async_listen(
+                dr.EVENT_DEVICE_REGISTRY_UPDATED,
+                self._async_handle_device_registry_updated,
+            )
+        )
+        self._unsubs.append(
+            self._hass.bus.async_listen(
+                ar.EVENT_AREA_REGISTRY_UPDATED,
+                self._async_handle_area_registry_updated,
+            )
+        )
+        _LOGGER.debug("Entity index seeded with %d states", len(self))
+
+    @callback
+    def async_shutdown(self) -> None:
+        """Unsubscribe from updates and drop the index."""
+        while self._unsubs:
+            self._unsubs.pop()()
+        self._by_domain.clear()
+        self._by_area.clear()
+        self._area_of.clear()
+        self._relevance = RelevanceIndex()
+        self._names.clear()
+
+    @callback
+    def async_get_states(
+        self,
+        domains: Iterable[str],
+        exclude_areas: Collection[str] = (),
+        include_areas: Collection[str] = (),
+    ) -> list[State]:
+        """Return usable states of the given domains and areas.
+
+        When ``include_areas`` is given, only entities of these areas are
+        returned; entities of ``exclude_areas`` are always left out.
+        """
+        excluded, included = self._area_filter(exclude_areas, include_areas)
+        if included is not None and not included:
+            return []
+
+        states: list[State] = []
+        for domain in domains:
+            domain_states = self._by_domain.get(domain)
+            if not domain_states:
+                continue
+            if included is not None:
+                # L'ordre de l'index est conservé (prompt stable)
+                states.extend(
+                    state
+                    for entity_id, state in domain_states.items()
+                    if entity_id in included
+                )
+            elif excluded:
+                states.extend(
+                    state
+                    for entity_id, state in domain_states.items()
+                    if entity_id not in excluded
+                )
+            else:
+                states.extend(domain_states.values())
+        return states
+
+    @callback
+    def async_get_names(
+        self,
+        domains: Iterable[str],
+        exclude_areas: Collection[str] = (),
+        include_areas: Collection[str] = (),
+    ) -> dict[str, str]:
+        """Return the names of the known entities, available or not.
+
+        The areas are filtered as in ``async_get_states``.
+        """
+        excluded, included = self._area_filter(exclude_areas, include_areas)
+        domains = frozenset(domains)
+        return {
+            entity_id: name
+            for entity_id, name in self._names.items()
+            if split_entity_id(entity_id)[0] in domains
+            and entity_id not in excluded
+            and (included is None or entity_id in included)
+        }
+
+    def _area_filter(
+        self, exclude_areas: Collection[str], include_areas: Collection[str]
+    ) -> tuple[set[str], set[str] | None]:
+        """Return the excluded entities, and the included ones if restricted."""
+        excluded: set[str] = set()
+        for area_id in exclude_areas:
+            excluded.update(self._by_area.get(area_id, ()))
+        included: set[str] | None = None
+        if include_areas:
+            included = set()
+            for area_id in include_areas:
+                included.update(self._by_area.get(area_id, ()))
+            included -= excluded
+        return excluded, included
+
+    @callback
+    def async_rank(
+        self, states: Sequence[State], query: str, limit: int
+    ) -> list[State]:
+        """Return the states most relevant to a query, at most ``limit``."""
+        return self._relevance.async_top_k(states, query, limit)
+
+    @callback
+    def async_get_area(self, entity_id: str) -> str | None:
+        """Return the area of an indexed entity."""
+        return self._area_of.get(entity_id)
+
+    def _resolve_area(self, entity_id: str) -> str | None:
+        """Resolve the area of an entity from the entity and device registries."""
+        entry = er.async_get(self._hass).async_get(entity_id)
+        if entry is None:
+            return None
+        if entry.area_id is not None or entry.device_id is None:
+            return entry.area_id
+        # L'entité hérite de la pièce de son appareil
+        device = dr.async_get(self._hass).async_get(entry.device_id)
+        return device.area_id if device else None
+
+    @callback
+    def _async_set_area(self, entity_id: str, area_id: str | None) -> None:
+        """Move an entity to another area slice."""
+        old_area = self._area_of.get(entity_id)
+        if old_area != area_id and entity_id in self._names:
+            self.revision += 1
+        if old_area is not None and old_area != area_id:
+            self._by_area[old_area].discard(entity_id)
+            if not self._by_area[old_area]:
+                del self._by_area[old_area]
+        self._area_of[entity_id] = area_id
+        if area_id is not None:
+            self._by_area[area_id].add(entity_id)
+
+    @callback
+    def _async_update_relevance(self, entity_id: str) -> None:
+        """Re-index the name, aliases and area of an entity for ranking."""
+        if (name := self._names.get(entity_id)) is None:
+            return
+        fields = [
+            (name, WEIGHT_NAME),
+            (split_entity_id(entity_id)[1], WEIGHT_ENTITY_ID),
+        ]
+        if (entry := er.async_get(self._hass).async_get(entity_id)) is not None:
+            fields.extend((alias, WEIGHT_ALIAS) for alias in entry.aliases)
+        if (area_id := self._area_of.get(entity_id)) is not None and (
+            area := ar.async_get(self._hass).async_get_area(area_id)
+        ) is not None:
+            fields.append((area.name, WEIGHT_AREA))
+        self._relevance.async_set(entity_id, fields)
+
+    @callback
+    def _async_add_state(self, state: State) -> None:
+        """Add or refresh a state in the index."""
+        usable = state.state not in UNUSABLE_STATES
+        if state.entity_id not in self._area_of:
+            self._async_set_area(state.entity_id, self._resolve_area(state.entity_id))
+        # Ne ré-indexer que si le nom affiché a changé ; une entité
+        # indisponible garde le nom connu quand elle était disponible
+        known_name = self._names.get(state.entity_id)
+        if known_name != state.name and (usable or known_name is None):
+            self._names[state.entity_id] = state.name
+            self._async_update_relevance(state.entity_id)
+            self.revision += 1
+        if usable:
+            self._by_domain[state.domain][state.entity_id] = state
+        elif (domain_states := self._by_domain.get(state.domain)) is not None:
+            domain_states.pop(state.entity_id, None)
+
+    @callback
+    def _async_remove_entity(self, entity_id: str) -> None:
+        """Remove an entity from every slice."""
+        domain = split_entity_id(entity_id)[0]
+        if (domain_states := self._by_domain.get(domain)) is not None:
+            domain_states.pop(entity_id, None)
+        if self._names.pop(entity_id, None) is not None:
+            self.revision += 1
+        self._relevance.async_remove(entity_id)
+        if entity_id in self._area_of:
+            self._async_set_area(entity_id, None)
+            del self._area_of[entity_id]
+
+    @callback
+    def _async_filter_state_changed(self, event_data: Any) -> bool:
+        """Only handle state changes of indexed domains."""
+        return split_entity_id(event_data["entity_id"])[0] in self._domains
+
+    @callback
+    def _async_handle_state_changed(self, event: Event) -> None:
+        """Apply a state change to the index."""
+        new_state: State | None = event.data["new_state"]
+        if new_state is None:
+            self._async_remove_entity(event.data["entity_id"])
+        else:
+            self._async_add_state(new_state)
+
+    @callback
+    def _async_handle_entity_registry_updated(self, event: Event) -> None:
+        """Refresh the area and aliases of an entity when its entry changes."""
+        entity_id: str = event.data["entity_id"]
+        if split_entity_id(entity_id)[0] not in self._domains:
+            return
+        if event.data["action"] == "remove":
+            self._async_remove_entity(entity_id)
+            return
+        if entity_id in self._area_of:
+            self._async_set_area(entity_id, self._resolve_area(entity_id))
+            self._async_update_relevance(entity_id)
+
+    @callback
+    def _async_handle_device_registry_updated(self, event: Event) -> None:
+        """Re-resolve the entities of a device whose area may have changed."""
+        if event.data["action"] != "update" or "area_id" not in event.data.get(
+            "changes", {}
+        ):
+            return
+        for entry in er.async_entries_for_device(
+            er.async_get(self._hass), event.data["device_id"]
+        ):
+            if entry.entity_id in self._area_of:
+                self._async_set_area(
+                    entry.entity_id, self._resolve_area(entry.entity_id)
+                )
+                self._async_update_relevance(entry.entity_id)
+
+    @callback
+    def _async_handle_area_registry_updated(self, event: Event) -> None:
+        """Re-resolve the entities of a removed area, re-index a renamed one."""
+        if event.data["action"] not in ("remove", "update"):
+            return
+        for entity_id in list(self._by_area.get(event.data["area_id"], ())):
+            if event.data["action"] == "remove":
+                self._async_set_area(entity_id, self._resolve_area(entity_id))
+            self._async_update_relevance(entity_id)
+            self.revision += 1
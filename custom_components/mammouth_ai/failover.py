@@ -0,0 +1,40 @@
+"""Fallback targets for Mammouth AI."""
+
+from __future__ import annotations
+
+from typing import NamedTuple
+
+from .retry import UpstreamError
+
+
+class Target(NamedTuple):
+    """An endpoint and model able to serve chat completions."""
+
+    base_url: str
+    model: str
+    # Clé propre à la cible, sinon celle de l'entrée
+    api_key: str | None = None
+
+
+def parse_targets(text: str, default_base_url: str) -> list[Target]:
+    """Parse fallback targets, one ``[base_url] model [api_key]`` per line.
+
+    Lines without a URL use the base URL of the entry, and lines without a
+    key use the API key of the entry. Empty lines and lines starting with
+    ``#`` are ignored.
+    """
+    targets: list[Target] = []
+    for line in text.splitlines():
+        parts = line.split()
+        if not parts or parts[0].startswith("#"):
+            continue
+        if len(parts) == 1:
+            targets.append(Target(default_base_url, parts[0]))
+        else:
+            targets.append(Target(parts[0], parts[1], *parts[2:3]))
+    return targets
+
+
+def should_fail_over(err: Exception) -> bool:
+    """Return True if another target may succeed where this one failed."""
+    return isinstance(err, UpstreamError) and err.outage
@@ -0,0 +1,268 @@
+"""Multilingual keyword matching for smart domain filtering."""
+
+from __future__ import annotations
+
+import logging
+import re
+from collections.abc import Iterable, Mapping
+
+_LOGGER = logging.getLogger(__name__)
+
+# Les mots-clés plus courts n'acceptent qu'une marque de pluriel
+# ("luz" -> "luzes", "lamp" -> "lampen") et pas n'importe quelle suite
+# ("aan" dans "maand", "open" dans "opening") ; les plus longs acceptent
+# toute terminaison ("allume" -> "allumer", "lampe" -> "lampes")
+MIN_PREFIX_LENGTH = 5
+SHORT_KEYWORD_SUFFIXES = frozenset({"s", "es", "en", "x"})
+
+# Tables de mots-clés par langue puis par domaine
+DOMAIN_KEYWORDS: dict[str, dict[str, list[str]]] = {
+    "fr": {
+        "light": ["lumière", "éclairage", "allume", "éteins", "lampe"],
+        "switch": ["interrupteur", "prise", "allume", "éteins"],
+        "sensor": ["température", "humidité", "capteur", "mesure"],
+        "binary_sensor": [
+            "détecteur",
+            "mouvement",
+            "porte",
+            "fenêtre",
+            "ouvert",
+            "fermé",
+        ],
+        "climate": ["chauffage", "climatisation", "thermostat", "température"],
+        "cover": ["volet", "store", "rideau", "garage"],
+    },
+    "en": {
+        "light": ["light", "lamp", "turn on", "turn off", "illuminate"],
+        "switch": ["switch", "plug", "outlet", "turn on", "turn off"],
+        "sensor": ["temperature", "humidity", "sensor", "measure"],
+        "binary_sensor": ["detector", "motion", "door", "window", "open", "closed"],
+        "climate": ["heating", "air conditioning", "thermostat", "temperature"],
+        "cover": ["cover", "blind", "curtain", "shutter", "garage"],
+    },
+    "es": {
+        "light": ["luz", "lámpara", "encender", "apagar", "iluminar"],
+        "switch": ["interruptor", "enchufe", "encender", "apagar"],
+        "sensor": ["temperatura", "humedad", "sensor", "medida"],
+        "binary_sensor": [
+            "detector",
+            "movimiento",
+            "puerta",
+            "ventana",
+            "abierto",
+            "cerrado",
+        ],
+        "climate": ["calefacción", "aire acondicionado", "termostato", "temperatura"],
+        "cover": ["persiana", "cortina", "toldo", "garaje"],
+    },
+    "de": {
+        "light": ["licht", "lampe", "anschalten", "ausschalten"],
+        "switch": ["schalter", "steckdose", "anschalten", "ausschalten"],
+        "sensor": ["temperatur", "feuchtigkeit", "sensor", "messung"],
+        "binary_sensor": [
+            "detektor",
+            "bewegung",
+            "tür",
+            "fenster",
+            "offen",
+            "geschlossen",
+        ],
+        "climate": ["heizung", "klimaanlage", "thermostat", "temperatur"],
+        "cover": ["jalousie", "vorhang", "rollladen", "garage"],
+    },
+    "it": {
+        "light": ["luce", "lampada", "accendi", "spegni"],
+        "switch": ["interruttore", "presa", "accendi", "spegni"],
+        "sensor": ["temperatura", "umidità", "sensore", "misura"],
+        "binary_sensor": [
+            "rilevatore",
+            "movimento",
+            "porta",
+            "finestra",
+            "aperto",
+            "chiuso",
+        ],
+        "climate": ["riscaldamento", "aria condizionata", "termostato", "temperatura"],
+        "cover": ["tapparella", "tenda", "persiana", "garage"],
+    },
+    "pt": {
+        "light": ["luz", "lâmpada", "ligar", "desligar"],
+        "switch": ["interruptor", "tomada", "ligar", "desligar"],
+        "sensor": ["temperatura", "umidade", "sensor", "medida"],
+        "binary_sensor": [
+            "detector",
+            "movimento",
+            "porta",
+            "janela",
+            "aberto",
+            "fechado",
+        ],
+        "climate": ["aquecimento", "ar condicionado", "termostato", "temperatura"],
+        "cover": ["persiana", "cortina", "toldo", "garagem"],
+    },
+    "nl": {
+        "light": ["licht", "lamp", "aan", "uit"],
+        "switch": ["schakelaar", "stopcontact", "aan", "uit"],
+        "sensor": ["temperatuur", "vochtigheid", "sensor", "meting"],
+        "binary_sensor": ["detector", "beweging", "deur", "raam", "open", "gesloten"],
+        "climate": ["verwarming", "airconditioning", "thermostaat", "temperatuur"],
+        "cover": ["jaloezie", "gordijn", "rolluik", "garage"],
+    },
+}
+
+
+def parse_keyword_table(text: str) -> dict[str, dict[str, list[str]]]:
+    """Parse user-supplied keyword tables.
+
+    Each line has the form ``[language.]domain: keyword, keyword``. Lines
+    without a language are stored under ``custom``.
+    """
+    tables: dict[str, dict[str, list[str]]] = {}
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        target, sep, keywords = line.partition(":")
+        if not sep or not target.strip():
+            _LOGGER.warning("Ignoring invalid keyword line: %s", line)
+            continue
+        language, _, domain = target.strip().rpartition(".")
+        tables.setdefault(language or "custom", {}).setdefault(domain, []).extend(
+            keyword.strip() for keyword in keywords.split(",") if keyword.strip()
+        )
+    return tables
+
+
+class KeywordMatcher:
+    """Match query keywords to domains with a single compiled expression."""
+
+    def __init__(
+        self,
+        tables: Mapping[str, Mapping[str, Iterable[str]]] = DOMAIN_KEYWORDS,
+        extra_tables: Mapping[str, Mapping[str, Iterable[str]]] | None = None,
+    ) -> None:
+        """Build the matcher from keyword tables keyed by language."""
+        self._domains_by_keyword: dict[str, frozenset[str]] = {}
+        domains_by_keyword: dict[str, set[str]] = {}
+        for table in (tables, extra_tables or {}):
+            for domains in table.values():
+                for domain, keywords in domains.items():
+                    for keyword in keywords:
+                        domains_by_keyword.setdefault(keyword.lower(), set()).add(
+                            domain
+                        )
+        self._domains_by_keyword = {
+            keyword: frozenset(domains)
+            for keyword, domains in domains_by_keyword.items()
+        }
+
+        # Les mots-clés les plus longs d'abord pour que l'alternance
+        # retienne la correspondance la plus spécifique
+        alternation = "|".join(
+            re.escape(keyword)
+            for keyword in sorted(self._domains_by_keyword, key=len, reverse=True)
+        )
+        self._pattern = re.compile(rf"(?<!\w)({alternation})(\w*)")
+
+    def match(self, query: str) -> set[str]:
+        """Return the domains whose keywords appear in the query."""
+        domains: set[str] = set()
+        for found in self._pattern.finditer(query.lower()):
+            keyword, suffix = found.groups()
+            if (
+                suffix
+                and len(keyword) < MIN_PREFIX_LENGTH
+                and suffix not in SHORT_KEYWORD_SUFFIXES
+            ):
+                continue
+            domains.update(self._domains_by_keyword[keyword])
+        return domains
+
+
+DEFAULT_MATCHER = KeywordMatcher()
+
+# Verbes d'action et mots interrogatifs pour reconnaître les commandes
+COMMAND_VERBS: dict[str, list[str]] = {
+    "fr": [
+        "allume",
+        "éteins",
+        "ouvre",
+        "ferme",
+        "monte",
+        "baisse",
+        "mets",
+        "règle",
+        "active",
+        "désactive",
+        "lance",
+        "arrête",
+        "démarre",
+        "augmente",
+        "diminue",
+        "verrouille",
+    ],
+    "en": [
+        "turn",
+        "switch",
+        "open",
+        "close",
+        "set",
+        "dim",
+        "start",
+        "stop",
+        "lock",
+        "unlock",
+        "raise",
+        "lower",
+        "activate",
+    ],
+    "es": ["enciende", "apaga", "abre", "cierra", "pon", "sube", "baja"],
+    "de": ["schalte", "mach", "öffne", "schließe", "stelle", "starte", "stoppe"],
+    "it": ["accendi", "spegni", "apri", "chiudi", "metti", "alza", "abbassa"],
+    "pt": ["liga", "desliga", "abre", "fecha", "põe", "sobe", "baixa"],
+    "nl": ["zet", "doe", "open", "sluit", "start", "stop"],
+}
+QUESTION_WORDS: dict[str, list[str]] = {
+    "fr": ["quel", "quelle", "quels", "quelles", "comment", "pourquoi", "combien"],
+    "en": ["what", "which", "how", "why", "when", "where", "who"],
+    "es": ["qué", "cuál", "cómo", "por qué", "cuánto", "cuándo", "dónde"],
+    "de": ["was", "welche", "wie", "warum", "wann", "wo", "wer"],
+    "it": ["cosa", "quale", "come", "perché", "quanto", "quando", "dove"],
+    "pt": ["que", "qual", "como", "porque", "quanto", "quando", "onde"],
+    "nl": ["wat", "welke", "hoe", "waarom", "wanneer", "waar", "wie"],
+}
+
+# Au-delà, une demande est traitée comme une question ouverte
+COMMAND_MAX_WORDS = 12
+
+
+def _word_pattern(tables: Mapping[str, Iterable[str]]) -> re.Pattern[str]:
+    """Compile an alternation of the words of word lists by language."""
+    words = {word.lower() for table in tables.values() for word in table}
+    alternation = "|".join(
+        re.escape(word) for word in sorted(words, key=len, reverse=True)
+    )
+    return re.compile(rf"(?<!\w)({alternation})(\w*)")
+
+
+def _contains_word(pattern: re.Pattern[str], text: str) -> bool:
+    """Return True if a word of the pattern appears, whole when it is short."""
+    return any(
+        not suffix or len(word) >= MIN_PREFIX_LENGTH
+        for word, suffix in (found.groups() for found in pattern.finditer(text))
+    )
+
+
+_COMMAND_PATTERN = _word_pattern(COMMAND_VERBS)
+_QUESTION_PATTERN = _word_pattern(QUESTION_WORDS)
+
+
+def is_command(query: str) -> bool:
+    """Return True if the query looks like a short device command."""
+    query = query.lower()
+    return (
+        "?" not in query
+        and len(query.split()) <= COMMAND_MAX_WORDS
+        and _contains_word(_COMMAND_PATTERN, query)
+        and not _contains_word(_QUESTION_PATTERN, query)
+    )
@@ -0,0 +1,382 @@
+"""Persistent conversation memory for Mammouth AI."""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.storage import Store
+from homeassistant.util import slugify
+
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+STORAGE_SAVE_DELAY = 10  # secondes, regroupe les écritures successives
+
+# Surcoût approximatif d'un message sérialisé (clés, guillemets, séparateurs)
+MESSAGE_OVERHEAD_BYTES = 32
+
+# Message système résumant les échanges sortis de l'historique
+SUMMARY_KEY = "_summary"
+SUMMARY_HEADER = "Résumé des échanges précédents :"
+SUMMARY_MAX_CHARS = 800
+SUMMARY_LINE_CHARS = 120
+_SUMMARY_ROLES = {"user": "Utilisateur", "assistant": "Assistant"}
+
+
+def is_summary(message: Dict[str, Any]) -> bool:
+    """Return True if the message is a conversation summary."""
+    return bool(message.get(SUMMARY_KEY))
+
+
+def build_summary_message(text: str) -> Dict[str, Any]:
+    """Return the summary system message for a summary text."""
+    return {
+        "role": "system",
+        "content": f"{SUMMARY_HEADER}\n{text.strip()}",
+        SUMMARY_KEY: True,
+    }
+
+
+def summary_text(message: Optional[Dict[str, Any]]) -> str:
+    """Return the text of a summary message without its header."""
+    if message is None:
+        return ""
+    return "\n".join(str(message.get("content") or "").splitlines()[1:])
+
+
+def build_extractive_summary(
+    dropped: List[Dict[str, Any]], previous: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """Collapse dropped turns into a compact summary system message.
+
+    Each dropped turn becomes one shortened line appended to the previous
+    summary; the oldest lines are discarded to respect the size limit.
+    """
+    lines = summary_text(previous).splitlines()
+    for msg in dropped:
+        content = " ".join(str(msg.get("content") or "").split())
+        if not content:
+            continue
+        if len(content) > SUMMARY_LINE_CHARS:
+            content = content[: SUMMARY_LINE_CHARS - 1] + "…"
+        role = _SUMMARY_ROLES.get(msg.get("role", ""), msg.get("role", ""))
+        lines.append(f"- {role} : {content}")
+
+    while lines and sum(len(line) + 1 for line in lines) > SUMMARY_MAX_CHARS:
+        lines.pop(0)
+
+    return build_summary_message("\n".join(lines))
+
+
+def _persisted_messages(messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Return the messages worth persisting.
+
+    The system prompt is rendered again on every turn, so it is not stored.
+    """
+    return [msg for msg in messages if msg.get("role") != "system" or is_summary(msg)]
+
+
+def _persisted_data(messages: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Return the data written to the Store of a conversation."""
+    return {"messages": _persisted_messages(messages)}
+
+
+def _estimate_size(messages: List[Dict[str, Any]]) -> int:
+    """Estimate the serialized size of a conversation in bytes."""
+    return sum(
+        len(str(msg.get("content") or "").encode()) + MESSAGE_OVERHEAD_BYTES
+        for msg in _persisted_messages(messages)
+    )
+
+
+class ConversationMemory:
+    """Write-through cache of conversation histories backed by Store.
+
+    An index file keeps the last access time and size of every stored
+    conversation, while each conversation lives in its own file so that it
+    is only loaded when its user talks again. Writes are debounced by the
+    Store helper, which also flushes pending data when Home Assistant stops.
+
+    Expiry is driven by a heap of deadlines and a single timer armed for the
+    earliest one, so requests never pay for a sweep and idle conversations
+    are still evicted on time.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        entry_id: str,
+        max_cached: int,
+        max_storage_bytes: int,
+        persist: bool = True,
+        expire_after: Optional[float] = None,
+    ) -> None:
+        """Initialize the memory."""
+        self._hass = hass
+        self._entry_id = entry_id
+        self._max_cached = max_cached
+        self._max_storage_bytes = max_storage_bytes
+        self._persist = persist
+        self._expire_after = expire_after
+
+        # Cache LRU en RAM : clé -> messages
+        self._cache: OrderedDict[str, List[Dict[str, Any]]] = OrderedDict()
+        # Index persisté : clé -> {"last_access": float, "size": int}
+        self._index: Dict[str, Dict[str, Any]] = {}
+        self._index_store: Store[Dict[str, Any]] = Store(
+            hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}.memory", private=True
+        )
+        self._stores: Dict[str, Store[Dict[str, Any]]] = {}
+        self._dirty: set[str] = set()
+        self._index_loaded = not persist
+        self._load_lock = asyncio.Lock()
+
+        # Tas de (échéance, clé) ; les entrées périmées sont ignorées au retrait
+        self._expiry_heap: List[Tuple[float, str]] = []
+        self._unsub_expiry: Optional[CALLBACK_TYPE] = None
+        self._next_expiry: Optional[float] = None
+
+    @property
+    def cached_keys(self) -> List[str]:
+        """Return the keys of conversations held in RAM."""
+        return list(self._cache)
+
+    @property
+    def storage_bytes(self) -> int:
+        """Return the estimated size of all stored conversations."""
+        return sum(info["size"] for info in self._index.values())
+
+    def __contains__(self, key: str) -> bool:
+        """Return True if a conversation is known for this key."""
+        return key in self._index
+
+    def keys(self) -> List[str]:
+        """Return every known conversation key."""
+        return list(self._index)
+
+    def last_access(self, key: str) -> Optional[float]:
+        """Return the last access time of a conversation as a timestamp."""
+        info = self._index.get(key)
+        return info["last_access"] if info else None
+
+    def _get_store(self, key: str) -> Store[Dict[str, Any]]:
+        """Return the Store of a conversation."""
+        if (store := self._stores.get(key)) is None:
+            store = self._stores[key] = Store(
+                self._hass,
+                STORAGE_VERSION,
+                f"{DOMAIN}.{self._entry_id}.memory.{slugify(key)}",
+                private=True,
+            )
+        return store
+
+    async def async_load_index(self) -> None:
+        """Load the conversation index from disk."""
+        if self._index_loaded:
+            return
+        async with self._load_lock:
+            if self._index_loaded:
+                return
+            data = await self._index_store.async_load()
+            self._index = (data or {}).get("conversations", {})
+            self._index_loaded = True
+            self._async_rebuild_expiry_heap()
+            _LOGGER.debug("Loaded memory index with %d conversations", len(self._index))
+
+    async def async_get(self, key: str) -> List[Dict[str, Any]]:
+        """Return the history of a conversation, loading it on first access."""
+        if (messages := self._cache.get(key)) is not None:
+            self._cache.move_to_end(key)
+            return messages
+
+        await self.async_load_index()
+        messages = []
+        if self._persist and key in self._index:
+            async with self._load_lock:
+                data = await self._get_store(key).async_load()
+            messages = (data or {}).get("messages", [])
+            _LOGGER.debug("Loaded %d stored messages for key: %s", len(messages), key)
+
+        # Un autre appel a pu remplir le cache pendant le chargement
+        if (cached := self._cache.get(key)) is not None:
+            return cached
+        self._cache_put(key, messages)
+        return messages
+
+    @callback
+    def async_set(self, key: str, messages: List[Dict[str, Any]]) -> None:
+        """Store the history of a conversation and schedule its write."""
+        self._cache_put(key, messages)
+        now = time.time()
+        self._index[key] = {
+            "last_access": now,
+            "size": _estimate_size(messages),
+        }
+        self._async_schedule_expiry(key, now)
+        if not self._persist:
+            return
+
+        self._dirty.add(key)
+        self._get_store(key).async_delay_save(
+            lambda: _persisted_data(messages), STORAGE_SAVE_DELAY
+        )
+        self._async_enforce_storage_limit(key)
+        self._async_schedule_index_save()
+
+    @callback
+    def async_touch(self, key: str) -> None:
+        """Refresh the last access time of a conversation."""
+        if (info := self._index.get(key)) is not None:
+            info["last_access"] = now = time.time()
+            self._async_schedule_expiry(key, now)
+            if self._persist:
+                self._async_schedule_index_save()
+
+    async def async_delete(self, key: str) -> None:
+        """Forget a conversation in RAM and on disk."""
+        if (store := self._async_forget(key)) is not None:
+            await store.async_remove()
+
+    @callback
+    def _async_forget(self, key: str) -> Optional[Store[Dict[str, Any]]]:
+        """Drop a conversation and return its Store if it must be removed."""
+        self._cache.pop(key, None)
+        self._dirty.discard(key)
+        if self._index.pop(key, None) is None or not self._persist:
+            return None
+        self._async_schedule_index_save()
+        store = self._get_store(key)
+        del self._stores[key]
+        return store
+
+    async def async_flush(self) -> None:
+        """Write every pending change to disk immediately."""
+        if not self._persist:
+            return
+        for key in list(self._dirty):
+            if (messages := self._cache.get(key)) is not None:
+                await self._get_store(key).async_save(_persisted_data(messages))
+        self._dirty.clear()
+        if self._index_loaded:
+            await self._index_store.async_save({"conversations": self._index})
+
+    async def async_shutdown(self) -> None:
+        """Flush pending writes, stop the expiry timer and drop the RAM cache."""
+        await self.async_flush()
+        if self._unsub_expiry is not None:
+            self._unsub_expiry()
+            self._unsub_expiry = None
+            self._next_expiry = None
+        self._expiry_heap.clear()
+        self._cache.clear()
+        if not self._persist:
+            self._index.clear()
+
+    async def async_remove_all(self) -> None:
+        """Remove every stored conversation of the config entry."""
+        await self.async_load_index()
+        for key in list(self._index):
+            await self.async_delete(key)
+        await self._index_store.async_remove()
+
+    def _cache_put(self, key: str, messages: List[Dict[str, Any]]) -> None:
+        """Insert a conversation in the RAM cache, evicting the oldest ones."""
+        self._cache[key] = messages
+        self._cache.move_to_end(key)
+        while len(self._cache) > self._max_cached:
+            evicted, _ = self._cache.popitem(last=False)
+            if not self._persist:
+                # Sans stockage, une conversation sortie du cache est perdue
+                self._index.pop(evicted, None)
+            _LOGGER.debug("Evicted conversation %s from memory cache", evicted)
+
+    @callback
+    def _async_enforce_storage_limit(self, current_key: str) -> None:
+        """Remove the least recently used conversations above the size cap."""
+        total = self.storage_bytes
+        if total <= self._max_storage_bytes:
+            return
+        for key in sorted(self._index, key=lambda k: self._index[k]["last_access"]):
+            if total <= self._max_storage_bytes:
+                break
+            if key == current_key:
+                continue
+            total -= self._index[key]["size"]
+            _LOGGER.debug("Storage limit reached, removing conversation %s", key)
+            if (store := self._async_forget(key)) is not None:
+                self._hass.async_create_task(store.async_remove())
+
+    @callback
+    def _async_schedule_expiry(self, key: str, last_access: float) -> None:
+        """Record the new deadline of a conversation."""
+        if self._expire_after is None:
+            return
+        heapq.heappush(self._expiry_heap, (last_access + self._expire_after, key))
+        # Les entrées périmées s'accumulent à chaque accès : compacter le tas
+        if len(self._expiry_heap) > 2 * len(self._index) + 16:
+            self._async_rebuild_expiry_heap()
+        else:
+            self._async_arm_expiry_timer()
+
+    @callback
+    def _async_rebuild_expiry_heap(self) -> None:
+        """Rebuild the heap from the index, dropping stale entries."""
+        if self._expire_after is None:
+            return
+        self._expiry_heap = [
+            (info["last_access"] + self._expire_after, key)
+            for key, info in self._index.items()
+        ]
+        heapq.heapify(self._expiry_heap)
+        self._async_arm_expiry_timer()
+
+    @callback
+    def _async_arm_expiry_timer(self) -> None:
+        """Arm the timer for the earliest deadline."""
+        if not self._expiry_heap:
+            return
+        deadline = self._expiry_heap[0][0]
+        if self._next_expiry is not None and self._next_expiry <= deadline:
+            return
+        if self._unsub_expiry is not None:
+            self._unsub_expiry()
+        self._next_expiry = deadline
+        self._unsub_expiry = async_call_later(
+            self._hass, max(0.0, deadline - time.time()), self._async_expire
+        )
+
+    @callback
+    def _async_expire(self, _now: Any) -> None:
+        """Evict every conversation whose deadline has passed."""
+        self._unsub_expiry = None
+        self._next_expiry = None
+        now = time.time()
+        assert self._expire_after is not None
+
+        while self._expiry_heap and self._expiry_heap[0][0] <= now:
+            _, key = heapq.heappop(self._expiry_heap)
+            last_access = self.last_access(key)
+            if last_access is None or last_access + self._expire_after > now:
+                # Conversation supprimée ou réutilisée depuis
+                continue
+            _LOGGER.debug("Expired conversation history for key: %s", key)
+            if (store := self._async_forget(key)) is not None:
+                self._hass.async_create_task(store.async_remove())
+
+        self._async_arm_expiry_timer()
+
+    @callback
+    def _async_schedule_index_save(self) -> None:
+        """Schedule a debounced write of the index."""
+        self._index_store.async_delay_save(
+            lambda: {"conversations": self._index}, STORAGE_SAVE_DELAY
+        )
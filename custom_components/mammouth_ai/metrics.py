@@ -0,0 +1,176 @@
+"""Request metrics for Mammouth AI."""
+
+from __future__ import annotations
+
+import math
+from collections import Counter, deque
+from collections.abc import Mapping
+from typing import Any
+
+from homeassistant.core import callback
+
+from .retry import UpstreamError
+
+LATENCY_WINDOW_SIZE = 100
+
+# Étapes chronométrées de chaque requête
+METRIC_END_TO_END = "end_to_end"
+METRIC_UPSTREAM = "upstream"
+METRIC_ENTITY_FILTERING = "entity_filtering"
+METRIC_PROMPT_RENDERING = "prompt_rendering"
+LATENCY_METRICS = (
+    METRIC_END_TO_END,
+    METRIC_UPSTREAM,
+    METRIC_ENTITY_FILTERING,
+    METRIC_PROMPT_RENDERING,
+)
+PERCENTILES = (50, 95, 99)
+
+# Poids des nouvelles mesures dans la moyenne glissante des latences
+LATENCY_SMOOTHING = 0.2
+
+
+class LatencyWindow:
+    """Rolling window of the most recent request durations, in seconds."""
+
+    def __init__(self, size: int = LATENCY_WINDOW_SIZE) -> None:
+        """Initialize the window."""
+        self._samples: deque[float] = deque(maxlen=size)
+
+    def __len__(self) -> int:
+        """Return the number of samples in the window."""
+        return len(self._samples)
+
+    def add(self, seconds: float) -> None:
+        """Record a duration."""
+        self._samples.append(seconds)
+
+    def percentile(self, percent: float) -> float | None:
+        """Return the nearest-rank percentile of the window."""
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        rank = max(math.ceil(percent / 100 * len(ordered)), 1)
+        return ordered[rank - 1]
+
+
+class RequestMetrics:
+    """Rolling latencies, token usage and errors of a config entry."""
+
+    def __init__(self) -> None:
+        """Initialize the metrics."""
+        self._latencies = {metric: LatencyWindow() for metric in LATENCY_METRICS}
+        self.prompt_tokens: int | None = None
+        self.completion_tokens: int | None = None
+        self.cached_tokens: int | None = None
+        self.total_tokens = 0
+        # Cumuls pour le taux de jetons servis par le cache du fournisseur
+        self.total_prompt_tokens = 0
+        self.total_cached_tokens = 0
+        self.errors: Counter[str] = Counter()
+
+    @callback
+    def async_record_latency(self, metric: str, seconds: float) -> None:
+        """Record the duration of a request stage."""
+        self._latencies[metric].add(seconds)
+
+    @callback
+    def async_record_usage(self, usage: Mapping[str, Any] | None) -> None:
+        """Record the token usage reported by the API."""
+        if not usage:
+            return
+        self.prompt_tokens = usage.get("prompt_tokens")
+        self.completion_tokens = usage.get("completion_tokens")
+        self.total_tokens += usage.get("total_tokens") or (
+            (self.prompt_tokens or 0) + (self.completion_tokens or 0)
+        )
+        # Format OpenAI (prompt_tokens_details), sinon format Anthropic
+        details = usage.get("prompt_tokens_details") or {}
+        self.cached_tokens = details.get("cached_tokens")
+        if self.cached_tokens is None:
+            self.cached_tokens = usage.get("cache_read_input_tokens")
+        self.total_prompt_tokens += self.prompt_tokens or 0
+        self.total_cached_tokens += self.cached_tokens or 0
+
+    @callback
+    def async_record_error(self, err: Exception) -> None:
+        """Count a failed request by error class."""
+        # Les erreurs de l'API sont classées par statut HTTP ou type d'échec
+        if isinstance(err, UpstreamError):
+            self.errors[err.reason] += 1
+        else:
+            self.errors[type(err).__name__] += 1
+
+    def latency(self, metric: str, percent: float) -> float | None:
+        """Return a latency percentile of a request stage, in seconds."""
+        return self._latencies[metric].percentile(percent)
+
+    @property
+    def cache_hit_ratio(self) -> float | None:
+        """Return the share of prompt tokens served from the provider cache."""
+        if not self.total_prompt_tokens:
+            return None
+        return self.total_cached_tokens / self.total_prompt_tokens
+
+    @property
+    def error_count(self) -> int:
+        """Return the number of failed requests."""
+        return sum(self.errors.values())
+
+
+class RoutingStats:
+    """Counters of the local and cloud routing decisions.
+
+    The latency saved by a local answer is estimated from the moving
+    average of the cloud round trips observed so far.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the counters."""
+        self.local = 0
+        self.cloud = 0
+        self.saved = 0.0
+        self._local_latency: float | None = None
+        self._cloud_latency: float | None = None
+
+    @staticmethod
+    def _smooth(average: float | None, value: float) -> float:
+        """Update a moving average with a new measurement."""
+        if average is None:
+            return value
+        return average + LATENCY_SMOOTHING * (value - average)
+
+    @callback
+    def async_record_local(self, elapsed: float) -> None:
+        """Record a request answered locally."""
+        self.local += 1
+        self._local_latency = self._smooth(self._local_latency, elapsed)
+        if self._cloud_latency is not None:
+            self.saved += max(self._cloud_latency - elapsed, 0.0)
+
+    @callback
+    def async_record_cloud(self, elapsed: float) -> None:
+        """Record a request escalated to the model."""
+        self.cloud += 1
+        self._cloud_latency = self._smooth(self._cloud_latency, elapsed)
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        """Return the routing counters."""
+        total = self.local + self.cloud
+        return {
+            "routing_local": self.local,
+            "routing_cloud": self.cloud,
+            "routing_local_ratio": round(self.local / total, 3) if total else None,
+            "routing_local_latency_ms": (
+                round(self._local_latency * 1000)
+                if self._local_latency is not None
+                else None
+            ),
+            "routing_cloud_latency_ms": (
+                round(self._cloud_latency * 1000)
+                if self._cloud_latency is not None
+                else None
+            ),
+            "routing_latency_saved_s": round(self.saved, 1),
+        }
@@ -0,0 +1,225 @@
+"""System prompt rendering for Mammouth AI."""
+
+from __future__ import annotations
+
+import logging
+import math
+import re
+from collections import OrderedDict
+from collections.abc import Callable, Hashable, Iterable, Mapping
+from typing import Any
+
+from homeassistant.components.sensor import ATTR_STATE_CLASS
+from homeassistant.const import ATTR_UNIT_OF_MEASUREMENT
+from homeassistant.core import HomeAssistant, State, callback
+from homeassistant.helpers import template
+
+_LOGGER = logging.getLogger(__name__)
+
+PROMPT_CACHE_SIZE = 16
+
+# Message des états actuels, placé après la partie stable du prompt
+CONTEXT_KEY = "_context"
+CONTEXT_HEADER = "États actuels :"
+CONTEXT_USER = "Utilisateur actuel : "
+# Valeur de {{ user_name }} dans le prompt stable, commune à tous les utilisateurs
+STABLE_USER_NAME = "indiqué avec les états actuels"
+DELTA_HEADER = "États modifiés ou ajoutés depuis le début de la conversation :"
+
+# Tableau compact des entités : une ligne par pièce, domaine et unité
+TABLE_HEADER = "[pièce] puis domaine(unité): nom=état; …"
+TABLE_NO_AREA = "Autres"
+# Chiffres significatifs conservés pour les états numériques
+STATE_SIGNIFICANT_DIGITS = 3
+INTEGER_STATE = re.compile(r"[+-]?\d+")
+
+
+def prompt_fingerprint(variables: Mapping[str, Any]) -> Hashable:
+    """Return a hashable fingerprint of the template variables."""
+    return _freeze(variables)
+
+
+def is_context(message: Mapping[str, Any]) -> bool:
+    """Return True if the message carries the volatile entity states."""
+    return bool(message.get(CONTEXT_KEY))
+
+
+def entity_state_line(name: str, state: str, unit: str) -> str:
+    """Return the "- name : state" line of an entity."""
+    return f"- {name} : {state}{unit}"
+
+
+def entity_state_lines(
+    entities_by_domain: Mapping[str, list[dict[str, Any]]],
+) -> dict[str, str]:
+    """Return the state line of each prepared entity, by entity_id."""
+    return {
+        entity["entity_id"]: entity_state_line(
+            entity["name"], entity["state"], entity["unit"]
+        )
+        for entities in entities_by_domain.values()
+        for entity in entities
+    }
+
+
+def format_entity_states(
+    entities_by_domain: Mapping[str, list[dict[str, Any]]],
+) -> str:
+    """Return one "- name : state" line per prepared entity."""
+    return "\n".join(entity_state_lines(entities_by_domain).values())
+
+
+def build_context_message(
+    states_text: str, header: str = CONTEXT_HEADER, user_name: str | None = None
+) -> dict[str, Any]:
+    """Return the system message listing the current entity states.
+
+    With ``user_name``, the message also names the current user, which then
+    stays out of the stable prompt.
+    """
+    content = f"{header}\n{states_text}"
+    if user_name is not None:
+        content = f"{CONTEXT_USER}{user_name}\n{content}"
+    return {"role": "system", "content": content, CONTEXT_KEY: True}
+
+
+def compact_state(state: State) -> str:
+    """Round measurements to three significant digits, without trailing zeros.
+
+    Only states with a unit or a state class are rounded, and integers are
+    kept as written: versions, codes and counters must not be altered. The
+    integer part is always kept whole, so large readings are not written in
+    exponent notation.
+    """
+    text = state.state
+    if (
+        not state.attributes.get(ATTR_UNIT_OF_MEASUREMENT)
+        and not state.attributes.get(ATTR_STATE_CLASS)
+    ) or INTEGER_STATE.fullmatch(text):
+        return text
+    try:
+        value = float(text)
+    except ValueError:
+        return text
+    if not math.isfinite(value):
+        return text
+    if value == 0:
+        return "0"
+    # 21.549 -> 21.5, 0.0437 -> 0.0437, 1234.5 -> 1234
+    decimals = max(STATE_SIGNIFICANT_DIGITS - 1 - math.floor(math.log10(abs(value))), 0)
+    text = f"{value:.{decimals}f}"
+    if "." in text:
+        text = text.rstrip("0").rstrip(".")
+    return text
+
+
+def format_entities_table(
+    states: Iterable[State], area_name: Callable[[str], str | None]
+) -> str:
+    """Serialize states as compact rows grouped by area, domain and unit.
+
+    Each row reads ``domain(unit): name=state; name=state`` under an
+    ``[area]`` line, so the unit is written once per row instead of once
+    per entity. Rows keep the order in which their first entity appears.
+    """
+    rows: dict[str | None, dict[tuple[str, str], list[str]]] = {}
+    for state in states:
+        unit = state.attributes.get(ATTR_UNIT_OF_MEASUREMENT) or ""
+        rows.setdefault(area_name(state.entity_id), {}).setdefault(
+            (state.domain, unit), []
+        ).append(f"{state.name}={compact_state(state)}")
+
+    lines = [TABLE_HEADER]
+    for area, area_rows in rows.items():
+        lines.append(f"[{area or TABLE_NO_AREA}]")
+        lines.extend(
+            (
+                f"{domain}({unit}): {'; '.join(cells)}"
+                if unit
+                else f"{domain}: {'; '.join(cells)}"
+            )
+            for (domain, unit), cells in area_rows.items()
+        )
+    return "\n".join(lines)
+
+
+def _freeze(value: Any) -> Hashable:
+    """Convert nested dicts and lists into hashable tuples."""
+    if isinstance(value, Mapping):
+        return tuple((key, _freeze(item)) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    if isinstance(value, (set, frozenset)):
+        return frozenset(_freeze(item) for item in value)
+    return value
+
+
+class PromptRenderer:
+    """Render the system prompt from a template compiled once per entry.
+
+    Rendered prompts are cached by a fingerprint of their inputs. A result is
+    only cached when the template did not read the state machine or the
+    clock by itself, since such output cannot be derived from the variables.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        source: str,
+        max_entries: int = PROMPT_CACHE_SIZE,
+    ) -> None:
+        """Initialize the renderer."""
+        self._template = template.Template(source, hass)
+        self._max_entries = max_entries
+        self._cache: OrderedDict[Hashable, str] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def stats(self) -> dict[str, int]:
+        """Return the cache counters."""
+        return {
+            "prompt_cache_hits": self.hits,
+            "prompt_cache_misses": self.misses,
+            "prompt_cache_size": len(self._cache),
+        }
+
+    def references(self, name: str) -> bool:
+        """Return True if the template source mentions the variable ``name``."""
+        return re.search(rf"\b{re.escape(name)}\b", self._template.template) is not None
+
+    @callback
+    def async_render(self, variables: Mapping[str, Any]) -> str:
+        """Render the prompt, reusing a cached result for identical inputs."""
+        fingerprint = prompt_fingerprint(variables)
+
+        if (cached := self._cache.get(fingerprint)) is not None:
+            self._cache.move_to_end(fingerprint)
+            self.hits += 1
+            return cached
+
+        self.misses += 1
+        info = self._template.async_render_to_info(dict(variables), parse_result=False)
+        rendered: str = info.result()
+
+        if (
+            info.entities
+            or info.domains
+            or info.domains_lifecycle
+            or info.all_states
+            or info.all_states_lifecycle
+            or info.has_time
+        ):
+            # Le template lit directement l'état de HA : rien à mettre en cache
+            _LOGGER.debug("Prompt template depends on live state, not cached")
+            return rendered
+
+        self._cache[fingerprint] = rendered
+        if len(self._cache) > self._max_entries:
+            self._cache.popitem(last=False)
+        return rendered
+
+    @callback
+    def async_clear(self) -> None:
+        """Drop every cached rendering."""
+        self._cache.clear()
@@ -0,0 +1,107 @@
+"""Relevance ranking of entities for Mammouth AI."""
+
+from __future__ import annotations
+
+import heapq
+import math
+import re
+import unicodedata
+from collections.abc import Iterable, Sequence
+
+from homeassistant.core import State, callback
+
+# Poids des champs : un mot du nom compte plus qu'un morceau d'entity_id
+WEIGHT_NAME = 3.0
+WEIGHT_ALIAS = 3.0
+WEIGHT_AREA = 2.0
+WEIGHT_ENTITY_ID = 1.0
+
+_TOKEN_RE = re.compile(r"[^\W_]+")
+
+
+def normalize_tokens(text: str) -> set[str]:
+    """Split a text into lowercase tokens without accents or plural marks."""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(char for char in decomposed if not unicodedata.combining(char))
+    tokens = set()
+    for token in _TOKEN_RE.findall(text):
+        # Pluriels simples (lumières, volets, journaux)
+        if len(token) > 3 and token[-1] in "sx":
+            token = token[:-1]
+        tokens.add(token)
+    return tokens
+
+
+class RelevanceIndex:
+    """Inverted index of entity tokens, scored against a query.
+
+    Each entity is indexed from weighted texts (friendly name, aliases, area
+    name, entity_id). A query scores every entity sharing one of its tokens
+    with the field weight times the inverse document frequency of the token,
+    so that words found in many names ("capteur", "sensor") count little.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty index."""
+        # jeton -> entity_id -> poids
+        self._postings: dict[str, dict[str, float]] = {}
+        # entity_id -> jeton -> poids
+        self._tokens_of: dict[str, dict[str, float]] = {}
+
+    def __len__(self) -> int:
+        """Return the number of indexed entities."""
+        return len(self._tokens_of)
+
+    @callback
+    def async_set(self, entity_id: str, fields: Iterable[tuple[str, float]]) -> None:
+        """Index an entity from (text, weight) pairs, replacing older tokens."""
+        tokens: dict[str, float] = {}
+        for text, weight in fields:
+            for token in normalize_tokens(text):
+                if weight > tokens.get(token, 0.0):
+                    tokens[token] = weight
+        if tokens == self._tokens_of.get(entity_id):
+            return
+        self.async_remove(entity_id)
+        self._tokens_of[entity_id] = tokens
+        for token, weight in tokens.items():
+            self._postings.setdefault(token, {})[entity_id] = weight
+
+    @callback
+    def async_remove(self, entity_id: str) -> None:
+        """Remove an entity from the index."""
+        for token in self._tokens_of.pop(entity_id, ()):
+            postings = self._postings[token]
+            del postings[entity_id]
+            if not postings:
+                del self._postings[token]
+
+    @callback
+    def async_scores(self, query: str) -> dict[str, float]:
+        """Return the relevance score of the entities matching a query."""
+        scores: dict[str, float] = {}
+        total = len(self._tokens_of)
+        for token in normalize_tokens(query):
+            if not (postings := self._postings.get(token)):
+                continue
+            idf = math.log(1 + total / len(postings))
+            for entity_id, weight in postings.items():
+                scores[entity_id] = scores.get(entity_id, 0.0) + weight * idf
+        return scores
+
+    @callback
+    def async_top_k(self, states: Sequence[State], query: str, k: int) -> list[State]:
+        """Return the k states most relevant to a query, best first.
+
+        Ties, including states unrelated to the query, keep their order.
+        """
+        if len(states) <= k:
+            return list(states)
+        if not (scores := self.async_scores(query)):
+            return list(states[:k])
+        best = heapq.nsmallest(
+            k,
+            range(len(states)),
+            key=lambda i: (-scores.get(states[i].entity_id, 0.0), i),
+        )
+        return [states[i] for i in best]
@@ -0,0 +1,142 @@
+"""Retry policy for Mammouth AI upstream calls."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import time
+from collections import Counter
+from collections.abc import Awaitable, Callable
+from email.utils import parsedate_to_datetime
+from typing import Any, TypeVar
+
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.util import dt as dt_util
+
+_LOGGER = logging.getLogger(__name__)
+
+_T = TypeVar("_T")
+
+# Réponses transitoires : la requête n'a pas été traitée ou peut être rejouée
+# sans effet de bord côté Home Assistant
+RETRYABLE_STATUSES = frozenset({408, 425, 429, 502, 503, 504})
+
+
+class UpstreamError(HomeAssistantError):
+    """Error returned by the Mammouth AI API."""
+
+    def __init__(
+        self,
+        message: str,
+        *,
+        reason: str,
+        retryable: bool,
+        retry_after: float | None = None,
+    ) -> None:
+        """Initialize the error."""
+        super().__init__(message)
+        self.reason = reason
+        self.retryable = retryable
+        self.retry_after = retry_after
+
+    @property
+    def outage(self) -> bool:
+        """Return True if the error suggests the service is unavailable."""
+        return self.retryable or self.reason == "timeout" or self.reason[0] == "5"
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Return the delay in seconds requested by a Retry-After header."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        return None
+    return max((retry_at - dt_util.utcnow()).total_seconds(), 0.0)
+
+
+def status_error(status: int, text: str, retry_after: str | None) -> UpstreamError:
+    """Build the error for a non successful HTTP status."""
+    return UpstreamError(
+        f"HTTP {status}: {text}",
+        reason=str(status),
+        retryable=status in RETRYABLE_STATUSES,
+        retry_after=parse_retry_after(retry_after),
+    )
+
+
+class RetryPolicy:
+    """Capped exponential backoff with full jitter, bounded by a deadline.
+
+    Only errors flagged as retryable are retried. A ``Retry-After`` delay
+    sent by the server takes precedence over the computed backoff, and no
+    retry is attempted when its delay would end past the deadline.
+    """
+
+    def __init__(self, max_retries: int, base_delay: float, max_delay: float) -> None:
+        """Initialize the policy."""
+        self._max_retries = max_retries
+        self._base_delay = base_delay
+        self._max_delay = max_delay
+        self.retries: Counter[str] = Counter()
+        self.exhausted = 0
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        """Return the retry counters, per status or failure class."""
+        return {
+            **{f"retries_{reason}": count for reason, count in self.retries.items()},
+            "retries_exhausted": self.exhausted,
+        }
+
+    def backoff(self, attempt: int) -> float:
+        """Return the jittered delay before the given retry attempt."""
+        return random.uniform(0, min(self._max_delay, self._base_delay * 2**attempt))
+
+    async def async_wait(
+        self, err: UpstreamError, attempt: int, deadline: float
+    ) -> None:
+        """Wait before retrying a failed attempt, or re-raise its error."""
+        if not err.retryable or attempt >= self._max_retries:
+            if err.retryable and self._max_retries:
+                self.exhausted += 1
+            raise err
+
+        delay = (
+            err.retry_after if err.retry_after is not None else self.backoff(attempt)
+        )
+        if time.monotonic() + delay >= deadline:
+            self.exhausted += 1
+            raise err
+
+        self.retries[err.reason] += 1
+        _LOGGER.debug(
+            "Upstream call failed (%s), retry %d in %.2f s",
+            err.reason,
+            attempt + 1,
+            delay,
+        )
+        await asyncio.sleep(delay)
+
+    async def async_call(
+        self, attempt_factory: Callable[[float], Awaitable[_T]], timeout: float
+    ) -> _T:
+        """Run an attempt until it succeeds, fails for good or time runs out.
+
+        Each attempt receives the time left before the overall deadline.
+        """
+        deadline = time.monotonic() + timeout
+        attempt = 0
+        while True:
+            try:
+                return await attempt_factory(deadline - time.monotonic())
+            except UpstreamError as err:
+                await self.async_wait(err, attempt, deadline)
+            attempt += 1
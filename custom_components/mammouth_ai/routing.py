@@ -0,0 +1,37 @@
+"""Local intent routing for Mammouth AI."""
+
+from __future__ import annotations
+
+import logging
+
+from homeassistant.components import conversation
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import intent
+
+_LOGGER = logging.getLogger(__name__)
+
+
+async def async_handle_locally(
+    hass: HomeAssistant, user_input: conversation.ConversationInput
+) -> intent.IntentResponse | None:
+    """Answer with the local sentence triggers and intents, if one matches.
+
+    Returns ``None`` when nothing matched or the matched intent failed, in
+    which case the request should be escalated to the model.
+    """
+    trigger_response = await conversation.async_handle_sentence_triggers(
+        hass, user_input
+    )
+    if trigger_response is not None:
+        response = intent.IntentResponse(language=user_input.language)
+        response.async_set_speech(trigger_response)
+        return response
+
+    response = await conversation.async_handle_intents(hass, user_input)
+    if response is None:
+        return None
+    if response.response_type == intent.IntentResponseType.ERROR:
+        # Intention reconnue mais non exécutable (cible inconnue, etc.)
+        _LOGGER.debug("Local intent failed (%s), escalating", response.error_code)
+        return None
+    return response
@@ -0,0 +1,166 @@
+"""Diagnostic sensors for Mammouth AI."""
+
+from __future__ import annotations
+
+import logging
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+from homeassistant.components.sensor import (
+    SensorDeviceClass,
+    SensorEntity,
+    SensorEntityDescription,
+    SensorStateClass,
+)
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import PERCENTAGE, EntityCategory, UnitOfTime
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.device_registry import DeviceEntryType, DeviceInfo
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+
+from .const import DOMAIN, MANUFACTURER
+from .coordinator import MammouthDataUpdateCoordinator
+from .metrics import LATENCY_METRICS, PERCENTILES, RequestMetrics
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True, kw_only=True)
+class MammouthSensorEntityDescription(SensorEntityDescription):
+    """Describes a Mammouth AI diagnostic sensor."""
+
+    value_fn: Callable[[RequestMetrics], float | int | None]
+    attributes_fn: Callable[[RequestMetrics], dict[str, Any]] | None = None
+    percentile: int | None = None
+
+
+def _latency_description(metric: str, percent: int) -> MammouthSensorEntityDescription:
+    """Describe the sensor of a latency percentile, in milliseconds."""
+
+    def _value(metrics: RequestMetrics) -> float | None:
+        latency = metrics.latency(metric, percent)
+        return None if latency is None else round(latency * 1000, 1)
+
+    return MammouthSensorEntityDescription(
+        key=f"{metric}_latency_p{percent}",
+        translation_key=f"{metric}_latency",
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=0,
+        # Seul le p95 est activé par défaut, p50 et p99 à la demande
+        entity_registry_enabled_default=percent == 95,
+        value_fn=_value,
+        percentile=percent,
+    )
+
+
+SENSORS: tuple[MammouthSensorEntityDescription, ...] = (
+    *(
+        _latency_description(metric, percent)
+        for metric in LATENCY_METRICS
+        for percent in PERCENTILES
+    ),
+    MammouthSensorEntityDescription(
+        key="prompt_tokens",
+        translation_key="prompt_tokens",
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda metrics: metrics.prompt_tokens,
+    ),
+    MammouthSensorEntityDescription(
+        key="completion_tokens",
+        translation_key="completion_tokens",
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda metrics: metrics.completion_tokens,
+    ),
+    MammouthSensorEntityDescription(
+        key="cached_tokens",
+        translation_key="cached_tokens",
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda metrics: metrics.cached_tokens,
+    ),
+    MammouthSensorEntityDescription(
+        key="prompt_cache_hit_ratio",
+        translation_key="prompt_cache_hit_ratio",
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement=PERCENTAGE,
+        suggested_display_precision=0,
+        value_fn=lambda metrics: (
+            None if metrics.cache_hit_ratio is None else metrics.cache_hit_ratio * 100
+        ),
+    ),
+    MammouthSensorEntityDescription(
+        key="total_tokens",
+        translation_key="total_tokens",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda metrics: metrics.total_tokens,
+    ),
+    MammouthSensorEntityDescription(
+        key="errors",
+        translation_key="errors",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda metrics: metrics.error_count,
+        attributes_fn=lambda metrics: dict(metrics.errors),
+    ),
+)
+
+
+class MammouthSensor(CoordinatorEntity[MammouthDataUpdateCoordinator], SensorEntity):
+    """Diagnostic sensor reading the request metrics of the coordinator."""
+
+    _attr_has_entity_name = True
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    entity_description: MammouthSensorEntityDescription
+
+    def __init__(
+        self,
+        coordinator: MammouthDataUpdateCoordinator,
+        config_entry: ConfigEntry,
+        description: MammouthSensorEntityDescription,
+    ) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator)
+        self.entity_description = description
+        self._attr_unique_id = f"{config_entry.entry_id}_{description.key}"
+        self._attr_device_info = DeviceInfo(
+            identifiers={(DOMAIN, config_entry.entry_id)},
+            name=f"Mammouth AI ({config_entry.title})",
+            manufacturer=MANUFACTURER,
+            entry_type=DeviceEntryType.SERVICE,
+        )
+        if description.percentile is not None:
+            self._attr_translation_placeholders = {
+                "percentile": f"p{description.percentile}"
+            }
+
+    @property
+    def available(self) -> bool:
+        """Return True: metrics stay meaningful while the API is down."""
+        return True
+
+    @property
+    def native_value(self) -> float | int | None:
+        """Return the metric value."""
+        return self.entity_description.value_fn(self.coordinator.metrics)
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        """Return the metric details, if any."""
+        if self.entity_description.attributes_fn is None:
+            return None
+        return self.entity_description.attributes_fn(self.coordinator.metrics)
+
+
+async def async_setup_entry(
+    hass: HomeAssistant,
+    config_entry: ConfigEntry,
+    async_add_entities,
+) -> None:
+    """Set up Mammouth AI diagnostic sensors."""
+    coordinator = hass.data[DOMAIN][config_entry.entry_id]
+    async_add_entities(
+        MammouthSensor(coordinator, config_entry, description)
+        for description in SENSORS
+    )
+    _LOGGER.debug("Mammouth AI diagnostic sensors added")
@@ -0,0 +1,37 @@
+"""HTTP session for Mammouth AI."""
+
+from __future__ import annotations
+
+import aiohttp
+from aiohttp.hdrs import USER_AGENT
+from homeassistant.core import callback
+from homeassistant.helpers.aiohttp_client import SERVER_SOFTWARE
+from homeassistant.helpers.json import json_dumps
+from homeassistant.util import ssl as ssl_util
+
+from .const import DNS_CACHE_TTL, HTTP_KEEPALIVE_TIMEOUT
+
+
+@callback
+def async_create_session(pool_size: int) -> aiohttp.ClientSession:
+    """Create the dedicated HTTP session of a config entry.
+
+    Unlike the session shared by every integration, its connector keeps
+    idle connections to the API open longer and caches DNS lookups, so
+    that requests after a quiet period skip the TCP and TLS handshakes.
+    Home Assistant's helper always reuses its shared connector, so the
+    owner must close this session on unload and when Home Assistant closes.
+    """
+    connector = aiohttp.TCPConnector(
+        limit=pool_size,
+        limit_per_host=pool_size,
+        keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT,
+        use_dns_cache=True,
+        ttl_dns_cache=DNS_CACHE_TTL,
+        ssl=ssl_util.get_default_context(),
+    )
+    return aiohttp.ClientSession(
+        connector=connector,
+        headers={USER_AGENT: SERVER_SOFTWARE},
+        json_serialize=json_dumps,
+    )
@@ -0,0 +1,49 @@
+"""Token estimation for Mammouth AI."""
+
+from __future__ import annotations
+
+import re
+from typing import Any, Dict, Iterable
+
+# Découpage proche du pré-tokeniseur des modèles BPE : mots, nombres,
+# ponctuation isolée
+_PIECE_RE = re.compile(r"[^\W\d_]+|\d+|[^\w\s]")
+
+# Un morceau BPE couvre en moyenne ~4 caractères d'un mot courant,
+# et les nombres sont découpés par groupes de 3 chiffres
+CHARS_PER_TOKEN = 4
+DIGITS_PER_TOKEN = 3
+
+# Jetons de structure ajoutés par message (rôle, séparateurs)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+TOKENS_KEY = "_tokens"
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the number of tokens of a text."""
+    tokens = 0
+    for piece in _PIECE_RE.findall(text):
+        if piece.isdigit():
+            tokens += -(-len(piece) // DIGITS_PER_TOKEN)
+        elif piece.isalpha():
+            tokens += -(-len(piece) // CHARS_PER_TOKEN)
+        else:
+            tokens += 1
+    return tokens
+
+
+def message_tokens(message: Dict[str, Any]) -> int:
+    """Return the token estimate of a message, cached on the message."""
+    if (cached := message.get(TOKENS_KEY)) is not None:
+        return cached
+    tokens = MESSAGE_OVERHEAD_TOKENS + estimate_tokens(
+        str(message.get("content") or "")
+    )
+    message[TOKENS_KEY] = tokens
+    return tokens
+
+
+def messages_tokens(messages: Iterable[Dict[str, Any]]) -> int:
+    """Return the token estimate of a list of messages."""
+    return sum(message_tokens(message) for message in messages)
@@ -0,0 +1,54 @@
+"""Tests pour le coupe-circuit."""
+import pytest
+
+from custom_components.mammouth_ai.breaker import CircuitBreaker, CircuitOpenError
+
+
+def _half_open():
+    """Return a breaker that becomes half-open as soon as it trips."""
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=0)
+    breaker.async_trip()
+    assert breaker.state == "half_open"
+    return breaker
+
+
+def test_half_open_admits_a_single_trial():
+    """Test concurrent requests are rejected while the trial is in flight."""
+    breaker = _half_open()
+
+    breaker.async_check("open")
+    with pytest.raises(CircuitOpenError):
+        breaker.async_check("open")
+    assert breaker.rejected == 1
+
+    breaker.async_record_success()
+    assert breaker.is_closed
+    breaker.async_check("open")
+    breaker.async_check("open")
+
+
+def test_failed_trial_reopens_circuit():
+    """Test a failed trial opens the circuit again."""
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60)
+    breaker.async_trip()
+    breaker._opened_at -= 60
+
+    breaker.async_check("open")
+    breaker.async_record_failure()
+
+    assert breaker.state == "open"
+    assert breaker.trips == 2
+    with pytest.raises(CircuitOpenError):
+        breaker.async_check("open")
+
+
+def test_released_trial_lets_next_request_through():
+    """Test a trial ending without a verdict frees its place."""
+    breaker = _half_open()
+
+    breaker.async_check("open")
+    breaker.async_release_trial()
+
+    breaker.async_check("open")
+    assert breaker.state == "half_open"
+    assert breaker.rejected == 0
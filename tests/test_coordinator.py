@@ -1,18 +1,23 @@
 """Tests pour le coordinator."""
+import asyncio
+import json
+import time
+from datetime import timedelta
 import pytest
-from unittest.mock import AsyncMock, patch
-from homeassistant.core import HomeAssistant
+from unittest.mock import AsyncMock, MagicMock, patch
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.update_coordinator import UpdateFailed
+from custom_components.mammouth_ai.breaker import CircuitOpenError
 from custom_components.mammouth_ai.coordinator import MammouthDataUpdateCoordinator
+from custom_components.mammouth_ai.encoding import encode_payload
+from custom_components.mammouth_ai.retry import UpstreamError
 
-@pytest.fixture
-def hass():
-    """Home Assistant fixture."""
-    return AsyncMock(spec=HomeAssistant)
 
 @pytest.fixture
 def mock_entry():
     """Config entry fixture."""
-    entry = AsyncMock()
+    entry = MagicMock()
+    entry.entry_id = "test_entry"
     entry.data = {
         "api_key": "test_key",
         "base_url": "https://test.api",
@@ -21,21 +26,739 @@ def mock_entry():
     entry.options = {}
     return entry
 
+
 @pytest.mark.asyncio
 async def test_chat_completion(hass, mock_entry):
     """Test chat completion."""
     coordinator = MammouthDataUpdateCoordinator(hass, mock_entry)
-    
+
     with patch.object(coordinator._session, 'post') as mock_post:
         mock_response = AsyncMock()
         mock_response.status = 200
-        mock_response.json.return_value = {
+        mock_response.read.return_value = json.dumps({
             "choices": [{"message": {"content": "Test response"}}]
-        }
+        }).encode()
+        mock_post.return_value.__aenter__.return_value = mock_response
+
+        result = await coordinator.async_chat_completion([
+            {"role": "user", "content": "Test"}
+        ])
+
+        assert result == "Test response"
+
+
+@pytest.mark.asyncio
+async def test_chat_completion_encodes_payload_once(hass, mock_entry):
+    """Test the request key and the body come from a single encoding."""
+    coordinator = MammouthDataUpdateCoordinator(hass, mock_entry)
+    bodies = []
+
+    def _encode(payload):
+        bodies.append(encode_payload(payload))
+        return bodies[-1]
+
+    with patch.object(coordinator._session, "post") as mock_post, patch(
+        "custom_components.mammouth_ai.coordinator.encode_payload",
+        side_effect=_encode,
+    ):
+        mock_response = AsyncMock()
+        mock_response.status = 200
+        mock_response.read.return_value = json.dumps(
+            {"choices": [{"message": {"content": "Test response"}}]}
+        ).encode()
+        mock_post.return_value.__aenter__.return_value = mock_response
+
+        await coordinator.async_chat_completion([{"role": "user", "content": "Test"}])
+
+    assert len(bodies) == 1
+    assert mock_post.call_args.kwargs["data"] is bodies[0]
+
+
+@pytest.mark.asyncio
+async def test_chat_completion_stream(hass, mock_entry):
+    """Test streamed chat completion."""
+    coordinator = MammouthDataUpdateCoordinator(hass, mock_entry)
+
+    async def _lines():
+        for line in (
+            b'data: {"choices": [{"delta": {"role": "assistant"}}]}\n',
+            b"\n",
+            b'data: {"choices": [{"delta": {"content": "Bon"}}]}\n',
+            b'data: {"choices": [{"delta": {"content": "jour"}}]}\n',
+            b"data: [DONE]\n",
+        ):
+            yield line
+
+    with patch.object(coordinator._session, 'post') as mock_post:
+        mock_response = AsyncMock()
+        mock_response.status = 200
+        mock_response.content = _lines()
+        mock_post.return_value.__aenter__.return_value = mock_response
+
+        deltas = [
+            delta
+            async for delta in coordinator.async_chat_completion_stream([
+                {"role": "user", "content": "Test"}
+            ])
+        ]
+
+        assert deltas == ["Bon", "jour"]
+        payload = json.loads(mock_post.call_args.kwargs["data"])
+        assert payload["stream"] is True
+        assert payload["stream_options"] == {"include_usage": True}
+
+
+@pytest.mark.asyncio
+async def test_truncate_to_token_budget(hass, mock_entry):
+    """Test token-budget truncation with a summary of dropped turns."""
+    mock_entry.options = {"token_budget": 40, "summarize_dropped": True}
+    coordinator = MammouthDataUpdateCoordinator(hass, mock_entry)
+
+    messages = [{"role": "system", "content": "Assistant maison"}]
+    for index in range(6):
+        messages.append({"role": "user", "content": f"question {index} " * 5})
+        messages.append({"role": "assistant", "content": f"réponse {index}"})
+
+    truncated = coordinator._truncate_conversation_history(messages)
+
+    assert truncated[0] == messages[0]
+    assert truncated[1]["_summary"] is True
+    assert "question 0" in truncated[1]["content"]
+    assert truncated[-1] == messages[-1]
+    assert sum(m["_tokens"] for m in truncated[2:]) <= 40
+    assert all(
+        "_tokens" not in msg for msg in coordinator._prepare_api_messages(truncated)
+    )
+
+
+@pytest.mark.asyncio
+async def test_background_summary(hass, mock_entry):
+    """Test condensing the oldest turns into a summary message."""
+    mock_entry.options = {"persist_memory": False, "background_summary": True}
+    coordinator = MammouthDataUpdateCoordinator(hass, mock_entry)
+
+    history = [{"role": "system", "content": "Assistant maison"}]
+    for index in range(5):
+        history.append({"role": "user", "content": f"question {index}"})
+        history.append({"role": "assistant", "content": f"réponse {index}"})
+    with patch(
+        "custom_components.mammouth_ai.memory.async_call_later"
+    ), patch.object(
+        coordinator, "_async_background_completion", return_value="Résumé court"
+    ) as mock_completion:
+        coordinator._memory.async_set("user", history)
+        await coordinator._async_summarize_conversation("user")
+
+    transcript = mock_completion.call_args.args[0][1]["content"]
+    assert "question 0" in transcript and "question 4" not in transcript
+
+    summarized = await coordinator._memory.async_get("user")
+    assert summarized[0] == history[0]
+    assert summarized[1]["_summary"] is True
+    assert summarized[1]["content"].endswith("Résumé court")
+    assert summarized[2:] == history[-4:]
+
+
+@pytest.mark.asyncio
+async def test_background_summary_after_reload(hass, mock_entry):
+    """Test the summary applies to a history reloaded during the call."""
+    mock_entry.options = {"persist_memory": False, "background_summary": True}
+    coordinator = MammouthDataUpdateCoordinator(hass, mock_entry)
+
+    history = []
+    for index in range(5):
+        history.append({"role": "user", "content": f"question {index}"})
+        history.append({"role": "assistant", "content": f"réponse {index}"})
+
+    async def _summarize(messages, **kwargs):
+        # Nouvelles copies des messages, et un tour ajouté entre-temps
+        reloaded = [dict(msg) for msg in history[1:]]
+        reloaded.append({"role": "user", "content": "question 5"})
+        coordinator._memory.async_set("user", reloaded)
+        return "Résumé court"
+
+    with patch(
+        "custom_components.mammouth_ai.memory.async_call_later"
+    ), patch.object(
+        coordinator, "_async_background_completion", side_effect=_summarize
+    ):
+        coordinator._memory.async_set("user", history)
+        await coordinator._async_summarize_conversation("user")
+
+    summarized = await coordinator._memory.async_get("user")
+    assert summarized[0]["_summary"] is True
+    assert summarized[1:] == history[-4:] + [
+        {"role": "user", "content": "question 5"}
+    ]
+
+
+@pytest.mark.asyncio
+async def test_background_summary_skips_request_stats(hass, mock_entry):
+    """Test a failed summary leaves the metrics and the breaker untouched."""
+    mock_entry.options = {"persist_memory": False, "max_retries": 0}
+    coordinator = MammouthDataUpdateCoordinator(hass, mock_entry)
+    coordinator.config_entry = MagicMock()
+    history = []
+    for index in range(5):
+        history.append({"role": "user", "content": f"question {index}"})
+        history.append({"role": "assistant", "content": f"réponse {index}"})
+
+    with patch(
+        "custom_components.mammouth_ai.memory.async_call_later"
+    ), patch.object(coordinator._session, "post") as mock_post:
+        mock_response = AsyncMock()
+        mock_response.status = 503
+        mock_response.headers = {}
+        mock_response.text.return_value = "Service Unavailable"
+        mock_post.return_value.__aenter__.return_value = mock_response
+
+        coordinator._memory.async_set("user", history)
+        for _ in range(3):
+            await coordinator._async_summarize_conversation("user")
+
+    assert mock_post.call_count == 3
+    assert await coordinator._memory.async_get("user") == history
+    assert coordinator.circuit_state == "closed"
+    assert coordinator.last_prompt_tokens == 0
+    assert coordinator.metrics.error_count == 0
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_requests_share_one_call(hass, mock_entry):
+    """Test single-flight deduplication of identical requests."""
+    coordinator = MammouthDataUpdateCoordinator(hass, mock_entry)
+    release = asyncio.Event()
+
+    async def _post(payload, body):
+        await release.wait()
+        return {"content": "Test response"}
+
+    with patch.object(
+        coordinator, "_async_post_chat_completion", side_effect=_post
+    ) as mock_post:
+        messages = [{"role": "user", "content": "Test"}]
+        calls = [
+            asyncio.ensure_future(coordinator.async_chat_completion(messages))
+            for _ in range(3)
+        ]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*calls)
+
+    assert results == ["Test response"] * 3
+    assert mock_post.call_count == 1
+    assert coordinator.stats["singleflight_hits"] == 2
+
+
+@pytest.mark.asyncio
+async def test_response_cache(hass, mock_entry):
+    """Test cached responses and their invalidation on state changes."""
+    mock_entry.options = {"response_cache": True}
+    coordinator = MammouthDataUpdateCoordinator(hass, mock_entry)
+    messages = [{"role": "user", "content": "Quelle température ?"}]
+
+    with patch.object(
+        coordinator, "_async_post_chat_completion", return_value={"content": "21 °C"}
+    ) as mock_post:
+        for _ in range(2):
+            assert (
+                await coordinator.async_chat_completion(
+                    messages, entity_ids=["sensor.salon"]
+                )
+                == "21 °C"
+            )
+        assert mock_post.call_count == 1
+
+        event = MagicMock()
+        event.data = {"entity_id": "sensor.salon"}
+        coordinator._response_cache._async_handle_state_changed(event)
+        await coordinator.async_chat_completion(messages, entity_ids=["sensor.salon"])
+        assert mock_post.call_count == 2
+
+    assert coordinator.stats["response_cache_hits"] == 1
+    assert coordinator.stats["response_cache_invalidations"] == 1
+
+
+@pytest.mark.asyncio
+async def test_chat_completion_with_tools(hass, mock_entry):
+    """Test executing tool calls until the model answers."""
+    coordinator = MammouthDataUpdateCoordinator(hass, mock_entry)
+    tools = [{"type": "function", "function": {"name": "HassTurnOn"}}]
+    tool_executor = AsyncMock(return_value={"success": True})
+
+    with patch.object(coordinator._session, 'post') as mock_post:
+        mock_response = AsyncMock()
+        mock_response.status = 200
+        mock_response.read.side_effect = [json.dumps(body).encode() for body in [
+            {
+                "choices": [{"message": {"content": None, "tool_calls": [{
+                    "id": "call_1",
+                    "type": "function",
+                    "function": {
+                        "name": "HassTurnOn",
+                        "arguments": '{"name": "Salon"}',
+                    },
+                }]}}]
+            },
+            {"choices": [{"message": {"content": "Lumière allumée"}}]},
+        ]]
+        mock_post.return_value.__aenter__.return_value = mock_response
+
+        result = await coordinator.async_chat_completion_with_tools(
+            [{"role": "user", "content": "Allume le salon"}], tools, tool_executor
+        )
+
+    assert result == "Lumière allumée"
+    tool_executor.assert_awaited_once_with("HassTurnOn", {"name": "Salon"}, "call_1")
+    sent = json.loads(mock_post.call_args.kwargs["data"])
+    assert sent["tools"] == tools
+    assert sent["messages"][-1] == {
+        "role": "tool",
+        "tool_call_id": "call_1",
+        "content": '{"success":true}',
+    }
+
+
+@pytest.mark.asyncio
+async def test_chat_completion_retries_transient_errors(hass, mock_entry):
+    """Test retrying a 503 response after the Retry-After delay."""
+    coordinator = MammouthDataUpdateCoordinator(hass, mock_entry)
+
+    unavailable = AsyncMock()
+    unavailable.status = 503
+    unavailable.headers = {"Retry-After": "2"}
+    unavailable.text.return_value = "Service Unavailable"
+    ok = AsyncMock()
+    ok.status = 200
+    ok.read.return_value = json.dumps(
+        {"choices": [{"message": {"content": "Test response"}}]}
+    ).encode()
+
+    with patch.object(coordinator._session, 'post') as mock_post, patch(
+        "custom_components.mammouth_ai.retry.asyncio.sleep"
+    ) as mock_sleep:
+        mock_post.return_value.__aenter__.side_effect = [unavailable, ok]
+
+        result = await coordinator.async_chat_completion([
+            {"role": "user", "content": "Test"}
+        ])
+
+    assert result == "Test response"
+    mock_sleep.assert_awaited_once_with(2.0)
+    assert coordinator.stats["retries_503"] == 1
+
+
+@pytest.mark.asyncio
+async def test_chat_completion_does_not_retry_client_errors(hass, mock_entry):
+    """Test that non transient errors are raised immediately."""
+    coordinator = MammouthDataUpdateCoordinator(hass, mock_entry)
+
+    with patch.object(coordinator._session, 'post') as mock_post:
+        mock_response = AsyncMock()
+        mock_response.status = 400
+        mock_response.headers = {}
+        mock_response.text.return_value = "Bad Request"
+        mock_post.return_value.__aenter__.return_value = mock_response
+
+        with pytest.raises(HomeAssistantError, match="HTTP 400"):
+            await coordinator.async_chat_completion([
+                {"role": "user", "content": "Test"}
+            ])
+
+    assert mock_post.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_circuit_breaker_fails_fast(hass, mock_entry):
+    """Test that repeated outages open the circuit and reject requests."""
+    mock_entry.options = {"max_retries": 0}
+    coordinator = MammouthDataUpdateCoordinator(hass, mock_entry)
+    coordinator.config_entry = MagicMock()
+    coordinator.async_request_refresh = MagicMock()
+    messages = [{"role": "user", "content": "Test"}]
+
+    with patch.object(coordinator._session, 'post') as mock_post:
+        mock_response = AsyncMock()
+        mock_response.status = 503
+        mock_response.headers = {}
+        mock_response.text.return_value = "Service Unavailable"
         mock_post.return_value.__aenter__.return_value = mock_response
-        
+
+        for _ in range(3):
+            with pytest.raises(HomeAssistantError, match="HTTP 503"):
+                await coordinator.async_chat_completion(messages)
+
+        with pytest.raises(CircuitOpenError):
+            await coordinator.async_chat_completion(messages)
+
+    assert mock_post.call_count == 3
+    assert coordinator.circuit_state == "open"
+    assert coordinator.update_interval == timedelta(seconds=30)
+    assert coordinator.stats["circuit_rejected"] == 1
+    coordinator.config_entry.async_create_background_task.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_health_check_closes_circuit(hass, mock_entry):
+    """Test a successful health check closes the circuit."""
+    coordinator = MammouthDataUpdateCoordinator(hass, mock_entry)
+    coordinator._breaker.async_trip()
+
+    with patch.object(
+        coordinator, "_async_health_check", side_effect=Exception("down")
+    ), pytest.raises(UpdateFailed):
+        await coordinator._async_update_data()
+    assert coordinator.circuit_state == "open"
+    assert coordinator.update_interval == timedelta(seconds=30)
+
+    with patch.object(
+        coordinator, "_async_health_check", return_value={"status": "ok"}
+    ):
+        assert await coordinator._async_update_data() == {"status": "ok"}
+    assert coordinator.circuit_state == "closed"
+    assert coordinator.update_interval == timedelta(minutes=30)
+
+
+@pytest.mark.asyncio
+async def test_chat_completion_falls_over_to_next_target(hass, mock_entry):
+    """Test falling over to a fallback model when the primary is down."""
+    mock_entry.options = {
+        "max_retries": 0,
+        "fallback_targets": "backup-model\nhttps://backup.api other-model",
+    }
+    coordinator = MammouthDataUpdateCoordinator(hass, mock_entry)
+
+    unavailable = AsyncMock()
+    unavailable.status = 502
+    unavailable.headers = {}
+    unavailable.text.return_value = "Bad Gateway"
+    ok = AsyncMock()
+    ok.status = 200
+    ok.read.return_value = json.dumps(
+        {"choices": [{"message": {"content": "Test response"}}]}
+    ).encode()
+
+    with patch.object(coordinator._session, 'post') as mock_post:
+        mock_post.return_value.__aenter__.side_effect = [unavailable, unavailable, ok]
+
         result = await coordinator.async_chat_completion([
             {"role": "user", "content": "Test"}
         ])
-        
-        assert result == "Test response"
\ No newline at end of file
+
+    assert result == "Test response"
+    assert [call.args[0] for call in mock_post.call_args_list] == [
+        "https://test.api/chat/completions",
+        "https://test.api/chat/completions",
+        "https://backup.api/chat/completions",
+    ]
+    assert [
+        json.loads(call.kwargs["data"])["model"] for call in mock_post.call_args_list
+    ] == [
+        "test-model",
+        "backup-model",
+        "other-model",
+    ]
+    assert coordinator.stats["failovers"] == 2
+    assert coordinator.circuit_state == "closed"
+
+
+@pytest.mark.asyncio
+async def test_fallback_target_uses_its_own_key(hass, mock_entry):
+    """Test a fallback target with an API key sends it instead of the entry's."""
+    mock_entry.options = {
+        "max_retries": 0,
+        "fallback_targets": "https://backup.api other-model backup_key",
+    }
+    coordinator = MammouthDataUpdateCoordinator(hass, mock_entry)
+
+    unavailable = AsyncMock()
+    unavailable.status = 503
+    unavailable.headers = {}
+    unavailable.text.return_value = "Service Unavailable"
+    ok = AsyncMock()
+    ok.status = 200
+    ok.read.return_value = json.dumps(
+        {"choices": [{"message": {"content": "Test response"}}]}
+    ).encode()
+
+    with patch.object(coordinator._session, "post") as mock_post:
+        mock_post.return_value.__aenter__.side_effect = [unavailable, ok]
+        await coordinator.async_chat_completion([{"role": "user", "content": "Test"}])
+
+    assert [
+        call.kwargs["headers"]["Authorization"] for call in mock_post.call_args_list
+    ] == ["Bearer test_key", "Bearer backup_key"]
+
+
+@pytest.mark.asyncio
+async def test_hedged_primary_failing_early_counts_as_failover(hass, mock_entry):
+    """Test a primary failing before the hedge delay is a failover."""
+    mock_entry.options = {"fallback_targets": "backup-model", "hedging": True}
+    coordinator = MammouthDataUpdateCoordinator(hass, mock_entry)
+
+    async def _post(target, payload, body, timeout):
+        if target.model == "test-model":
+            raise UpstreamError("HTTP 503", reason="503", retryable=True)
+        return {"content": "Test response"}
+
+    with patch.object(coordinator, "_async_post_to_target", side_effect=_post):
+        message = await coordinator._async_post_hedged(
+            0, {}, b"{}", 1.0, time.monotonic() + 10
+        )
+
+    assert message == {"content": "Test response"}
+    assert coordinator.stats["failovers"] == 1
+    assert coordinator.stats["hedged_requests"] == 0
+
+
+@pytest.mark.asyncio
+async def test_stream_falls_over_after_latency_budget(hass, mock_entry):
+    """Test a stream without a first fragment within the budget falls over."""
+    mock_entry.options = {"fallback_targets": "backup-model", "latency_budget": 0.05}
+    coordinator = MammouthDataUpdateCoordinator(hass, mock_entry)
+    hang = asyncio.Event()
+
+    async def _lines():
+        for line in (
+            b'data: {"choices": [{"delta": {"content": "Bonjour"}}]}\n',
+            b"data: [DONE]\n",
+        ):
+            yield line
+
+    ok = AsyncMock()
+    ok.status = 200
+    ok.content = _lines()
+
+    async def _open(*args):
+        if mock_post.call_count == 1:
+            await hang.wait()
+        return ok
+
+    with patch.object(coordinator._session, "post") as mock_post:
+        mock_post.return_value.__aenter__.side_effect = _open
+        deltas = [
+            delta
+            async for delta in coordinator.async_chat_completion_stream(
+                [{"role": "user", "content": "Test"}]
+            )
+        ]
+
+    assert deltas == ["Bonjour"]
+    assert [
+        json.loads(call.kwargs["data"])["model"] for call in mock_post.call_args_list
+    ] == ["test-model", "backup-model"]
+    assert coordinator.stats["failovers"] == 1
+
+
+@pytest.mark.asyncio
+async def test_request_metrics(hass, mock_entry):
+    """Test recording latency, token usage and errors."""
+    mock_entry.options = {"max_retries": 0}
+    coordinator = MammouthDataUpdateCoordinator(hass, mock_entry)
+    messages = [{"role": "user", "content": "Test"}]
+
+    ok = AsyncMock()
+    ok.status = 200
+    ok.read.return_value = json.dumps({
+        "choices": [{"message": {"content": "Test response"}}],
+        "usage": {"prompt_tokens": 12, "completion_tokens": 3, "total_tokens": 15},
+    }).encode()
+    unavailable = AsyncMock()
+    unavailable.status = 503
+    unavailable.headers = {}
+    unavailable.text.return_value = "Service Unavailable"
+
+    with patch.object(coordinator._session, 'post') as mock_post:
+        mock_post.return_value.__aenter__.side_effect = [ok, unavailable]
+        await coordinator.async_chat_completion(messages)
+        with pytest.raises(HomeAssistantError):
+            await coordinator.async_chat_completion(messages, temperature=0)
+
+    metrics = coordinator.metrics
+    assert metrics.latency("upstream", 95) is not None
+    assert metrics.latency("end_to_end", 95) is None
+    assert (metrics.prompt_tokens, metrics.completion_tokens) == (12, 3)
+    assert metrics.total_tokens == 15
+    assert metrics.errors == {"503": 1}
+
+    metrics.async_record_usage(
+        {"prompt_tokens": 20, "prompt_tokens_details": {"cached_tokens": 16}}
+    )
+    assert metrics.cached_tokens == 16
+    assert metrics.cache_hit_ratio == 0.5
+
+
+@pytest.mark.asyncio
+async def test_context_message_is_not_remembered(hass, mock_entry):
+    """Test the current states are sent before the question but not stored."""
+    mock_entry.options = {"persist_memory": False}
+    coordinator = MammouthDataUpdateCoordinator(hass, mock_entry)
+    system = {"role": "system", "content": "Catalogue"}
+    context = {"role": "system", "content": "États actuels :", "_context": True}
+
+    with patch(
+        "custom_components.mammouth_ai.memory.async_call_later"
+    ), patch.object(
+        coordinator, "async_chat_completion", return_value="Réponse"
+    ) as mock_completion:
+        for question in ("question 1", "question 2"):
+            await coordinator.async_chat_completion_with_memory(
+                [system, context, {"role": "user", "content": question}],
+                user_id="user",
+            )
+
+    sent = mock_completion.call_args.args[0]
+    assert sent[0] == system
+    assert sent[-2:] == [context, {"role": "user", "content": "question 2"}]
+    assert [msg["content"] for msg in sent[1:3]] == ["question 1", "Réponse"]
+
+    history = await coordinator._memory.async_get(
+        coordinator._get_conversation_key("user", None)
+    )
+    assert context not in history
+
+
+@pytest.mark.asyncio
+async def test_delta_context(hass, mock_entry):
+    """Test follow-up turns only carry the changed entity states."""
+    mock_entry.options = {"persist_memory": False, "delta_refresh_turns": 2}
+    coordinator = MammouthDataUpdateCoordinator(hass, mock_entry)
+    turns = [
+        {"light.salon": "- Salon : on", "sensor.temp": "- Temp : 21°C"},
+        {"light.salon": "- Salon : off", "sensor.temp": "- Temp : 21°C"},
+        {"light.salon": "- Salon : off", "sensor.temp": "- Temp : 21°C"},
+        {"light.salon": "- Salon : on", "sensor.temp": "- Temp : 22°C"},
+    ]
+
+    sent = []
+    with patch(
+        "custom_components.mammouth_ai.memory.async_call_later"
+    ), patch.object(
+        coordinator, "async_chat_completion", return_value="Réponse"
+    ) as mock_completion:
+        for index, states in enumerate(turns):
+            system = "Prompt\n" + "\n".join(states.values())
+            await coordinator.async_chat_completion_with_memory(
+                [
+                    {"role": "system", "content": system},
+                    {"role": "user", "content": f"question {index}"},
+                ],
+                user_id="user",
+                entity_states=states,
+            )
+            sent.append(mock_completion.call_args.args[0])
+
+    # Tour 2 : le prompt du tour 1 est conservé, seul le salon est renvoyé
+    assert sent[1][0]["content"].endswith("- Salon : on\n- Temp : 21°C")
+    assert sent[1][-2]["content"].endswith("\n- Salon : off")
+    # Tour 3 : même écart par rapport au prompt complet
+    assert sent[2][0] == sent[1][0]
+    assert sent[2][-2]["content"].endswith("\n- Salon : off")
+    # Tour 4 : rafraîchissement complet après 2 tours différentiels
+    assert sent[3][0]["content"].endswith("- Salon : on\n- Temp : 22°C")
+    assert sent[3][-2] == {"role": "assistant", "content": "Réponse"}
+
+
+@pytest.mark.asyncio
+async def test_delta_context_failed_refresh(hass, mock_entry):
+    """Test a failed full refresh keeps the baseline of the stored prompt."""
+    mock_entry.options = {"persist_memory": False, "delta_refresh_turns": 1}
+    coordinator = MammouthDataUpdateCoordinator(hass, mock_entry)
+    turns = [{"sensor.a": f"- A : {value}"} for value in (1, 2, 3, 3)]
+
+    sent = []
+    with patch(
+        "custom_components.mammouth_ai.memory.async_call_later"
+    ), patch.object(
+        coordinator,
+        "async_chat_completion",
+        side_effect=["Réponse", "Réponse", HomeAssistantError("HTTP 503"), "Réponse"],
+    ) as mock_completion:
+        for index, states in enumerate(turns):
+            try:
+                await coordinator.async_chat_completion_with_memory(
+                    [
+                        {"role": "system", "content": f"Prompt\n{states['sensor.a']}"},
+                        {"role": "user", "content": f"question {index}"},
+                    ],
+                    user_id="user",
+                    entity_states=states,
+                )
+            except HomeAssistantError:
+                pass
+            sent.append(mock_completion.call_args.args[0])
+
+    # Tour 3 : rafraîchissement complet, mais l'appel échoue
+    assert sent[2][0]["content"].endswith("- A : 3")
+    # Tour 4 : l'historique garde le prompt du tour 1, qui est donc renvoyé
+    assert sent[3][0]["content"].endswith("- A : 3")
+    assert all(msg["content"] != "question 2" for msg in sent[3])
+
+
+@pytest.mark.asyncio
+async def test_generation_parameters_reach_payload(hass, mock_entry):
+    """Test max_tokens, temperature and stop are sent to the API."""
+    mock_entry.options = {"enable_memory": False}
+    coordinator = MammouthDataUpdateCoordinator(hass, mock_entry)
+
+    with patch.object(coordinator._session, "post") as mock_post:
+        mock_response = AsyncMock()
+        mock_response.status = 200
+        mock_response.read.return_value = json.dumps(
+            {"choices": [{"message": {"content": "C'est fait."}}]}
+        ).encode()
+        mock_post.return_value.__aenter__.return_value = mock_response
+
+        await coordinator.async_chat_completion_with_memory(
+            [{"role": "user", "content": "Allume la lampe"}],
+            user_id="user",
+            entity_ids=["light.salon"],
+            entity_states={"light.salon": "- Lampe : off"},
+            max_tokens=150,
+            temperature=0.2,
+            stop=["\n\n"],
+        )
+
+    payload = json.loads(mock_post.call_args.kwargs["data"])
+    assert (payload["max_tokens"], payload["temperature"]) == (150, 0.2)
+    assert payload["stop"] == ["\n\n"]
+    assert "entity_states" not in payload and "entity_ids" not in payload
+
+
+@pytest.mark.asyncio
+async def test_chat_completion_stream_records_cached_tokens(hass, mock_entry):
+    """Test reading the token usage of the final streamed chunk."""
+    coordinator = MammouthDataUpdateCoordinator(hass, mock_entry)
+    usage = {
+        "prompt_tokens": 40,
+        "completion_tokens": 2,
+        "total_tokens": 42,
+        "prompt_tokens_details": {"cached_tokens": 32},
+    }
+
+    async def _lines():
+        for line in (
+            b'data: {"choices": [{"delta": {"content": "Bonjour"}}]}\n',
+            b"data: " + json.dumps({"choices": [], "usage": usage}).encode() + b"\n",
+            b"data: [DONE]\n",
+        ):
+            yield line
+
+    with patch.object(coordinator._session, "post") as mock_post:
+        mock_response = AsyncMock()
+        mock_response.status = 200
+        mock_response.content = _lines()
+        mock_post.return_value.__aenter__.return_value = mock_response
+
+        deltas = [
+            delta
+            async for delta in coordinator.async_chat_completion_stream(
+                [{"role": "user", "content": "Test"}]
+            )
+        ]
+
+    assert deltas == ["Bonjour"]
+    metrics = coordinator.metrics
+    assert (metrics.prompt_tokens, metrics.completion_tokens) == (40, 2)
+    assert metrics.cached_tokens == 32
+    assert metrics.cache_hit_ratio == 0.8
@@ -0,0 +1,47 @@
+"""Tests pour les diagnostics."""
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.mammouth_ai.const import DOMAIN
+from custom_components.mammouth_ai.coordinator import MammouthDataUpdateCoordinator
+from custom_components.mammouth_ai.diagnostics import (
+    async_get_config_entry_diagnostics,
+)
+
+
+@pytest.mark.asyncio
+async def test_diagnostics_expose_stats(hass):
+    """Test the request counters and metrics are reported, without the key."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={
+            "api_key": "test_key",
+            "base_url": "https://test.api",
+            "model": "test-model",
+        },
+        options={
+            "response_cache": True,
+            "fallback_targets": "https://backup.api other-model backup_key",
+        },
+    )
+    entry.add_to_hass(hass)
+    coordinator = MammouthDataUpdateCoordinator(hass, entry)
+    hass.data[DOMAIN] = {entry.entry_id: coordinator}
+    coordinator.failovers = 2
+    coordinator.metrics.async_record_latency("upstream", 0.25)
+    coordinator.metrics.async_record_usage(
+        {"prompt_tokens": 20, "prompt_tokens_details": {"cached_tokens": 5}}
+    )
+
+    diagnostics = await async_get_config_entry_diagnostics(hass, entry)
+    await coordinator.async_shutdown()
+
+    assert diagnostics["entry"]["data"]["api_key"] == "**REDACTED**"
+    assert diagnostics["entry"]["options"]["fallback_targets"] == "**REDACTED**"
+    assert diagnostics["stats"]["failovers"] == 2
+    assert diagnostics["stats"]["circuit_state"] == "closed"
+    assert diagnostics["stats"]["singleflight_hits"] == 0
+    assert diagnostics["stats"]["routing_cloud"] == 0
+    assert "response_cache_hits" in diagnostics["stats"]
+    assert diagnostics["metrics"]["latency_ms"]["upstream"]["p95"] == 250.0
+    assert diagnostics["metrics"]["prompt_cache_hit_ratio"] == 0.25
@@ -0,0 +1,184 @@
+"""Tests pour l'index des entités."""
+from unittest.mock import MagicMock, patch
+
+import pytest
+from homeassistant.core import State
+
+from custom_components.mammouth_ai.entity_index import EntityIndex
+
+
+@pytest.fixture
+def hass():
+    """Home Assistant fixture."""
+    hass = MagicMock()
+    hass.states.async_all.return_value = [
+        State("light.salon", "on"),
+        State("light.cuisine", "unavailable"),
+        State("sensor.temperature", "21.5"),
+    ]
+    return hass
+
+
+@pytest.fixture
+def entity_registry():
+    """Entity registry fixture with the kitchen light in the kitchen."""
+    registry = MagicMock()
+    registry.async_get.side_effect = lambda entity_id: MagicMock(
+        area_id="cuisine" if entity_id == "light.cuisine" else "salon"
+    )
+    with patch(
+        "custom_components.mammouth_ai.entity_index.er.async_get",
+        return_value=registry,
+    ):
+        yield registry
+
+
+@pytest.fixture(autouse=True)
+def area_registry():
+    """Area registry fixture naming each area after its id."""
+
+    def _area(area_id):
+        area = MagicMock()
+        area.name = area_id.title()
+        return area
+
+    registry = MagicMock()
+    registry.async_get_area.side_effect = _area
+    with patch(
+        "custom_components.mammouth_ai.entity_index.ar.async_get",
+        return_value=registry,
+    ):
+        yield registry
+
+
+def _state_changed(entity_id, new_state):
+    event = MagicMock()
+    event.data = {"entity_id": entity_id, "new_state": new_state}
+    return event
+
+
+def test_seed_skips_unusable_states(hass, entity_registry):
+    """Test seeding the index from the state machine."""
+    index = EntityIndex(hass, ["light", "sensor"])
+    index.async_setup()
+
+    assert len(index) == 2
+    assert [s.entity_id for s in index.async_get_states(["light"])] == [
+        "light.salon"
+    ]
+    assert index.async_get_states(["light", "sensor"], ["salon"]) == []
+
+
+def test_state_changes_update_index(hass, entity_registry):
+    """Test incremental updates from state_changed events."""
+    index = EntityIndex(hass, ["light", "sensor"])
+    index.async_setup()
+
+    index._async_handle_state_changed(
+        _state_changed("light.cuisine", State("light.cuisine", "off"))
+    )
+    index._async_handle_state_changed(_state_changed("light.salon", None))
+
+    assert [s.entity_id for s in index.async_get_states(["light"])] == [
+        "light.cuisine"
+    ]
+    assert index.async_get_states(["light"], ["cuisine"]) == []
+    assert not index._async_filter_state_changed({"entity_id": "switch.prise"})
+
+
+def test_include_areas_and_device_area(hass):
+    """Test area inclusion and the fallback on the area of the device."""
+    entity_registry = MagicMock()
+    entity_registry.async_get.side_effect = lambda entity_id: MagicMock(
+        area_id="salon" if entity_id == "light.salon" else None,
+        device_id="thermostat",
+    )
+    device_registry = MagicMock()
+    device_registry.async_get.return_value = MagicMock(area_id="bureau")
+    with patch(
+        "custom_components.mammouth_ai.entity_index.er.async_get",
+        return_value=entity_registry,
+    ), patch(
+        "custom_components.mammouth_ai.entity_index.dr.async_get",
+        return_value=device_registry,
+    ):
+        index = EntityIndex(hass, ["light", "sensor"])
+        index.async_setup()
+
+        assert index.async_get_area("sensor.temperature") == "bureau"
+        assert [
+            s.entity_id
+            for s in index.async_get_states(["light", "sensor"], (), ["bureau"])
+        ] == ["sensor.temperature"]
+        assert index.async_get_states(["sensor"], ["bureau"], ["bureau"]) == []
+
+        # L'appareil change de pièce
+        device_registry.async_get.return_value = MagicMock(area_id="salon")
+        event = MagicMock()
+        event.data = {
+            "action": "update",
+            "device_id": "thermostat",
+            "changes": {"area_id": "bureau"},
+        }
+        with patch(
+            "custom_components.mammouth_ai.entity_index.er.async_entries_for_device",
+            return_value=[MagicMock(entity_id="sensor.temperature")],
+        ):
+            index._async_handle_device_registry_updated(event)
+
+        assert index.async_get_area("sensor.temperature") == "salon"
+        assert index.async_get_states(["sensor"], (), ["bureau"]) == []
+
+
+def test_rank_by_relevance(hass, entity_registry):
+    """Test ranking the indexed states by relevance to the query."""
+    hass.states.async_all.return_value = [
+        State("sensor.temperature", "21.5", {"friendly_name": "Température"}),
+        State("light.plafonnier", "on", {"friendly_name": "Plafonnier"}),
+        State("light.cuisine", "off", {"friendly_name": "Lampe"}),
+    ]
+    index = EntityIndex(hass, ["light", "sensor"])
+    index.async_setup()
+    states = index.async_get_states(["sensor", "light"])
+
+    # Le nom de la pièce suffit à trouver la lampe de la cuisine
+    ranked = index.async_rank(states, "Allume les lumières de la cuisine", 1)
+    assert [s.entity_id for s in ranked] == ["light.cuisine"]
+
+    index._async_handle_state_changed(
+        _state_changed(
+            "light.plafonnier",
+            State("light.plafonnier", "on", {"friendly_name": "Lustre"}),
+        )
+    )
+    ranked = index.async_rank(states, "le lustre", 2)
+    assert [s.entity_id for s in ranked] == ["light.plafonnier", "sensor.temperature"]
+
+
+def test_names_and_revision_ignore_availability(hass, entity_registry):
+    """Test the catalogue membership does not follow availability."""
+    index = EntityIndex(hass, ["light", "sensor"])
+    index.async_setup()
+    revision = index.revision
+
+    assert index.async_get_names(["light"]) == {
+        "light.salon": "salon",
+        "light.cuisine": "cuisine",
+    }
+    assert index.async_get_names(["light"], ["cuisine"]) == {"light.salon": "salon"}
+
+    index._async_handle_state_changed(
+        _state_changed("light.salon", State("light.salon", "unavailable"))
+    )
+    index._async_handle_state_changed(
+        _state_changed("light.cuisine", State("light.cuisine", "on"))
+    )
+    assert [s.entity_id for s in index.async_get_states(["light"])] == [
+        "light.cuisine"
+    ]
+    assert set(index.async_get_names(["light"])) == {"light.salon", "light.cuisine"}
+    assert index.revision == revision
+
+    index._async_handle_state_changed(_state_changed("light.salon", None))
+    assert index.async_get_names(["light"]) == {"light.cuisine": "cuisine"}
+    assert index.revision > revision
@@ -0,0 +1,64 @@
+"""Tests pour le filtrage intelligent par mots-clés."""
+from custom_components.mammouth_ai.keywords import (
+    DEFAULT_MATCHER,
+    KeywordMatcher,
+    is_command,
+    parse_keyword_table,
+)
+
+
+def test_match_domains():
+    """Test matching keywords across languages."""
+    assert DEFAULT_MATCHER.match("Allume la lumière du salon") == {"light", "switch"}
+    assert DEFAULT_MATCHER.match("is the garage door open") == {
+        "binary_sensor",
+        "cover",
+    }
+    assert DEFAULT_MATCHER.match("raconte-moi une blague") == set()
+
+
+def test_short_keywords_need_whole_words():
+    """Test that short keywords no longer match inside other words."""
+    # "aan" dans "maand", "uit" dans "fruit", "open" dans "opening"
+    assert DEFAULT_MATCHER.match("welke maand eet je fruit") == set()
+    assert DEFAULT_MATCHER.match("the opening hours") == set()
+    # Les mots-clés longs acceptent une terminaison
+    assert DEFAULT_MATCHER.match("allumer les lampes") == {"light", "switch"}
+
+
+def test_short_keywords_accept_plurals():
+    """Test that short keywords still match their plural forms."""
+    assert DEFAULT_MATCHER.match("liga a luz") == {"light"}
+    assert DEFAULT_MATCHER.match("liga as luzes") == {"light"}
+    assert DEFAULT_MATCHER.match("de lampen in huis") == {"light"}
+    assert DEFAULT_MATCHER.match("close the doors") == {"binary_sensor"}
+
+
+def test_custom_keyword_tables():
+    """Test user-supplied keyword tables."""
+    tables = parse_keyword_table(
+        "fr.media_player: télé, enceinte\nvacuum: aspirateur\ninvalid line"
+    )
+    assert tables == {
+        "fr": {"media_player": ["télé", "enceinte"]},
+        "custom": {"vacuum": ["aspirateur"]},
+    }
+
+    matcher = KeywordMatcher(extra_tables=tables)
+    assert matcher.match("lance l'aspirateur et allume la télé") == {
+        "vacuum",
+        "media_player",
+        "light",
+        "switch",
+    }
+
+
+def test_is_command():
+    """Test telling short device commands from open questions."""
+    assert is_command("Allume la lumière du salon")
+    assert is_command("turn off the kitchen lights")
+    assert is_command("Schalte die Heizung ein")
+    assert is_command("peux-tu fermer les volets")
+    assert not is_command("quelle est la température dans la chambre ?")
+    assert not is_command("how do I close the garage when I leave")
+    assert not is_command("raconte-moi une blague sur les mammouths")
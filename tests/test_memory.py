@@ -0,0 +1,198 @@
+"""Tests pour la mémoire des conversations."""
+from datetime import timedelta
+
+import pytest
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+
+from custom_components.mammouth_ai.memory import ConversationMemory
+
+INDEX_KEY = "mammouth_ai.test_entry.memory"
+
+
+def _memory(hass, **kwargs):
+    """Build the memory of the test config entry."""
+    return ConversationMemory(
+        hass,
+        "test_entry",
+        max_cached=kwargs.pop("max_cached", 10),
+        max_storage_bytes=kwargs.pop("max_storage_bytes", 100_000),
+        **kwargs,
+    )
+
+
+def _turn(question, answer="Réponse"):
+    """Return one exchange of a conversation."""
+    return [
+        {"role": "user", "content": question},
+        {"role": "assistant", "content": answer},
+    ]
+
+
+@pytest.mark.asyncio
+async def test_save_and_load_round_trip(hass, hass_storage):
+    """Test histories are written to the Store and read back after a restart."""
+    memory = _memory(hass)
+    await memory.async_load_index()
+    system = {"role": "system", "content": "Prompt"}
+    memory.async_set("user", [system, *_turn("Bonjour")])
+    await memory.async_shutdown()
+
+    # Le prompt système est rendu à chaque tour : il n'est pas stocké
+    stored = hass_storage[f"{INDEX_KEY}.user"]["data"]["messages"]
+    assert stored == _turn("Bonjour")
+    assert "user" in hass_storage[INDEX_KEY]["data"]["conversations"]
+
+    restarted = _memory(hass)
+    await restarted.async_load_index()
+    assert "user" in restarted
+    assert await restarted.async_get("user") == _turn("Bonjour")
+    await restarted.async_shutdown()
+
+
+@pytest.mark.asyncio
+async def test_restore_from_existing_storage(hass, hass_storage):
+    """Test loading histories written by a previous run."""
+    hass_storage[INDEX_KEY] = {
+        "version": 1,
+        "key": INDEX_KEY,
+        "data": {"conversations": {"user": {"last_access": 0, "size": 64}}},
+    }
+    hass_storage[f"{INDEX_KEY}.user"] = {
+        "version": 1,
+        "key": f"{INDEX_KEY}.user",
+        "data": {"messages": _turn("Il fait beau ?", "Oui")},
+    }
+
+    memory = _memory(hass)
+    assert memory.cached_keys == []
+    assert await memory.async_get("user") == _turn("Il fait beau ?", "Oui")
+    assert await memory.async_get("other") == []
+    await memory.async_shutdown()
+
+
+@pytest.mark.asyncio
+async def test_lru_eviction_reloads_from_storage(hass, hass_storage):
+    """Test the RAM cache keeps the most recent conversations only."""
+    memory = _memory(hass, max_cached=2)
+    await memory.async_load_index()
+    for key in ("a", "b", "c"):
+        memory.async_set(key, _turn(f"question {key}"))
+
+    assert memory.cached_keys == ["b", "c"]
+    assert set(memory.keys()) == {"a", "b", "c"}
+    # La conversation évincée est relue depuis le stockage
+    assert await memory.async_get("a") == _turn("question a")
+    assert memory.cached_keys == ["c", "a"]
+    await memory.async_shutdown()
+
+
+@pytest.mark.asyncio
+async def test_lru_eviction_without_persistence(hass, hass_storage):
+    """Test an evicted conversation is lost when nothing is stored."""
+    memory = _memory(hass, max_cached=1, persist=False)
+    memory.async_set("a", _turn("question a"))
+    memory.async_set("b", _turn("question b"))
+
+    assert "a" not in memory
+    assert await memory.async_get("a") == []
+    await memory.async_shutdown()
+    assert hass_storage == {}
+
+
+@pytest.mark.asyncio
+async def test_storage_limit_removes_oldest(hass, hass_storage):
+    """Test the least recently used conversations are removed above the cap."""
+    memory = _memory(hass, max_storage_bytes=260)
+    await memory.async_load_index()
+    for key in ("a", "b"):
+        memory.async_set(key, _turn(f"question {key}"))
+    await memory.async_flush()
+    assert f"{INDEX_KEY}.a" in hass_storage
+
+    memory.async_set("c", _turn("x" * 100))
+    await hass.async_block_till_done()
+
+    assert memory.keys() == ["b", "c"]
+    assert memory.storage_bytes <= 260
+    assert f"{INDEX_KEY}.a" not in hass_storage
+    await memory.async_shutdown()
+    assert set(hass_storage[INDEX_KEY]["data"]["conversations"]) == {"b", "c"}
+
+
+@pytest.mark.asyncio
+async def test_remove_all(hass, hass_storage):
+    """Test removing every stored conversation of a deleted entry."""
+    memory = _memory(hass)
+    await memory.async_load_index()
+    memory.async_set("user", _turn("Bonjour"))
+    await memory.async_shutdown()
+
+    await _memory(hass, max_cached=0, max_storage_bytes=0).async_remove_all()
+
+    assert hass_storage == {}
+
+
+async def _advance(hass, freezer, minutes):
+    """Move the clock forward and run the timers that are due."""
+    freezer.tick(timedelta(minutes=minutes))
+    async_fire_time_changed(hass)
+    await hass.async_block_till_done()
+
+
+@pytest.mark.asyncio
+async def test_expired_conversations_are_dropped(hass, hass_storage, freezer):
+    """Test each conversation is evicted when its own deadline passes."""
+    memory = _memory(hass, expire_after=3600)
+    await memory.async_load_index()
+    memory.async_set("a", _turn("question a"))
+    await _advance(hass, freezer, 30)
+    memory.async_set("b", _turn("question b"))
+
+    await _advance(hass, freezer, 31)
+    assert memory.keys() == ["b"]
+    assert memory.cached_keys == ["b"]
+    assert f"{INDEX_KEY}.a" not in hass_storage
+
+    await _advance(hass, freezer, 30)
+    assert memory.keys() == []
+    # Plus rien à expirer : aucun minuteur ne reste armé
+    assert memory._unsub_expiry is None
+    await memory.async_shutdown()
+
+
+@pytest.mark.asyncio
+async def test_access_reschedules_expiry(hass, hass_storage, freezer):
+    """Test touching a conversation postpones its expiry."""
+    memory = _memory(hass, expire_after=3600)
+    await memory.async_load_index()
+    memory.async_set("a", _turn("question a"))
+
+    await _advance(hass, freezer, 50)
+    memory.async_touch("a")
+    await _advance(hass, freezer, 20)
+    assert "a" in memory
+
+    await _advance(hass, freezer, 45)
+    assert "a" not in memory
+    await memory.async_shutdown()
+
+
+@pytest.mark.asyncio
+async def test_shutdown_cancels_expiry_timer(hass, hass_storage, freezer):
+    """Test unloading cancels the timer and keeps the stored histories."""
+    memory = _memory(hass, expire_after=3600)
+    await memory.async_load_index()
+    memory.async_set("a", _turn("question a"))
+    assert memory._unsub_expiry is not None
+
+    await memory.async_shutdown()
+    assert memory._unsub_expiry is None
+    await _advance(hass, freezer, 120)
+    assert f"{INDEX_KEY}.a" in hass_storage
+
+    # Après un redémarrage, l'échéance dépassée est appliquée au chargement
+    restarted = _memory(hass, expire_after=3600)
+    await restarted.async_load_index()
+    await _advance(hass, freezer, 0)
+    assert "a" not in restarted
+    await restarted.async_shutdown()
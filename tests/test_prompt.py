@@ -0,0 +1,142 @@
+"""Tests pour la mise en forme des entités dans le prompt."""
+import pytest
+from homeassistant.core import State
+
+from custom_components.mammouth_ai.prompt import (
+    PromptRenderer,
+    build_context_message,
+    compact_state,
+    format_entities_table,
+)
+
+
+def _measure(value):
+    """Return a sensor state measured in degrees."""
+    return State("sensor.temp", value, {"unit_of_measurement": "°C"})
+
+
+def test_compact_state():
+    """Test measurements are rounded and other states kept."""
+    assert compact_state(_measure("21.549")) == "21.5"
+    assert compact_state(_measure("45.0")) == "45"
+    # Les petites valeurs gardent leurs chiffres significatifs
+    assert compact_state(_measure("0.04")) == "0.04"
+    assert compact_state(_measure("0.01234")) == "0.0123"
+    assert compact_state(_measure("-0.25")) == "-0.25"
+    assert compact_state(_measure("0.0")) == "0"
+    # Les grandes valeurs gardent leur partie entière
+    assert compact_state(_measure("1234.56")) == "1235"
+    assert compact_state(_measure("100")) == "100"
+    assert compact_state(_measure("on")) == "on"
+    assert compact_state(_measure("nan")) == "nan"
+    # Une classe d'état suffit à identifier une mesure
+    energy = State("sensor.energie", "12.3456", {"state_class": "total_increasing"})
+    assert compact_state(energy) == "12.3"
+
+
+def test_compact_state_keeps_codes_and_integers():
+    """Test versions, codes and integers are never rewritten."""
+    assert compact_state(State("update.core", "2025.10")) == "2025.10"
+    assert compact_state(State("sensor.version", "1.10")) == "1.10"
+    assert compact_state(_measure("01234")) == "01234"
+    assert compact_state(_measure("12345678901234567890")) == "12345678901234567890"
+
+
+def test_context_message_names_the_user():
+    """Test the volatile message carries the user kept out of the prefix."""
+    message = build_context_message("- Lampe : on", user_name="Alice")
+
+    assert message["role"] == "system"
+    assert message["content"] == (
+        "Utilisateur actuel : Alice\nÉtats actuels :\n- Lampe : on"
+    )
+    assert build_context_message("- Lampe : on")["content"] == (
+        "États actuels :\n- Lampe : on"
+    )
+
+
+def test_format_entities_table():
+    """Test rows are grouped by area, domain and unit."""
+    states = [
+        State(
+            "sensor.temp_salon",
+            "21.46",
+            {"friendly_name": "Température", "unit_of_measurement": "°C"},
+        ),
+        State("light.salon", "on", {"friendly_name": "Lampe"}),
+        State(
+            "sensor.temp_ext",
+            "8.0",
+            {"friendly_name": "Extérieur", "unit_of_measurement": "°C"},
+        ),
+        State(
+            "sensor.radiateur",
+            "19",
+            {"friendly_name": "Radiateur", "unit_of_measurement": "°C"},
+        ),
+    ]
+    areas = {
+        "sensor.temp_salon": "Salon",
+        "light.salon": "Salon",
+        "sensor.radiateur": "Salon",
+    }
+
+    table = format_entities_table(states, areas.get)
+
+    assert table.splitlines()[1:] == [
+        "[Salon]",
+        "sensor(°C): Température=21.5; Radiateur=19",
+        "light: Lampe=on",
+        "[Autres]",
+        "sensor(°C): Extérieur=8",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_renderer_caches_identical_inputs(hass):
+    """Test renderings are reused for the same variables."""
+    renderer = PromptRenderer(hass, "Bonjour {{ user_name }}", max_entries=2)
+
+    assert renderer.async_render({"user_name": "Alice"}) == "Bonjour Alice"
+    assert renderer.async_render({"user_name": "Alice"}) == "Bonjour Alice"
+    assert renderer.stats == {
+        "prompt_cache_hits": 1,
+        "prompt_cache_misses": 1,
+        "prompt_cache_size": 1,
+    }
+
+    # Le plus ancien rendu est évincé au-delà de la taille maximale
+    renderer.async_render({"user_name": "Bob"})
+    renderer.async_render({"user_name": "Chloé"})
+    assert renderer.stats["prompt_cache_size"] == 2
+    renderer.async_render({"user_name": "Alice"})
+    assert renderer.stats["prompt_cache_misses"] == 4
+
+    renderer.async_clear()
+    assert renderer.stats["prompt_cache_size"] == 0
+
+
+@pytest.mark.asyncio
+async def test_renderer_does_not_cache_live_state(hass):
+    """Test templates reading the state machine are rendered every time."""
+    renderer = PromptRenderer(hass, "Salon : {{ states('light.salon') }}")
+
+    hass.states.async_set("light.salon", "on")
+    assert renderer.async_render({}) == "Salon : on"
+    hass.states.async_set("light.salon", "off")
+    assert renderer.async_render({}) == "Salon : off"
+    assert renderer.stats["prompt_cache_size"] == 0
+    assert renderer.stats["prompt_cache_hits"] == 0
+
+
+@pytest.mark.asyncio
+async def test_renderer_references(hass):
+    """Test detecting the variables used by the prompt template."""
+    renderer = PromptRenderer(
+        hass, "{% if entities_table %}{{ entities_table }}{% endif %}"
+    )
+    assert renderer.references("entities_table")
+    assert not renderer.references("entities")
+
+    legacy = PromptRenderer(hass, "{% for domain in entities_by_domain %}{% endfor %}")
+    assert not legacy.references("entities_table")
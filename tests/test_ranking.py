@@ -0,0 +1,36 @@
+"""Tests pour le classement des entités par pertinence."""
+from homeassistant.core import State
+
+from custom_components.mammouth_ai.ranking import RelevanceIndex, normalize_tokens
+
+
+def test_normalize_tokens():
+    """Test accents, case, separators and plurals are normalised."""
+    assert normalize_tokens("Lumières du SALON") == {"lumiere", "du", "salon"}
+    assert normalize_tokens("light.salle_de_bain") == {"light", "salle", "de", "bain"}
+
+
+def test_top_k_prefers_rare_and_weighted_tokens():
+    """Test the scoring and the order of the top-k states."""
+    index = RelevanceIndex()
+    index.async_set("light.salon", [("Lampe salon", 3.0), ("Salon", 2.0)])
+    index.async_set("light.chambre", [("Lampe chambre", 3.0)])
+    index.async_set("sensor.salon", [("Température", 3.0), ("Salon", 2.0)])
+    states = [
+        State("sensor.salon", "21"),
+        State("light.chambre", "off"),
+        State("light.salon", "on"),
+    ]
+
+    ranked = index.async_top_k(states, "allume la lampe du salon", 1)
+    assert [s.entity_id for s in ranked] == ["light.salon"]
+    ranked = index.async_top_k(states, "la température du salon", 2)
+    assert [s.entity_id for s in ranked] == ["sensor.salon", "light.salon"]
+
+    # Sans correspondance, l'ordre d'origine est conservé
+    ranked = index.async_top_k(states, "quelle heure est-il", 2)
+    assert [s.entity_id for s in ranked] == ["sensor.salon", "light.chambre"]
+
+    index.async_remove("light.salon")
+    assert len(index) == 2
+    assert "light.salon" not in index.async_scores("lampe salon")
@@ -0,0 +1,91 @@
+"""Tests pour le routage local des demandes."""
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from homeassistant.helpers import intent
+
+from custom_components.mammouth_ai.metrics import RoutingStats
+from custom_components.mammouth_ai.routing import async_handle_locally
+
+CONVERSATION = "custom_components.mammouth_ai.routing.conversation"
+
+
+@pytest.fixture
+def user_input():
+    """Conversation input fixture."""
+    return MagicMock(text="allume la lumière du salon", language="fr")
+
+
+def _patch_local(trigger_response=None, intent_response=None):
+    """Patch the sentence triggers and intents of the conversation component."""
+    triggers = patch(
+        f"{CONVERSATION}.async_handle_sentence_triggers",
+        AsyncMock(return_value=trigger_response),
+        create=True,
+    )
+    intents = patch(
+        f"{CONVERSATION}.async_handle_intents",
+        AsyncMock(return_value=intent_response),
+        create=True,
+    )
+    return triggers, intents
+
+
+@pytest.mark.asyncio
+async def test_sentence_trigger_answers_first(hass, user_input):
+    """Test a matching sentence trigger answers without running intents."""
+    triggers, intents = _patch_local(trigger_response="Bonne nuit")
+    with triggers, intents as mock_intents:
+        response = await async_handle_locally(hass, user_input)
+
+    assert response.speech["plain"]["speech"] == "Bonne nuit"
+    mock_intents.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_matched_intent_answers(hass, user_input):
+    """Test a successful local intent is returned."""
+    intent_response = intent.IntentResponse(language="fr")
+    intent_response.async_set_speech("Lumière allumée")
+    triggers, intents = _patch_local(intent_response=intent_response)
+    with triggers, intents:
+        assert await async_handle_locally(hass, user_input) is intent_response
+
+
+@pytest.mark.asyncio
+async def test_unmatched_or_failed_intent_escalates(hass, user_input):
+    """Test requests are escalated when no intent matches or it fails."""
+    triggers, intents = _patch_local()
+    with triggers, intents:
+        assert await async_handle_locally(hass, user_input) is None
+
+    failed = intent.IntentResponse(language="fr")
+    failed.async_set_error(
+        intent.IntentResponseErrorCode.NO_VALID_TARGETS, "Aucune lumière"
+    )
+    triggers, intents = _patch_local(intent_response=failed)
+    with triggers, intents:
+        assert await async_handle_locally(hass, user_input) is None
+
+
+def test_routing_stats():
+    """Test the routing counters and the estimated latency saved."""
+    routing = RoutingStats()
+    assert routing.stats["routing_local_ratio"] is None
+
+    # Sans appel au modèle, aucun gain ne peut encore être estimé
+    routing.async_record_local(0.1)
+    assert routing.stats["routing_latency_saved_s"] == 0
+
+    routing.async_record_cloud(2.0)
+    routing.async_record_cloud(1.0)
+    routing.async_record_local(0.2)
+
+    assert routing.stats == {
+        "routing_local": 2,
+        "routing_cloud": 2,
+        "routing_local_ratio": 0.5,
+        "routing_local_latency_ms": 120,
+        "routing_cloud_latency_ms": 1800,
+        "routing_latency_saved_s": 1.6,
+    }
@@ -0,0 +1,97 @@
+"""Tests pour la session HTTP dédiée."""
+from unittest.mock import patch
+
+import pytest
+from homeassistant.const import EVENT_HOMEASSISTANT_CLOSE
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.mammouth_ai.const import DOMAIN, HTTP_KEEPALIVE_TIMEOUT
+from custom_components.mammouth_ai.coordinator import MammouthDataUpdateCoordinator
+from custom_components.mammouth_ai.session import async_create_session
+
+
+@pytest.fixture
+def entry(hass):
+    """Config entry fixture."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={
+            "api_key": "test_key",
+            "base_url": "https://test.api",
+            "model": "test-model",
+        },
+        options={"pool_size": 4},
+    )
+    entry.add_to_hass(hass)
+    return entry
+
+
+@pytest.mark.asyncio
+async def test_tuned_connector(hass):
+    """Test the pool size, keep-alive and DNS cache of the session."""
+    session = async_create_session(4)
+    connector = session.connector
+
+    assert (connector.limit, connector.limit_per_host) == (4, 4)
+    assert connector._keepalive_timeout == HTTP_KEEPALIVE_TIMEOUT
+    assert connector.use_dns_cache
+    await session.close()
+
+
+@pytest.mark.asyncio
+async def test_unload_closes_session(hass, entry):
+    """Test the coordinator closes its session when the entry is unloaded."""
+    coordinator = MammouthDataUpdateCoordinator(hass, entry)
+    assert coordinator._session.connector.limit == 4
+
+    await coordinator.async_shutdown()
+
+    assert coordinator._session.closed
+
+
+@pytest.mark.asyncio
+async def test_home_assistant_close_closes_session(hass, entry):
+    """Test the session is closed when Home Assistant closes."""
+    coordinator = MammouthDataUpdateCoordinator(hass, entry)
+
+    hass.bus.async_fire(EVENT_HOMEASSISTANT_CLOSE)
+    await hass.async_block_till_done()
+
+    assert coordinator._session.closed
+    # Un déchargement ultérieur ne doit pas échouer
+    await coordinator.async_shutdown()
+
+
+@pytest.mark.asyncio
+async def test_setup_prewarms_fallback_targets_only(hass):
+    """Test setup skips the primary URL, already opened by the validation."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={
+            "api_key": "test_key",
+            "base_url": "https://test.api",
+            "model": "test-model",
+        },
+        options={
+            "prewarm_connections": True,
+            "fallback_targets": "backup-model\nhttps://backup.api other-model",
+        },
+    )
+    entry.add_to_hass(hass)
+    coordinator = MammouthDataUpdateCoordinator(hass, entry)
+
+    with patch.object(coordinator._session, "head") as mock_head:
+        await coordinator.async_setup_connections()
+        assert [call.args[0] for call in mock_head.call_args_list] == [
+            "https://backup.api/models"
+        ]
+
+        # Les connexions inactives sont ensuite toutes rafraîchies
+        mock_head.reset_mock()
+        await coordinator._async_prewarm()
+        assert {call.args[0] for call in mock_head.call_args_list} == {
+            "https://test.api/models",
+            "https://backup.api/models",
+        }
+
+    await coordinator.async_shutdown()